@@ -0,0 +1,11 @@
+"""Headless banking core: domain logic and storage with no UI dependencies."""
+from bank.core import DEBIT_TYPES, SWEEP_PERIODS, Bank
+from bank.money import PAISE, format_inr, to_paise
+from bank.records import Account, History, Transaction
+from bank.ids import IdAllocator, luhn_valid
+from bank.cards import CardAuthorizer
+
+__all__ = [
+    "Bank", "CardAuthorizer", "IdAllocator", "Account", "History", "Transaction",
+    "DEBIT_TYPES", "SWEEP_PERIODS", "PAISE", "format_inr", "to_paise", "luhn_valid",
+]
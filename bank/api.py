@@ -0,0 +1,406 @@
+"""HTTP/JSON API over the Bank core.
+
+    python -m bank serve --port 8080
+    curl -X POST localhost:8080/accounts/ABCD123456/deposit -H 'X-Pin: 1234' -d '{"amount": 50000}'
+
+An asyncio front end parses HTTP/1.1 (keep-alive by default) and hands every
+Bank call to a bounded thread pool, so slow storage never blocks the event
+loop and thousands of idle connections cost only their sockets. Money in
+requests and responses is integer paise. The account PIN travels in the
+X-Pin header. A call that outlives the request timeout is answered with a
+504, but it is not cancelled and may still commit.
+"""
+import asyncio
+import json
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from bank import metrics
+from bank.core import Bank
+from bank.records import record_to_json
+
+logger = logging.getLogger(__name__)
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+           405: "Method Not Allowed", 408: "Request Timeout", 413: "Payload Too Large",
+           500: "Internal Server Error", 503: "Service Unavailable", 504: "Gateway Timeout"}
+MAX_BODY = 1 << 20
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _outcome(ok, message, status=400, **extra):
+    if not ok:
+        return (401 if message == "Invalid credentials." else status), {"ok": False, "message": message}
+    return 200, dict(ok=True, message=message, **extra)
+
+
+def _require(body, *fields):
+    missing = [f for f in fields if f not in body]
+    if missing:
+        raise ApiError(400, f"Missing fields: {', '.join(missing)}")
+    return [body[f] for f in fields]
+
+
+def _amount(body, field="amount"):
+    value = _require(body, field)[0]
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise ApiError(400, f"'{field}' must be an integer number of paise")
+    return value
+
+
+def _integer(body, field):
+    value = _require(body, field)[0]
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise ApiError(400, f"'{field}' must be an integer")
+    return value
+
+
+def _strings(body, *fields):
+    values = _require(body, *fields)
+    for field, value in zip(fields, values):
+        if not isinstance(value, str):
+            raise ApiError(400, f"'{field}' must be a string")
+    return values
+
+
+def _date(value):
+    return datetime.strptime(value, "%Y-%m-%d") if value else None
+
+
+def _account_view(user):
+    view = {key: user.get(key) for key in ("accountNo", "name", "email", "mobile", "balance", "created_at")}
+    view["recent_transactions"] = user.get('transactions', [])[-10:]
+    return view
+
+
+# Handlers run on the worker pool: (request) -> (status, payload[, content_type])
+
+def create_account(req):
+    name, email, mobile, address, pin = _strings(req.body, "name", "email", "mobile", "address", "pin")
+    age = _integer(req.body, "age")
+    ok, msg = Bank.create_account(name, age, email, mobile, address, pin)
+    if not ok:
+        return 400, {"ok": False, "message": msg}
+    return 201, {"ok": True, "message": "Account created.", "account": msg}
+
+
+def get_account(req):
+    user, msg = Bank.get_details(req.account, req.pin)
+    if not user:
+        return 401, {"ok": False, "message": msg}
+    return 200, {"ok": True, "account": _account_view(user)}
+
+
+def delete_account(req):
+    return _outcome(*Bank.delete_account(req.account, req.pin))
+
+
+def deposit(req):
+    return _outcome(*Bank.deposit_money(req.account, req.pin, _amount(req.body)))
+
+
+def withdraw(req):
+    return _outcome(*Bank.withdraw_money(req.account, req.pin, _amount(req.body)))
+
+
+def transfer(req):
+    to_account, = _strings(req.body, "to")
+    description, = _strings(req.body, "description") if "description" in req.body else ("",)
+    return _outcome(*Bank.transfer_money(req.account, req.pin, to_account, _amount(req.body), description))
+
+
+def pay_bill(req):
+    bill_type, provider, bill_number = _require(req.body, "type", "provider", "bill_number")
+    return _outcome(*Bank.pay_bill(req.account, req.pin, bill_type, provider, bill_number, _amount(req.body)))
+
+
+def apply_loan(req):
+    loan_type, purpose = _strings(req.body, "type", "purpose")
+    tenure = _integer(req.body, "tenure_months")
+    if tenure <= 0:
+        raise ApiError(400, "'tenure_months' must be positive")
+    ok, loan_id, emi = Bank.apply_loan(req.account, req.pin, loan_type, _amount(req.body), tenure, purpose)
+    if not ok:
+        return _outcome(False, loan_id)
+    return 201, {"ok": True, "message": "Loan approved.", "loan_id": loan_id, "emi": emi}
+
+
+def pay_emi(req):
+    return _outcome(*Bank.pay_emi(req.account, req.pin, req.params[1]))
+
+
+def close_loan(req):
+    return _outcome(*Bank.close_loan(req.account, req.pin, req.params[1]))
+
+
+def list_goals(req):
+    user, msg = Bank.get_details(req.account, req.pin)
+    if not user:
+        return 401, {"ok": False, "message": msg}
+    return 200, {"ok": True, "goals": user.get('savings_goals', [])}
+
+
+def add_goal(req):
+    name, deadline = _require(req.body, "name", "deadline")
+    target = _amount(req.body, "target_amount")
+    sweep = req.body.get("sweep") or {}
+    if not isinstance(sweep, dict):
+        raise ApiError(400, "'sweep' must be an object")
+    if sweep.get("mode") is not None:
+        value = _require(sweep, "value")[0]
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            raise ApiError(400, "'sweep.value' must be a number")
+        _strings(sweep, "mode", *(["period"] if "period" in sweep else []))
+    return _outcome(*Bank.add_savings_goal(req.account, req.pin, name, target, deadline, sweep.get("mode"),
+                                           sweep.get("value", 0), sweep.get("period", "monthly")))
+
+
+def contribute_goal(req):
+    return _outcome(*Bank.contribute_to_goal(req.account, req.pin, int(req.params[1]), _amount(req.body)))
+
+
+def list_transactions(req):
+    q = req.query
+    try:
+        filtered, msg = Bank.filter_transactions(
+            req.account, req.pin, _date(q.get("start")),
+            datetime.combine(_date(q["end"]), datetime.max.time()) if q.get("end") else None,
+            q.get("type"), int(q["min_amount"]) if q.get("min_amount") else None,
+            int(q["max_amount"]) if q.get("max_amount") else None)
+    except ValueError as err:
+        raise ApiError(400, str(err))
+    if filtered is None:
+        return 401, {"ok": False, "message": msg}
+    return 200, {"ok": True, "count": len(filtered), "transactions": filtered}
+
+
+def statement(req):
+    user, msg = Bank.get_details(req.account, req.pin)
+    if not user:
+        return 401, {"ok": False, "message": msg}
+    q = req.query
+    try:
+        start = _date(q.get("start"))
+        end = datetime.combine(_date(q["end"]), datetime.max.time()) if q.get("end") else None
+    except ValueError as err:
+        raise ApiError(400, str(err))
+    transactions, _ = Bank.filter_transactions(req.account, req.pin, start, end)
+    return 200, Bank.generate_statement_pdf(user, transactions).getvalue(), "application/pdf"
+
+
+def health(req):
+    return 200, {"ok": True}
+
+
+def metrics_endpoint(req):
+    return 200, metrics.render().encode(), "text/plain; version=0.0.4"
+
+
+ROUTES = [
+    ("GET", r"/health", health),
+    ("GET", r"/metrics", metrics_endpoint),
+    ("POST", r"/accounts", create_account),
+    ("GET", r"/accounts/([^/]+)", get_account),
+    ("DELETE", r"/accounts/([^/]+)", delete_account),
+    ("POST", r"/accounts/([^/]+)/deposit", deposit),
+    ("POST", r"/accounts/([^/]+)/withdraw", withdraw),
+    ("POST", r"/accounts/([^/]+)/transfer", transfer),
+    ("POST", r"/accounts/([^/]+)/bills", pay_bill),
+    ("POST", r"/accounts/([^/]+)/loans", apply_loan),
+    ("POST", r"/accounts/([^/]+)/loans/([^/]+)/emi", pay_emi),
+    ("POST", r"/accounts/([^/]+)/loans/([^/]+)/close", close_loan),
+    ("GET", r"/accounts/([^/]+)/goals", list_goals),
+    ("POST", r"/accounts/([^/]+)/goals", add_goal),
+    ("POST", r"/accounts/([^/]+)/goals/(\d+)/contribute", contribute_goal),
+    ("GET", r"/accounts/([^/]+)/transactions", list_transactions),
+    ("GET", r"/accounts/([^/]+)/statement", statement),
+]
+_COMPILED = [(method, re.compile(pattern + r"/?"), handler) for method, pattern, handler in ROUTES]
+
+
+class Request:
+    __slots__ = ('method', 'path', 'query', 'headers', 'body', 'params', 'account', 'pin')
+
+    def __init__(self, method, path, query, headers, body):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+        self.params = ()
+        self.account = None
+        self.pin = headers.get("x-pin", "")
+
+
+def dispatch(req):
+    allowed = False
+    for method, pattern, handler in _COMPILED:
+        match = pattern.fullmatch(req.path)
+        if not match:
+            continue
+        if method != req.method:
+            allowed = True
+            continue
+        req.params = tuple(unquote(p) for p in match.groups())
+        req.account = req.params[0] if req.params else None
+        return handler(req)
+    if allowed:
+        return 405, {"ok": False, "message": "Method not allowed."}
+    return 404, {"ok": False, "message": "Not found."}
+
+
+class BankAPIServer:
+    def __init__(self, host="127.0.0.1", port=8080, workers=8, max_pending=256, request_timeout=10.0,
+                 idle_timeout=30.0, backlog=4096):
+        self.host = host
+        self.port = port
+        self.request_timeout = request_timeout
+        self.idle_timeout = idle_timeout
+        self.backlog = backlog
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bank-api")
+        # Caps Bank calls queued on the pool; beyond this requests get 503
+        self.max_pending = max_pending
+        self.pending = 0
+        self.server = None
+        self.connections = {}
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._serve_connection, self.host, self.port, backlog=self.backlog)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            for writer in list(self.connections):
+                writer.close()
+            await asyncio.gather(*self.connections.values(), return_exceptions=True)
+            await self.server.wait_closed()
+        self.pool.shutdown(wait=False)
+
+    async def _serve_connection(self, reader, writer):
+        self.connections[writer] = asyncio.current_task()
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line.strip():
+                    break
+                try:
+                    req, keep_alive = await asyncio.wait_for(self._read_request(request_line, reader),
+                                                             self.request_timeout)
+                except asyncio.TimeoutError:
+                    await self._respond(writer, 408, {"ok": False, "message": "Request timeout."}, False)
+                    break
+                except ApiError as err:
+                    await self._respond(writer, err.status, {"ok": False, "message": str(err)}, False)
+                    break
+                status, payload, content_type = await self._handle(req)
+                await self._respond(writer, status, payload, keep_alive, content_type)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections.pop(writer, None)
+            writer.close()
+
+    async def _read_request(self, request_line, reader):
+        try:
+            method, target, version = request_line.decode('latin-1').rstrip("\r\n").split(" ", 2)
+        except ValueError:
+            raise ApiError(400, "Malformed request line.")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode('latin-1').partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise ApiError(400, "Invalid Content-Length.")
+        if length < 0:
+            raise ApiError(400, "Invalid Content-Length.")
+        if length > MAX_BODY:
+            raise ApiError(413, "Body too large.")
+        raw = await reader.readexactly(length) if length else b""
+        try:
+            body = json.loads(raw) if raw else {}
+        except ValueError:
+            raise ApiError(400, "Body must be JSON.")
+        if not isinstance(body, dict):
+            raise ApiError(400, "Body must be a JSON object.")
+
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        return Request(method.upper(), url.path, query, headers, body), keep_alive
+
+    def _release(self, future):
+        self.pending -= 1
+
+    async def _handle(self, req):
+        # A 504 only stops waiting: the Bank call cannot be interrupted and may
+        # still commit, so its slot is released when the worker finishes
+        if self.pending >= self.max_pending:
+            return 503, {"ok": False, "message": "Server busy."}, None
+        self.pending += 1
+        future = asyncio.get_running_loop().run_in_executor(self.pool, dispatch, req)
+        future.add_done_callback(self._release)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), self.request_timeout)
+        except asyncio.TimeoutError:
+            return 504, {"ok": False, "message": "Operation timed out; it may still complete."}, None
+        except ApiError as err:
+            return err.status, {"ok": False, "message": str(err)}, None
+        except Exception:
+            logger.exception("Unhandled error for %s %s", req.method, req.path)
+            return 500, {"ok": False, "message": "Internal error."}, None
+        status, payload = result[0], result[1]
+        return status, payload, result[2] if len(result) > 2 else None
+
+    async def _respond(self, writer, status, payload, keep_alive, content_type=None):
+        if content_type is None:
+            body = json.dumps(payload, default=record_to_json).encode()
+            content_type = "application/json"
+        else:
+            body = payload
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, 'Unknown')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+
+def serve(host="127.0.0.1", port=8080, workers=8, request_timeout=10.0):
+    server = BankAPIServer(host, port, workers=workers, request_timeout=request_timeout)
+
+    async def run():
+        await server.start()
+        print(f"Bank API listening on http://{host}:{server.port}", flush=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,165 @@
+"""Cold tier for old ledger entries.
+
+Archiving moves a prefix of an account's transactions into an immutable,
+gzip-compressed JSON-lines segment under <database>.archive/<accountNo>/.
+Each run appends a new segment. The account record keeps only the recent
+(hot) entries plus an 'archive' summary:
+
+    {"count": 1200, "closing_balance": 53100,
+     "segments": [{"file": "seg-000001-5f0c9a2e.jsonl.gz", "count": 1200,
+                   "first_ts": ..., "last_ts": ..., "closing_balance": 53100}]}
+
+history() reads across both tiers and opens only the segments whose time
+range overlaps the query.
+"""
+import gzip
+import json
+import os
+import random
+import shutil
+from functools import lru_cache
+
+from bank import metrics
+from bank.records import History, Transaction, record_to_json
+
+
+def archive_root(database):
+    return f"{os.path.normpath(database)}.archive"
+
+
+def select_cold(transactions, keep_last=None, before_ts=None):
+    # Entries are in time order, so the cold set is always a prefix
+    count = len(transactions)
+    if keep_last is not None:
+        count = max(0, count - keep_last)
+    if before_ts is not None:
+        cut = 0
+        for txn in transactions:
+            if cut >= count or txn.ts >= before_ts:
+                break
+            cut += 1
+        count = cut
+    return count
+
+
+def archive_account(root, user, keep_last=None, before_ts=None):
+    transactions = user.get('transactions', [])
+    count = select_cold(transactions, keep_last, before_ts)
+    if not count:
+        return 0
+    cold = transactions[:count]
+
+    summary = user.get('archive') or {"count": 0, "closing_balance": 0, "segments": []}
+    # The nonce keeps a run that read a stale summary from writing over a
+    # segment another run has committed; O_EXCL makes that certain
+    name = f"seg-{len(summary['segments']) + 1:06d}-{random.getrandbits(32):08x}.jsonl.gz"
+    directory = os.path.join(root, user['accountNo'])
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name)
+
+    # The segment is durable before the account record stops holding the
+    # entries; a crash in between leaves a file no summary refers to.
+    with open(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644), 'wb') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) as fs:
+            for txn in cold:
+                fs.write(json.dumps(txn, default=record_to_json).encode() + b"\n")
+        raw.flush()
+        os.fsync(raw.fileno())
+
+    summary['segments'].append({"file": name, "count": count, "first_ts": cold[0].ts, "last_ts": cold[-1].ts,
+                                "closing_balance": cold[-1].balance})
+    summary['count'] += count
+    summary['closing_balance'] = cold[-1].balance
+    user['archive'] = summary
+    user['transactions'] = transactions[count:]
+    return count
+
+
+def _read_segment(path):
+    # Decoded segments are shared; keyed on the file's identity too, so one
+    # replaced under the same name (a restored backup) is read again
+    stat = os.stat(path)
+    return _decode_segment(path, stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=64)
+def _decode_segment(path, mtime_ns, size):
+    with gzip.open(path, 'rt', encoding='utf-8') as fs:
+        return tuple(Transaction.from_dict(json.loads(line)) for line in fs)
+
+
+@metrics.collector
+def _segment_cache_metrics():
+    info = _decode_segment.cache_info()
+    return [("bank_cache_requests_total", "counter", "Lookups in in-process caches.",
+             [(("cache", "result"), ("archive_segments", "hit"), info.hits),
+              (("cache", "result"), ("archive_segments", "miss"), info.misses)])]
+
+
+def cold_entries(root, user, start_ts=None, end_ts=None):
+    # Archived entries in ledger order; segments outside the range are skipped
+    for segment in (user.get('archive') or {}).get('segments', []):
+        if start_ts is not None and segment['last_ts'] < start_ts:
+            continue
+        if end_ts is not None and segment['first_ts'] > end_ts:
+            continue
+        yield from _read_segment(os.path.join(root, user['accountNo'], segment['file']))
+
+
+def ledger_entries(root, user, start=0, hot=None):
+    # Cold then hot entries from ledger position `start` on; segments wholly
+    # before it are not read
+    summary = user.get('archive') or {}
+    archived = summary.get('count', 0)
+    position = 0
+    for segment in summary.get('segments', []) if start < archived else ():
+        if position + segment['count'] > start:
+            entries = _read_segment(os.path.join(root, user['accountNo'], segment['file']))
+            yield from entries[max(0, start - position):]
+        position += segment['count']
+    if hot is None:
+        hot = user.get('transactions') or ()
+    yield from hot[max(0, start - archived):]
+
+
+def history(root, user, start_ts=None, end_ts=None):
+    # Cold then hot entries, in ledger order
+    transactions = list(cold_entries(root, user, start_ts, end_ts))
+    transactions.extend(user.get('transactions', []))
+    return transactions
+
+
+def balance_points(root, user, start_ts=None, end_ts=None):
+    # (timestamps, balances) across cold and hot entries in range, for charts
+    stamps, balances = [], []
+    for txn in cold_entries(root, user, start_ts, end_ts):
+        if (start_ts is None or txn.ts >= start_ts) and (end_ts is None or txn.ts <= end_ts):
+            stamps.append(txn.ts)
+            balances.append(txn.balance)
+    hot = user.get('transactions') or History()
+    hot_stamps, hot_balances = (hot if isinstance(hot, History) else History(hot)).points(start_ts, end_ts)
+    stamps.extend(hot_stamps)
+    balances.extend(hot_balances)
+    return stamps, balances
+
+
+def ledger_span(user):
+    # (first_ts, last_ts) over cold and hot entries, None for an empty ledger
+    segments = (user.get('archive') or {}).get('segments', [])
+    hot = user.get('transactions') or []
+    first = segments[0]['first_ts'] if segments else (hot[0].ts if hot else None)
+    last = hot[-1].ts if hot else (segments[-1]['last_ts'] if segments else None)
+    return None if first is None else (first, last)
+
+
+def transaction_count(user):
+    return user.size('transactions') + (user.get('archive') or {}).get('count', 0)
+
+
+def opening_balance(user):
+    # Balance before the first hot entry
+    return (user.get('archive') or {}).get('closing_balance', 0)
+
+
+def remove_account(root, account_no):
+    shutil.rmtree(os.path.join(root, account_no), ignore_errors=True)
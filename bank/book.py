@@ -0,0 +1,158 @@
+"""Paged book files: account headers up front, sub-collections behind them.
+
+    magic       8 bytes, b"BNKBOOK1"
+    index len   u64, little-endian
+    index       one codec document:
+                {"codec": spec, "accounts": [[header, counts, offset, length], ...]}
+    bodies      one codec document per account
+
+A header holds an account's scalar fields and extra keys (identity, pin
+hash, balance, card, archive summary, ...); counts holds the entry count of
+each sub-collection in records.BODY_FIELDS, and offset/length locate the
+account's body after the index. Opening a book reads only the index, so a
+login or balance check costs header-size I/O. A body is read and decoded the
+first time one of its collections is touched. Saving copies the bodies of
+untouched accounts byte for byte instead of re-encoding them.
+
+Files are replaced by rename, never rewritten in place, so a lazily read
+body always comes from the same file version as its header. The json-pretty
+codec keeps writing a single readable document; any other file is detected
+by its first bytes and loaded whole.
+"""
+import os
+import struct
+import threading
+import time
+
+from bank import metrics, tracing
+from bank.codecs import decode
+from bank.records import Account
+
+MAGIC = b"BNKBOOK1"
+PREFIX = struct.Struct("<8sQ")
+
+# Codecs written as one document for people to read
+READABLE = frozenset({"json-pretty"})
+
+
+class BookFile:
+    # An open book; lazily loaded accounts keep it (and so its file version)
+    # alive until their bodies are read or they are dropped
+    def __init__(self, path):
+        self.path = path
+        self._fs = open(path, 'rb')
+        self._lock = threading.Lock()
+        self.spec = None
+        self._base = 0
+        self._buffer = None
+
+    def close(self):
+        self._fs.close()
+
+    def __del__(self):
+        self._fs.close()
+
+    def stat(self):
+        return os.fstat(self._fs.fileno())
+
+    def read(self, offset, length):
+        if self._buffer is not None:
+            raw = bytes(self._buffer[offset:offset + length])
+        else:
+            with self._lock:
+                self._fs.seek(self._base + offset)
+                raw = self._fs.read(length)
+        if len(raw) != length:
+            raise ValueError(f"{self.path} is truncated")
+        return raw
+
+    def accounts(self):
+        prefix = self._fs.read(PREFIX.size)
+        if len(prefix) < PREFIX.size or prefix[:8] != MAGIC:
+            raw = prefix + self._fs.read()
+            self.close()
+            records = _decode(raw, "document")
+            accounts = [Account.from_dict(u) for u in records or []]
+            metrics.headers_loaded.inc(len(accounts))
+            metrics.bodies_loaded.inc(len(accounts))
+            return accounts
+
+        _, index_len = PREFIX.unpack(prefix)
+        raw = self._fs.read(index_len)
+        if len(raw) != index_len:
+            raise ValueError(f"{self.path} is truncated")
+        metrics.read_bytes.inc(PREFIX.size, ("index",))
+        document = _decode(raw, "index")
+        self.spec, index = document['codec'], document['accounts']
+        self._base = PREFIX.size + index_len
+        end = max((offset + length for _, _, offset, length in index), default=0)
+        if self.stat().st_size < self._base + end:
+            raise ValueError(f"{self.path} is truncated")
+        if os.name == "nt":
+            # Windows cannot rename over a file held open, so keep the bodies
+            # in memory instead; they are still decoded only on demand
+            self._buffer = memoryview(self._fs.read())
+            self.close()
+        metrics.headers_loaded.inc(len(index))
+        return [Account.from_header(header, LazyBody(self, counts, offset, length))
+                for header, counts, offset, length in index]
+
+
+class LazyBody:
+    __slots__ = ('book', 'counts', 'offset', 'length')
+
+    def __init__(self, book, counts, offset, length):
+        self.book = book
+        self.counts = counts
+        self.offset = offset
+        self.length = length
+
+    def raw(self):
+        return self.book.read(self.offset, self.length)
+
+    def read(self):
+        metrics.bodies_loaded.inc()
+        with tracing.span("load", "body"):
+            return _decode(self.raw(), "body")
+
+
+def _decode(raw, part):
+    start = time.perf_counter()
+    value = decode(raw)
+    metrics.parse_seconds.inc(time.perf_counter() - start)
+    metrics.read_bytes.inc(len(raw), (part,))
+    return value
+
+
+def encode_book(accounts, codec):
+    start = time.perf_counter()
+    raw = _encode_book(accounts, codec)
+    metrics.serialize_seconds.inc(time.perf_counter() - start)
+    metrics.written_bytes.inc(len(raw))
+    return raw
+
+
+def _encode_book(accounts, codec):
+    if codec.spec in READABLE:
+        return codec.dumps(list(accounts))
+    index, bodies, offset = [], [], 0
+    for account in accounts:
+        if not isinstance(account, Account):
+            account = Account.from_dict(account)
+        pending = account._body
+        if pending is not None and pending.book.spec == codec.spec:
+            raw, counts = pending.raw(), pending.counts
+        else:
+            body = account.body()
+            raw = codec.dumps(body)
+            counts = {key: len(value) for key, value in body.items()}
+        index.append([account.header(), counts, offset, len(raw)])
+        bodies.append(raw)
+        offset += len(raw)
+    raw_index = codec.dumps({"codec": codec.spec, "accounts": index})
+    return b"".join([PREFIX.pack(MAGIC, len(raw_index)), raw_index, *bodies])
+
+
+def load_book(path):
+    return BookFile(path).accounts()
+
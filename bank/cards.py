@@ -0,0 +1,147 @@
+import hmac
+import logging
+import random
+import threading
+from datetime import datetime
+
+from bank.core import Bank, serialized
+
+logger = logging.getLogger(__name__)
+
+
+@serialized
+def _apply_journal(journal):
+    # Re-applies journalled card operations to a fresh load of the accounts they
+    # touch, inside the write lock, so writes made since the authorizer loaded
+    # are kept. -> (saved accounts or None, auth codes the account no longer covers)
+    if any(op == "settle" for op, _, _ in journal):
+        data = Bank._load_data()
+    else:
+        data = Bank._load_data(list({account_no for _, account_no, _ in journal}))
+    accounts = {u['accountNo']: u for u in data}
+    outbox = []
+    dropped = []
+    for op, account_no, detail in journal:
+        if op == "settle":
+            for user in data:
+                user['card_holds'] = []
+            continue
+        user = accounts.get(account_no)
+        if user is None:
+            continue
+        if op == "authorize":
+            if user['balance'] < detail['amount']:
+                dropped.append(detail['auth_code'])
+                continue
+            user['balance'] -= detail['amount']
+            txn = Bank._record_transaction(user, "card_payment", detail['amount'], f"Card - {detail['merchant']}",
+                                           outbox, merchant=detail['merchant'], auth_code=detail['auth_code'])
+            user.setdefault('card_holds', []).append(dict(detail, date=txn['date']))
+        else:
+            holds = user.get('card_holds', [])
+            hold = next((h for h in holds if h['auth_code'] == detail), None)
+            if hold is None:
+                continue  # settled meanwhile
+            holds.remove(hold)
+            user['balance'] += hold['amount']
+            Bank._record_transaction(user, "card_refund", hold['amount'], f"Card Reversal - {hold['merchant']}",
+                                     outbox, auth_code=detail)
+    if not Bank._save_data(data, outbox):
+        return None, dropped
+    return [u for u in data if u['accountNo'] in accounts], dropped
+
+
+class CardAuthorizer:
+    # Holds the accounts in memory with a card-number index, so an authorization
+    # is one dict lookup plus a few comparisons. Approvals are journalled and
+    # written to disk in batches with flush(), which re-applies them to the
+    # accounts as stored then.
+    def __init__(self, data=None):
+        self.data = Bank._load_data() if data is None else data
+        self.index = {}
+        self.journal = []
+        self.dropped = []
+        self._lock = threading.Lock()
+        self._expiry_cache = {}
+        self.refresh_index()
+
+    @property
+    def pending(self):
+        return len(self.journal)
+
+    def refresh_index(self):
+        with self._lock:
+            self._reindex()
+
+    def _reindex(self):
+        self.index = {u['virtual_card']['card_number']: u for u in self.data if u.get('virtual_card')}
+
+    def _expired(self, expiry, now):
+        last_month = self._expiry_cache.get(expiry)
+        if last_month is None:
+            month, year = expiry.split('/')
+            last_month = self._expiry_cache[expiry] = (2000 + int(year)) * 12 + int(month)
+        return now.year * 12 + now.month > last_month
+
+    def authorize(self, card_number, cvv, expiry, amount, merchant, now=None):
+        now = now or datetime.now()
+        with self._lock:
+            user = self.index.get(card_number)
+            if user is None:
+                return False, "Card not found."
+            card = user['virtual_card']
+            if not hmac.compare_digest(card['cvv'], str(cvv)) or card['expiry'] != expiry:
+                return False, "Card details do not match."
+            if self._expired(expiry, now):
+                return False, "Card expired."
+            if amount <= 0:
+                return False, "Amount must be > 0."
+            if user['balance'] < amount:
+                return False, "Insufficient balance."
+
+            auth_code = f"{random.getrandbits(40):010X}"
+            user['balance'] -= amount
+            # The hold stays open until settlement; until then it can be reversed
+            hold = {"auth_code": auth_code, "amount": amount, "merchant": merchant}
+            user.setdefault('card_holds', []).append(dict(hold, date=now.strftime("%Y-%m-%d %H:%M:%S")))
+            self.journal.append(("authorize", user['accountNo'], hold))
+            return True, auth_code
+
+    def reverse(self, card_number, auth_code):
+        with self._lock:
+            user = self.index.get(card_number)
+            holds = user.get('card_holds', []) if user else []
+            hold = next((h for h in holds if h['auth_code'] == auth_code), None)
+            if not hold:
+                return False, "Authorization not found."
+
+            holds.remove(hold)
+            user['balance'] += hold['amount']
+            self.journal.append(("reverse", user['accountNo'], auth_code))
+            return True, "Authorization reversed."
+
+    def settle(self):
+        with self._lock:
+            settled = 0
+            for user in self.data:
+                settled += len(user.get('card_holds', []))
+                user['card_holds'] = []
+            self.journal.append(("settle", None, None))
+            return settled
+
+    def flush(self):
+        with self._lock:
+            if not self.journal:
+                return True
+            saved, dropped = _apply_journal(self.journal)
+            if saved is None:
+                return False
+            self.journal = []
+            if dropped:
+                logger.warning(f"{len(dropped)} card authorizations no longer covered by the balance were dropped")
+            self.dropped.extend(dropped)
+            # The in-memory copies of the accounts written take the stored state
+            fresh = {u['accountNo']: u for u in saved}
+            self.data = [fresh.get(u['accountNo'], u) for u in self.data]
+            self._reindex()
+            return True
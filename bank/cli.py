@@ -0,0 +1,539 @@
+"""Command-line entry point for Bank operations and batch jobs.
+
+    python -m bank --db data.json deposit --account ABCD123456 --pin 1234 --amount 500
+    python -m bank --json stats
+    python -m bank batch < jobs.jsonl
+
+Amounts are given in rupees and converted to paise before reaching Bank.
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import datetime
+
+from bank.codecs import Codec, available
+from bank.core import Bank, serialized
+from bank.integrity import verify
+from bank.money import format_inr, to_paise
+from bank.notify import NotificationQueue, transport_from_spec
+from bank.records import record_to_json
+from bank.sharding import ShardedStorage, is_sharded
+from bank.tracing import load_traces, slowest, summarize
+from bank.views import type_totals
+
+
+def _result(ok, message, **extra):
+    return dict(ok=ok, message=message, **extra)
+
+
+def _date(value):
+    return datetime.strptime(value, "%Y-%m-%d")
+
+
+def cmd_create(args):
+    ok, msg = Bank.create_account(args.name, args.age, args.email, args.mobile, args.address, args.pin)
+    return _result(ok, f"Account created: {msg}" if ok else msg, account=msg if ok else None)
+
+
+def cmd_deposit(args):
+    return _result(*Bank.deposit_money(args.account, args.pin, to_paise(args.amount)))
+
+
+def cmd_withdraw(args):
+    return _result(*Bank.withdraw_money(args.account, args.pin, to_paise(args.amount)))
+
+
+def cmd_transfer(args):
+    return _result(*Bank.transfer_money(args.account, args.pin, args.to, to_paise(args.amount), args.description))
+
+
+def cmd_details(args):
+    user, msg = Bank.get_details(args.account, args.pin)
+    if not user:
+        return _result(False, msg)
+    return _result(True, f"{user['name']} | {user['accountNo']} | Balance: {format_inr(user['balance'], 2)}",
+                   account=user['accountNo'], name=user['name'], balance=user['balance'],
+                   transactions=user.size('transactions'))
+
+
+def cmd_bill(args):
+    return _result(*Bank.pay_bill(args.account, args.pin, args.type, args.provider, args.bill_number,
+                                  to_paise(args.amount)))
+
+
+def cmd_loan_apply(args):
+    ok, loan_id, emi = Bank.apply_loan(args.account, args.pin, args.type, to_paise(args.amount), args.tenure,
+                                       args.purpose)
+    if not ok:
+        return _result(False, loan_id)
+    return _result(True, f"Loan {loan_id} approved. EMI: {format_inr(emi, 2)}", loan_id=loan_id, emi=emi)
+
+
+def cmd_emi(args):
+    return _result(*Bank.pay_emi(args.account, args.pin, args.loan_id))
+
+
+def cmd_loan_close(args):
+    return _result(*Bank.close_loan(args.account, args.pin, args.loan_id))
+
+
+def cmd_goal_add(args):
+    value = args.sweep_value if args.sweep == 'percent' else to_paise(args.sweep_value)
+    return _result(*Bank.add_savings_goal(args.account, args.pin, args.name, to_paise(args.target), args.deadline,
+                                          args.sweep, value, args.period))
+
+
+def cmd_goal_contribute(args):
+    return _result(*Bank.contribute_to_goal(args.account, args.pin, args.goal_id, to_paise(args.amount)))
+
+
+def cmd_sweeps(args):
+    return _result(*Bank.run_periodic_sweeps(_date(args.today) if args.today else None))
+
+
+def cmd_reminders(args):
+    return _result(*Bank.send_emi_reminders(_date(args.today) if args.today else None, args.days))
+
+
+def cmd_beneficiary_add(args):
+    return _result(*Bank.add_beneficiary(args.account, args.pin, args.beneficiary, args.nickname))
+
+
+def cmd_beneficiary_remove(args):
+    return _result(*Bank.remove_beneficiary(args.account, args.pin, args.beneficiary_id))
+
+
+def cmd_search(args):
+    filtered, msg = Bank.filter_transactions(args.account, args.pin,
+                                             _date(args.start) if args.start else None,
+                                             datetime.combine(_date(args.end), datetime.max.time())
+                                             if args.end else None,
+                                             args.type,
+                                             to_paise(args.min_amount) if args.min_amount else None,
+                                             to_paise(args.max_amount) if args.max_amount else None)
+    if filtered is None:
+        return _result(False, msg)
+    return _result(True, f"Found {len(filtered)} transactions",
+                   transactions=filtered)
+
+
+def cmd_delete(args):
+    return _result(*Bank.delete_account(args.account, args.pin))
+
+
+def cmd_import(args):
+    with (open(args.file, 'r', encoding='utf-8') if args.file != '-' else sys.stdin) as fs:
+        records = json.load(fs)
+    ok, msg, conflicts = Bank.import_accounts(records)
+    return _result(ok, msg, conflicts=conflicts)
+
+
+def cmd_export(args):
+    data = Bank.export_accounts(args.account)
+    text = json.dumps(data, indent=None if args.compact else 2, default=record_to_json)
+    if args.out == '-':
+        sys.stdout.write(text + "\n")
+        return None
+    with open(args.out, 'w', encoding='utf-8') as fs:
+        fs.write(text)
+    return _result(True, f"Exported {len(data)} accounts to {args.out}")
+
+
+def cmd_statement(args):
+    user, msg = Bank.get_details(args.account, args.pin)
+    if not user:
+        return _result(False, msg)
+    transactions, _ = Bank.filter_transactions(args.account, args.pin,
+                                               _date(args.start) if args.start else None,
+                                               datetime.combine(_date(args.end), datetime.max.time())
+                                               if args.end else None)
+    try:
+        pdf = Bank.generate_statement_pdf(user, transactions)
+    except ImportError:
+        return _result(False, "Statements need reportlab: pip install reportlab")
+    out = args.out or f"statement_{user['accountNo']}.pdf"
+    with open(out, 'wb') as fs:
+        fs.write(pdf.getvalue())
+    return _result(True, f"Statement written to {out}", path=out)
+
+
+def cmd_stats(args):
+    stats = Bank.get_stats()
+    lines = [f"{key.replace('_', ' ').title()}: "
+             f"{format_inr(value) if key == 'total_balance' else value}" for key, value in stats.items()]
+    return _result(True, "\n".join(lines), **stats)
+
+
+def cmd_check(args):
+    # Balance chains and transfer pairing; only entries new since the last run unless --full
+    report = verify(args.jobs, args.full)
+    problems = report['problems']
+    summary = (f"verified {report['entries']:,} {'' if args.full else 'new '}entries in "
+               f"{report['verified_accounts']:,} of {report['accounts']:,} accounts")
+    if report['orphaned']:
+        summary += f"; {report['orphaned']:,} transfers with a deleted account not paired"
+    message = f"Ledger consistent: {summary}." if not problems else "\n".join(problems + [summary])
+    return _result(not problems, message, **report)
+
+
+def cmd_archive(args):
+    return _result(*Bank.archive_transactions(args.keep, args.older_than))
+
+
+def cmd_snapshot(args):
+    # With --every, keep publishing; workers pick up each one via SnapshotReader.refresh()
+    while True:
+        result = _result(*Bank.publish_snapshot(args.out))
+        if not args.every:
+            return result
+        _emit(result, args.json)
+        time.sleep(args.every)
+
+
+def cmd_views(args):
+    # With --every, keep refreshing; dashboards read the views between runs
+    while True:
+        ok, message = Bank.refresh_views(args.rebuild)
+        if not args.every:
+            break
+        _emit(_result(ok, message), args.json)
+        time.sleep(args.every)
+    dashboard, _ = Bank.bank_views()
+    days = sorted(dashboard['daily'])[-7:]
+    totals = type_totals(dashboard, days[0] if days else None)
+    lines = [message, f"{dashboard['transactions']:,} transactions over {dashboard['accounts']:,} accounts", "",
+             "Last 7 days by type:"]
+    lines += [f"  {kind:<22} {count:>9,}  {format_inr(amount)}"
+              for kind, (count, amount) in sorted(totals.items(), key=lambda item: -item[1][1])]
+    lines.append("Top senders:")
+    lines += [f"  {no} {name or '?':<24} {format_inr(amount)}"
+              for no, name, _, amount in dashboard['top_senders'][:5]]
+    lines.append("Top receivers:")
+    lines += [f"  {no} {name or '?':<24} {format_inr(amount)}"
+              for no, name, _, amount in dashboard['top_receivers'][:5]]
+    lines.append("Bills by provider:")
+    lines += [f"  {desc:<36} {count:>7,}  {format_inr(amount)}" for desc, count, amount in dashboard['bills'][:5]]
+    peak = max(range(24), key=lambda hour: dashboard['deposit_hours'][hour][0])
+    lines.append(f"Busiest deposit hour: {peak:02d}:00")
+    return _result(ok, "\n".join(lines), dashboard=dashboard)
+
+
+def cmd_alerts(args):
+    if args.resolve:
+        if not args.decision:
+            return _result(False, "Give --decision cleared or confirmed.")
+        return _result(*Bank.resolve_alert(args.resolve, args.decision, args.note))
+    alerts, _ = Bank.review_alerts(None if args.status == "all" else args.status)
+    lines = [f"{len(alerts)} {'' if args.status == 'all' else args.status + ' '}alerts"]
+    for alert in alerts[:args.top]:
+        lines.append(f"{alert['id']}  {alert['date']}  {alert['account']}  {alert['status']:<9} {alert['action']:<7} "
+                     f"{alert['flow']:<10} {format_inr(alert['amount']):>10}  "
+                     + "; ".join(hit['message'] for hit in alert['hits']))
+    return _result(True, "\n".join(lines), alerts=alerts)
+
+
+@serialized
+def cmd_recode(args):
+    # Any stored format is readable; saving rewrites the book in the --codec format
+    data = Bank._load_data()
+    if not Bank._save_data(data):
+        return _result(False, "Rewrite failed.")
+    return _result(True, f"Rewrote {len(data)} accounts as {Bank._storage().codec.spec}.")
+
+
+def _copy_sidecars(database, target):
+    # Everything kept beside the book as <db>.* (id sequence, archive, review
+    # queue, integrity and view state) follows it to the new path; locks and
+    # temp files stay behind
+    source, target = os.path.normpath(database), os.path.normpath(target)
+    for path in glob.glob(glob.escape(source) + ".*"):
+        if path == target or path.startswith(target + os.sep) or path.endswith((".lock", ".tmp")):
+            continue
+        dest = target + path[len(source):]
+        if os.path.isdir(path):
+            shutil.copytree(path, dest, dirs_exist_ok=True)
+        else:
+            shutil.copyfile(path, dest)
+
+
+def cmd_reshard(args):
+    if args.shards < 1:
+        return _result(False, "Shard count must be at least 1.")
+    if is_sharded(Bank.database):
+        count = ShardedStorage(Bank.database, Bank.codec).reshard(args.shards)
+        return _result(True, f"Resharded {count} accounts into {args.shards} shards.")
+    if not args.to:
+        return _result(False, "Give --to DIR to split a single-file book into shards.")
+    accounts = Bank._load_data()
+    try:
+        ShardedStorage.create(args.to, accounts, args.shards, Bank.codec)
+    except ValueError as err:
+        return _result(False, str(err))
+    _copy_sidecars(Bank.database, args.to)
+    return _result(True, f"Wrote {len(accounts)} accounts into {args.shards} shards; use --db {args.to}.")
+
+
+def cmd_batch(args):
+    # One JSON object per stdin line: {"command": "deposit", "account": ..., "pin": ..., "amount": ...}
+    parser = build_parser(_BatchParser)
+    failures = 0
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            job = json.loads(line)
+            if not isinstance(job, dict):
+                raise ValueError("expected a JSON object")
+            argv = [str(job.pop('command'))]
+            for key, value in job.items():
+                flag = "--" + key.replace('_', '-')
+                if value is True:
+                    argv.append(flag)
+                elif value is not None and value is not False:
+                    argv.extend([flag, str(value)])
+            job_args = parser.parse_args(argv)
+            if job_args.func is cmd_batch:
+                raise ValueError("batch cannot be nested")
+            result = job_args.func(job_args)
+        except (ValueError, KeyError) as err:
+            result = _result(False, f"Bad job: {err}", job=line)
+        if result is not None:
+            failures += not result['ok']
+            _emit(result, args.json)
+    return _result(failures == 0, f"Batch finished with {failures} failures.", failures=failures)
+
+
+def cmd_traces(args):
+    # Summarize BANK_TRACE output: slowest pages first, each with the phase most of its time went to
+    try:
+        records = load_traces(args.file)
+    except OSError as err:
+        return _result(False, f"Cannot read {args.file}: {err.strerror}.")
+    if args.page:
+        records = [r for r in records if r.get('page') == args.page]
+    if not records:
+        return _result(False, "No traced reruns.")
+    pages = summarize(records)
+    worst = slowest(records, args.top)
+    lines = [f"{len(records)} reruns over {len(pages)} pages", "",
+             f"{'page':<16} {'runs':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}  dominant phase"]
+    for row in pages:
+        lines.append(f"{row['page']:<16} {row['runs']:>6} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} "
+                     f"{row['max_ms']:>9.1f}  {row['dominant']} ({row['share'][row['dominant']]:.0%})")
+    lines += ["", f"slowest {len(worst)} reruns"]
+    for record in worst:
+        phases = sorted(record['phases'].items(), key=lambda item: item[1], reverse=True)
+        spans = sorted(record['spans'], key=lambda s: s['self_ms'], reverse=True)[:3]
+        lines.append(f"{record['ts']}  {record.get('page') or '?':<16} {record['ms']:>9.1f} ms  "
+                     + ", ".join(f"{phase} {ms:.1f}" for phase, ms in phases)
+                     + ("  | top spans: " + ", ".join(f"{s['name']} x{s['calls']} {s['self_ms']:.1f}"
+                                                      for s in spans) if spans else ""))
+    return _result(True, "\n".join(lines), pages=pages, slowest=worst)
+
+
+def cmd_serve(args):
+    from bank.api import serve
+    if args.profile_dir:
+        from bank.profiler import install_signal
+        if install_signal(args.profile_dir, args.profile_seconds):
+            print(f"kill -USR2 {os.getpid()} writes a {args.profile_seconds:g} s profile to {args.profile_dir}")
+        else:
+            print("Signal-triggered profiling is not available on this platform.")
+    serve(args.host, args.port, workers=args.workers, request_timeout=args.timeout)
+    return None
+
+
+def _emit(result, as_json):
+    if as_json:
+        print(json.dumps(result, default=record_to_json))
+    else:
+        print(("" if result['ok'] else "Error: ") + result['message'])
+
+
+def _positive_int(text):
+    value = int(text)
+    if value <= 0:
+        raise argparse.ArgumentTypeError(f"must be positive: {text}")
+    return value
+
+
+class _BatchParser(argparse.ArgumentParser):
+    # A malformed batch line is reported and skipped instead of ending the run
+    def error(self, message):
+        raise ValueError(message)
+
+
+def build_parser(parser_class=argparse.ArgumentParser):
+    parser = parser_class(prog="python -m bank", description="Bank operations and batch jobs.")
+    parser.add_argument("--db", help="database path (default: Bank.database)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--codec", default="auto",
+                        help=f"on-disk encoding for writes: auto or one of {', '.join(available())}")
+    parser.add_argument("--notify", metavar="TRANSPORT",
+                        help="deliver alerts via console, file:PATH or smtp://HOST:PORT")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def command(name, func, help_text, *, auth=True):
+        p = sub.add_parser(name, help=help_text)
+        p.set_defaults(func=func)
+        if auth:
+            p.add_argument("--account", required=True)
+            p.add_argument("--pin", required=True)
+        return p
+
+    p = command("create", cmd_create, "open an account", auth=False)
+    p.add_argument("--name", required=True)
+    p.add_argument("--age", type=int, required=True)
+    p.add_argument("--email", required=True)
+    p.add_argument("--mobile", required=True)
+    p.add_argument("--address", required=True)
+    p.add_argument("--pin", required=True)
+
+    for name, func in (("deposit", cmd_deposit), ("withdraw", cmd_withdraw)):
+        command(name, func, f"{name} money").add_argument("--amount", type=float, required=True)
+
+    p = command("transfer", cmd_transfer, "transfer money")
+    p.add_argument("--to", required=True)
+    p.add_argument("--amount", type=float, required=True)
+    p.add_argument("--description", default="")
+
+    command("details", cmd_details, "show account summary")
+
+    p = command("bill", cmd_bill, "pay a bill")
+    p.add_argument("--type", required=True)
+    p.add_argument("--provider", required=True)
+    p.add_argument("--bill-number", required=True)
+    p.add_argument("--amount", type=float, required=True)
+
+    p = command("loan-apply", cmd_loan_apply, "apply for a loan")
+    p.add_argument("--type", default="Personal Loan")
+    p.add_argument("--amount", type=float, required=True)
+    p.add_argument("--tenure", type=_positive_int, required=True, help="months")
+    p.add_argument("--purpose", required=True)
+
+    command("emi", cmd_emi, "pay one EMI").add_argument("--loan-id", required=True)
+    command("loan-close", cmd_loan_close, "close a loan").add_argument("--loan-id", required=True)
+
+    p = command("goal-add", cmd_goal_add, "create a savings goal")
+    p.add_argument("--name", required=True)
+    p.add_argument("--target", type=float, required=True)
+    p.add_argument("--deadline", required=True)
+    p.add_argument("--sweep", choices=["fixed", "percent", "roundup"])
+    p.add_argument("--sweep-value", type=float, default=0)
+    p.add_argument("--period", default="monthly")
+
+    p = command("goal-contribute", cmd_goal_contribute, "add money to a goal")
+    p.add_argument("--goal-id", type=int, required=True)
+    p.add_argument("--amount", type=float, required=True)
+
+    command("sweeps", cmd_sweeps, "apply due periodic sweeps", auth=False).add_argument("--today")
+    p = command("reminders", cmd_reminders, "queue EMI reminders for loans due soon", auth=False)
+    p.add_argument("--today")
+    p.add_argument("--days", type=int, default=3)
+
+    p = command("beneficiary-add", cmd_beneficiary_add, "save a beneficiary")
+    p.add_argument("--beneficiary", required=True)
+    p.add_argument("--nickname", required=True)
+    command("beneficiary-remove", cmd_beneficiary_remove, "remove a beneficiary").add_argument(
+        "--beneficiary-id", type=int, required=True)
+
+    p = command("search", cmd_search, "filter transactions")
+    p.add_argument("--start")
+    p.add_argument("--end")
+    p.add_argument("--type")
+    p.add_argument("--min-amount", type=float)
+    p.add_argument("--max-amount", type=float)
+
+    command("delete", cmd_delete, "delete an account")
+
+    command("import", cmd_import, "import accounts from a JSON file", auth=False).add_argument(
+        "--file", default="-")
+    p = command("export", cmd_export, "export accounts as JSON", auth=False)
+    p.add_argument("--account", action="append", help="limit to these accounts (repeatable)")
+    p.add_argument("--out", default="-")
+    p.add_argument("--compact", action="store_true")
+
+    p = command("statement", cmd_statement, "write a PDF statement")
+    p.add_argument("--start")
+    p.add_argument("--end")
+    p.add_argument("--out")
+
+    command("stats", cmd_stats, "bank-wide totals", auth=False)
+    p = command("check", cmd_check, "verify balance chains and transfer pairing", auth=False)
+    p.add_argument("--full", action="store_true", help="re-verify every entry, not just new ones")
+    p.add_argument("--jobs", type=int, help="worker processes (default: CPU count)")
+    command("batch", cmd_batch, "run JSON-lines jobs from stdin", auth=False)
+
+    p = command("archive", cmd_archive, "move old transactions into compressed archive segments", auth=False)
+    p.add_argument("--keep", type=int, help="hot entries to keep per account")
+    p.add_argument("--older-than", type=int, metavar="DAYS", help="archive entries older than this")
+
+    p = command("snapshot", cmd_snapshot, "publish a memory-mappable snapshot for reporting", auth=False)
+    p.add_argument("--out", help="snapshot path (default: <db>.snap)")
+    p.add_argument("--every", type=float, metavar="SECONDS", help="republish periodically")
+
+    p = command("views", cmd_views, "refresh the bank-wide analytics views", auth=False)
+    p.add_argument("--rebuild", action="store_true", help="recompute from every ledger")
+    p.add_argument("--every", type=float, metavar="SECONDS", help="keep refreshing")
+
+    p = command("alerts", cmd_alerts, "list fraud alerts or record a review decision", auth=False)
+    p.add_argument("--status", choices=["open", "cleared", "confirmed", "all"], default="open")
+    p.add_argument("--top", type=int, default=50, help="alerts to list")
+    p.add_argument("--resolve", metavar="ID", help="alert to decide on")
+    p.add_argument("--decision", choices=["cleared", "confirmed"])
+    p.add_argument("--note", default="")
+
+    command("recode", cmd_recode, "rewrite the book in the --codec format", auth=False)
+
+    p = command("reshard", cmd_reshard, "split the book into shards or change the shard count", auth=False)
+    p.add_argument("--shards", type=int, required=True)
+    p.add_argument("--to", help="target directory when converting a single-file book")
+
+    p = command("traces", cmd_traces, "summarize Streamlit rerun traces (BANK_TRACE)", auth=False)
+    p.add_argument("--file", default="traces.jsonl")
+    p.add_argument("--page", help="only this page")
+    p.add_argument("--top", type=int, default=10, help="slowest reruns to list")
+
+    p = command("serve", cmd_serve, "run the HTTP/JSON API", auth=False)
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8080)
+    p.add_argument("--workers", type=int, default=8)
+    p.add_argument("--timeout", type=float, default=10.0, help="per-request timeout in seconds")
+    p.add_argument("--profile-dir", help="on SIGUSR2, sample all threads and write a speedscope profile here")
+    p.add_argument("--profile-seconds", type=float, default=30.0, help="length of a signal-triggered profile")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.db:
+        Bank.database = args.db
+    try:
+        Bank.codec = Codec(args.codec).spec
+    except ValueError as err:
+        parser.error(str(err))
+    if args.notify:
+        try:
+            Bank.notifier = NotificationQueue(transport_from_spec(args.notify))
+        except ValueError as err:
+            parser.error(str(err))
+    try:
+        result = args.func(args)
+    finally:
+        if Bank.notifier is not None:
+            Bank.notifier.close()
+    if result is None:
+        return 0
+    if args.func is not cmd_batch or not args.json:
+        _emit(result, args.json)
+    return 0 if result['ok'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
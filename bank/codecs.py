@@ -0,0 +1,115 @@
+"""Encodings for the stored book.
+
+A codec spec is an encoding with optional compression framing:
+
+    json-pretty     indented stdlib JSON (the original format)
+    json            compact stdlib JSON
+    orjson          compact JSON via orjson, if installed
+    msgpack         MessagePack, if installed
+    ...+gzip        gzip framing (stdlib)
+    ...+zstd        zstd framing, if zstandard is installed
+    auto            orjson if installed, else json
+
+Loading needs no spec: compression is recognised by its magic bytes and the
+encoding by the first byte, so a book written with any codec reads back and
+is rewritten in the configured one on the next save.
+
+Every codec stores ledgers column-encoded (see records.History), so the
+encodings differ only in how those columns are framed.
+"""
+import gzip
+import json
+import zlib
+
+from bank.records import record_to_storage
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# What a truncated or garbled file raises while decoding (JSONDecodeError and
+# msgpack's errors are ValueErrors)
+CORRUPT_ERRORS = (ValueError, EOFError, gzip.BadGzipFile, zlib.error)
+
+
+class MissingCodec(RuntimeError):
+    # The data is fine but this process lacks the package that decodes it
+    pass
+
+
+def _json(obj):
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=record_to_storage).encode()
+
+
+def _json_pretty(obj):
+    return json.dumps(obj, indent=2, default=record_to_storage).encode()
+
+
+ENCODERS = {"json-pretty": _json_pretty, "json": _json}
+if orjson is not None:
+    ENCODERS["orjson"] = lambda obj: orjson.dumps(obj, default=record_to_storage)
+if msgpack is not None:
+    ENCODERS["msgpack"] = lambda obj: msgpack.packb(obj, default=record_to_storage, use_bin_type=True)
+
+COMPRESSORS = {"gzip": lambda raw: gzip.compress(raw, compresslevel=6, mtime=0)}
+if zstandard is not None:
+    COMPRESSORS["zstd"] = lambda raw: zstandard.ZstdCompressor(level=3).compress(raw)
+
+
+def available():
+    return list(ENCODERS) + [f"{name}+{frame}" for name in ENCODERS for frame in COMPRESSORS]
+
+
+class Codec:
+    def __init__(self, spec="auto"):
+        name, _, frame = spec.partition("+")
+        if name == "auto":
+            name = "orjson" if orjson is not None else "json"
+        if name not in ENCODERS:
+            raise ValueError(f"Codec '{name}' is unknown or its package is not installed")
+        if frame and frame not in COMPRESSORS:
+            raise ValueError(f"Compression '{frame}' is unknown or its package is not installed")
+        self.spec = f"{name}+{frame}" if frame else name
+        self._encode = ENCODERS[name]
+        self._compress = COMPRESSORS.get(frame)
+
+    def dumps(self, obj):
+        raw = self._encode(obj)
+        return self._compress(raw) if self._compress else raw
+
+    @staticmethod
+    def loads(raw):
+        return decode(raw)
+
+
+def decode(raw):
+    if raw[:2] == GZIP_MAGIC:
+        raw = gzip.decompress(raw)
+    elif raw[:4] == ZSTD_MAGIC:
+        if zstandard is None:
+            raise MissingCodec("zstd-compressed data needs the zstandard package")
+        with zstandard.ZstdDecompressor().stream_reader(raw) as reader:
+            raw = reader.read()
+
+    head = raw[:16].lstrip()[:1]
+    if not head:
+        return None
+    if head in b"[{":
+        return orjson.loads(raw) if orjson is not None else json.loads(raw)
+    if msgpack is None:
+        raise MissingCodec("MessagePack data needs the msgpack package")
+    return msgpack.unpackb(raw, raw=False, strict_map_key=False)
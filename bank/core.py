@@ -0,0 +1,1078 @@
+import functools
+import hashlib
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from fractions import Fraction
+
+from bank import fraud, metrics, tracing, trends, views
+from bank.archive import archive_account, archive_root, history, remove_account, transaction_count
+from bank.downsample import downsample
+from bank.ids import IdAllocator, luhn_valid
+from bank.money import MAX_DEPOSIT, MAX_LOAN, MAX_TRANSFER, MIN_LOAN, format_inr, round_half_up
+from bank.notify import emi_reminder, otp_message, transaction_alert
+from bank.records import DATE_FORMAT, Account, History, Transaction, now_timestamp, to_timestamp
+from bank.sharding import ShardedStorage, is_sharded
+from bank.snapshot import write_snapshot
+from bank.storage import JsonStorage, StorageConflict
+
+DEBIT_TYPES = frozenset({'withdrawal', 'transfer_out', 'savings_contribution', 'bill_payment', 'emi_payment',
+                         'loan_closure', 'card_payment'})
+
+# Transaction types that fire each inline sweep mode; "fixed" sweeps run in batch
+SWEEP_MODE_TRIGGERS = {
+    "fixed": (),
+    "percent": ("deposit", "transfer_in"),
+    "roundup": ("withdrawal", "transfer_out", "bill_payment", "card_payment"),
+}
+SWEEP_TRIGGERS = frozenset(t for types in SWEEP_MODE_TRIGGERS.values() for t in types)
+SWEEP_PERIODS = {"daily": 1, "weekly": 7, "monthly": 30}
+
+# Points sent per chart series, about a chart's width in pixels
+CHART_POINTS = 1000
+
+# Mutating operations read, modify and rewrite the book, so they run one at a
+# time within a process (API workers, load harness threads).
+write_lock = threading.RLock()
+
+# Across processes, sharded storage rejects a commit whose shards changed since
+# they were read; the whole operation is then re-run on fresh data.
+CONFLICT_RETRIES = 20
+_attempt = threading.local()
+
+
+class LockStats:
+    # How often serialized operations queued for write_lock, how long they
+    # waited, and how many were re-run after a cross-process conflict
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.acquired = 0
+        self.contended = 0
+        self.wait_seconds = 0.0
+        self.conflicts = 0
+
+    def snapshot(self):
+        return {"acquired": self.acquired, "contended": self.contended, "wait_seconds": self.wait_seconds,
+                "conflicts": self.conflicts}
+
+
+lock_stats = LockStats()
+
+
+@metrics.collector
+def _lock_metrics():
+    return [
+        ("bank_write_lock_acquired_total", "counter", "Write-lock acquisitions.", [((), (), lock_stats.acquired)]),
+        ("bank_write_lock_contended_total", "counter", "Write-lock acquisitions that had to wait.",
+         [((), (), lock_stats.contended)]),
+        ("bank_write_lock_wait_seconds_total", "counter", "Time spent waiting for the write lock.",
+         [((), (), lock_stats.wait_seconds)]),
+        ("bank_write_lock_conflicts_total", "counter", "Operations re-run after a cross-process conflict.",
+         [((), (), lock_stats.conflicts)]),
+    ]
+
+
+def _acquire_write_lock():
+    if write_lock.acquire(blocking=False):
+        lock_stats.acquired += 1
+        return
+    start = time.perf_counter()
+    write_lock.acquire()
+    lock_stats.acquired += 1
+    lock_stats.contended += 1
+    lock_stats.wait_seconds += time.perf_counter() - start
+
+
+def serialized(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        outer = getattr(_attempt, 'final', True)
+        try:
+            for attempt in range(CONFLICT_RETRIES):
+                _attempt.final = outer and attempt == CONFLICT_RETRIES - 1
+                _acquire_write_lock()
+                try:
+                    return func(*args, **kwargs)
+                except StorageConflict:
+                    if not outer:
+                        raise
+                    lock_stats.conflicts += 1
+                finally:
+                    write_lock.release()
+                time.sleep(random.uniform(0, 0.002 * (attempt + 1)))
+        finally:
+            _attempt.final = outer
+    return wrapper
+
+
+@metrics.instrument
+class Bank:
+    # Dynamic database path for executable
+    if getattr(sys, 'frozen', False):
+        # Running as compiled executable
+        database = os.path.join(os.path.dirname(sys.executable), 'data.json')
+    else:
+        # Running as script
+        database = 'data.json'
+
+    # Codec spec for writing the book (bank.codecs); any format is readable
+    codec = "auto"
+    _storages = {}
+    _allocators = {}
+    _card_index = {}
+
+    # Optional NotificationQueue; alerts for committed transactions go through it
+    notifier = None
+    _outbox = []
+
+    # Rules screened before deposits, withdrawals and transfers (bank.fraud); () disables them
+    fraud_rules = fraud.RULES
+    _alerts = []
+    _review_queues = {}
+
+    @staticmethod
+    def _hash_pin(pin):
+        return hashlib.sha256(str(pin).encode()).hexdigest()
+
+    @staticmethod
+    def _storage():
+        key = (Bank.database, Bank.codec)
+        storage = Bank._storages.get(key)
+        if storage is None:
+            # A directory with a manifest is a sharded book, anything else the single file
+            backend = ShardedStorage if is_sharded(Bank.database) else JsonStorage
+            storage = Bank._storages[key] = backend(Bank.database, Bank.codec)
+        return storage
+
+    @staticmethod
+    def _load_data(account_nos=None):
+        # With account_nos, sharded storage reads only the shards holding them
+        with tracing.span("load"):
+            return Bank._storage().load(account_nos)
+
+    @staticmethod
+    def _save_data(data, outbox=None):
+        # Alerts leave only once the entries they describe are on disk; a
+        # conflicting operation is re-run and records its entries afresh.
+        # Callers recording outside the write lock pass their own outbox.
+        if outbox is None:
+            outbox, Bank._outbox = Bank._outbox, []
+        alerts, Bank._alerts = Bank._alerts, []
+        try:
+            with tracing.span("save"):
+                saved = Bank._storage().save(data)
+        except StorageConflict:
+            if not getattr(_attempt, 'final', True):
+                raise
+            saved = False
+        if saved and Bank.notifier is not None:
+            for user, txn in outbox:
+                Bank.notifier.submit(transaction_alert(user, txn, txn['type'] in DEBIT_TYPES))
+        if saved and alerts:
+            Bank._review_queue().add(alerts)
+        return saved
+
+    @staticmethod
+    def _review_queue():
+        queue = Bank._review_queues.get(Bank.database)
+        if queue is None:
+            queue = Bank._review_queues[Bank.database] = fraud.ReviewQueue(fraud.alerts_path(Bank.database))
+        return queue
+
+    @staticmethod
+    def _screen(user, flow, amount, recipient=None):
+        # Runs after every other check, just before the balance changes. A block
+        # is queued for review at once, a flag only once the transaction is saved.
+        ts = now_timestamp()
+        if flow == "transfer":
+            fraud.payees(user, Bank._archive_root())
+        blocked, hits = fraud.screen(user, flow, amount, ts, recipient, Bank.fraud_rules)
+        if hits:
+            alert = fraud.alert(user, flow, amount, ts, recipient, hits, blocked)
+            if blocked:
+                Bank._review_queue().add([alert])
+            else:
+                Bank._alerts.append(alert)
+        return blocked
+
+    @staticmethod
+    def _archive_root():
+        return archive_root(Bank.database)
+
+    @staticmethod
+    def _ids():
+        allocator = Bank._allocators.get(Bank.database)
+        if allocator is None:
+            allocator = IdAllocator(f"{os.path.normpath(Bank.database)}.ids", seed=Bank._existing_ids)
+            Bank._allocators[Bank.database] = allocator
+        return allocator
+
+    @staticmethod
+    def _existing_ids():
+        # Read once, when the sequence file is created; headers only. Loan ids are
+        # only ever looked up within their account, so old ones need no reserving.
+        data = Bank._load_data()
+        return {
+            "account": [u['accountNo'] for u in data],
+            "card": [u['virtual_card']['card_number'] for u in data if u.get('virtual_card')],
+        }
+
+    @staticmethod
+    def _next_local_id(user, collection):
+        # Per-account ids for goals, bills and beneficiaries never repeat, even
+        # after removals; the counter is seeded from the current max on first use.
+        seq = user.setdefault('id_seq', {})
+        if collection not in seq:
+            seq[collection] = max((item['id'] for item in user.get(collection, [])), default=0)
+        seq[collection] += 1
+        return seq[collection]
+
+    @staticmethod
+    def _count_active_loans(user):
+        # Kept on the header after every loan change, so bank-wide stats never read bodies
+        user['active_loans'] = sum(1 for l in user.get('loans', []) if l['status'] != 'Closed')
+
+    @staticmethod
+    def _active_loans(user):
+        if 'active_loans' in user:
+            return user['active_loans']
+        return sum(1 for l in user.peek('loans') or () if l['status'] != 'Closed')
+
+    @staticmethod
+    def _generate_account_number():
+        return Bank._ids().next_id("account")
+
+    @staticmethod
+    def _generate_card_number():
+        return Bank._ids().next_id("card")
+
+    @staticmethod
+    def _generate_cvv():
+        return "".join([str(random.randint(0, 9)) for _ in range(3)])
+
+    @staticmethod
+    def _generate_otp():
+        return "".join([str(random.randint(0, 9)) for _ in range(6)])
+
+    @staticmethod
+    def send_otp(email):
+        otp = Bank._generate_otp()
+        if Bank.notifier is not None:
+            Bank.notifier.submit(otp_message(email, otp))
+        return otp
+
+    @staticmethod
+    def _generate_loan_id():
+        return Bank._ids().next_id("loan")
+
+    @staticmethod
+    def _find_user(account_no, pin, *related):
+        data = Bank._load_data([account_no, *related])
+        hashed_pin = Bank._hash_pin(pin)
+        for user in data:
+            if user['accountNo'] == account_no and user['pin'] == hashed_pin:
+                return user, data
+        return None, data
+
+    @staticmethod
+    def _find_user_by_account(account_no):
+        data = Bank._load_data([account_no])
+        for user in data:
+            if user['accountNo'] == account_no:
+                return user
+        return None
+
+    @staticmethod
+    def _record_transaction(user, txn_type, amount, description, outbox=None, **extra):
+        # Single commit path for ledger entries; inline sweep rules hook in here
+        txn = Transaction(txn_type, amount, now_timestamp(), user['balance'], description, extra)
+        user['transactions'].append(txn)
+        fraud.record(user, txn_type, amount, txn.ts, extra.get('to_account'), Bank._archive_root())
+        if Bank.notifier is not None and user.get('email'):
+            (Bank._outbox if outbox is None else outbox).append((user, txn))
+        if user.get('inline_sweeps') and txn_type in SWEEP_TRIGGERS:
+            Bank._apply_inline_sweeps(user, txn, outbox)
+        return txn
+
+    @staticmethod
+    def _sweep_amount(rule, amount):
+        if rule['mode'] == 'percent':
+            return round_half_up(Fraction(amount) * Fraction(str(rule['value'])) / 100)
+        unit = rule['value']
+        remainder = amount % unit
+        return unit - remainder if remainder else 0
+
+    @staticmethod
+    def _move_to_goal(user, goal, amount, description, outbox=None):
+        remaining = goal['target_amount'] - goal['current_amount']
+        amount = min(amount, remaining, user['balance'])
+        if amount <= 0:
+            return 0
+
+        user['balance'] -= amount
+        goal['current_amount'] += amount
+        if goal['current_amount'] >= goal['target_amount']:
+            goal['status'] = 'completed'
+            user.get('inline_sweeps', {}).pop(str(goal['id']), None)
+
+        Bank._record_transaction(user, "savings_contribution", amount, description, outbox)
+        return amount
+
+    @staticmethod
+    def _apply_inline_sweeps(user, txn, outbox=None):
+        # Only accounts with percent/round-up rules reach this point, and the work
+        # is bounded by the number of such rules, never by the history length.
+        for goal_id, rule in list(user['inline_sweeps'].items()):
+            if txn['type'] not in SWEEP_MODE_TRIGGERS[rule['mode']]:
+                continue
+            sweep = Bank._sweep_amount(rule, txn['amount'])
+            if sweep <= 0:
+                continue
+            goal = next((g for g in user.get('savings_goals', []) if str(g['id']) == goal_id), None)
+            if not goal or goal['status'] == 'completed':
+                user['inline_sweeps'].pop(goal_id, None)
+                continue
+            Bank._move_to_goal(user, goal, sweep, f"Auto-sweep: {goal['name']}", outbox)
+
+    @staticmethod
+    def _attach_sweep(user, goal, mode, value, period="monthly"):
+        inline = user.setdefault('inline_sweeps', {})
+        inline.pop(str(goal['id']), None)
+
+        if not mode:
+            goal.pop('sweep', None)
+            return None
+        if mode not in SWEEP_MODE_TRIGGERS:
+            return "Invalid sweep mode."
+        if value <= 0:
+            return "Sweep value must be > 0."
+        if mode == 'percent' and value > 100:
+            return "Sweep percentage cannot exceed 100."
+
+        rule = {"mode": mode, "value": value}
+        if mode == 'fixed':
+            if period not in SWEEP_PERIODS:
+                return "Invalid sweep period."
+            rule["period"] = period
+            rule["next_run"] = (datetime.now() + timedelta(days=SWEEP_PERIODS[period])).strftime("%Y-%m-%d")
+        else:
+            inline[str(goal['id'])] = {"mode": mode, "value": value}
+
+        goal['sweep'] = rule
+        return None
+
+    @staticmethod
+    @serialized
+    def create_account(name, age, email, mobile, address, pin):
+        if age < 18:
+            return False, "You must be 18 or older."
+        if len(str(pin)) != 4 or not str(pin).isdigit():
+            return False, "PIN must be 4 digits."
+        if not name or not email or not mobile or not address:
+            return False, "All fields required."
+        if '@' not in email or '.' not in email:
+            return False, "Invalid email."
+        if len(str(mobile)) != 10 or not str(mobile).isdigit():
+            return False, "Mobile must be 10 digits."
+
+        account_no = Bank._generate_account_number()
+        data = Bank._load_data([account_no])
+        card_number = Bank._generate_card_number()
+        cvv = Bank._generate_cvv()
+        expiry = (datetime.now() + timedelta(days=1825)).strftime("%m/%y")
+
+        account_info = Account(**{
+            "name": name,
+            "age": age,
+            "email": email,
+            "mobile": mobile,
+            "address": address,
+            "pin": Bank._hash_pin(pin),
+            "accountNo": account_no,
+            "balance": 0,
+            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "transactions": History(),
+            "virtual_card": {
+                "card_number": card_number,
+                "cvv": cvv,
+                "expiry": expiry,
+                "card_holder": name.upper()
+            },
+            "savings_goals": [],
+            "beneficiaries": [],
+            "loans": [],
+            "bills": [],
+            "money_unit": "paise"
+        })
+
+        data.append(account_info)
+        if Bank._save_data(data):
+            return True, account_info['accountNo']
+        return False, "Failed to create account."
+
+    @staticmethod
+    @serialized
+    def deposit_money(account_no, pin, amount):
+        user, data = Bank._find_user(account_no, pin)
+        if not user:
+            return False, "Invalid credentials."
+        if amount <= 0:
+            return False, "Amount must be > 0."
+        if amount > MAX_DEPOSIT:
+            return False, "Max ₹50,000 per deposit."
+        blocked = Bank._screen(user, "deposit", amount)
+        if blocked:
+            return False, blocked
+
+        user['balance'] += amount
+        Bank._record_transaction(user, "deposit", amount, "Cash Deposit")
+
+        if Bank._save_data(data):
+            return True, f"Deposited {format_inr(amount)}. Balance: {format_inr(user['balance'])}"
+        return False, "Transaction failed."
+
+    @staticmethod
+    @serialized
+    def withdraw_money(account_no, pin, amount):
+        user, data = Bank._find_user(account_no, pin)
+        if not user:
+            return False, "Invalid credentials."
+        if amount <= 0:
+            return False, "Amount must be > 0."
+        if user['balance'] < amount:
+            return False, f"Insufficient balance. Available: {format_inr(user['balance'])}"
+        blocked = Bank._screen(user, "withdrawal", amount)
+        if blocked:
+            return False, blocked
+
+        user['balance'] -= amount
+        Bank._record_transaction(user, "withdrawal", amount, "Cash Withdrawal")
+
+        if Bank._save_data(data):
+            return True, f"Withdrew {format_inr(amount)}. Balance: {format_inr(user['balance'])}"
+        return False, "Transaction failed."
+
+    @staticmethod
+    @serialized
+    def transfer_money(from_account, pin, to_account, amount, description=""):
+        sender, data = Bank._find_user(from_account, pin, to_account)
+        if not sender:
+            return False, "Invalid sender credentials."
+
+        # Resolve the recipient in the same snapshot so its credit is saved with the debit
+        recipient = next((u for u in data if u['accountNo'] == to_account), None)
+        if not recipient:
+            return False, "Recipient not found."
+        if from_account == to_account:
+            return False, "Cannot transfer to same account."
+        if amount <= 0:
+            return False, "Amount must be > 0."
+        if sender['balance'] < amount:
+            return False, f"Insufficient balance. Available: {format_inr(sender['balance'])}"
+        if amount > MAX_TRANSFER:
+            return False, "Max ₹1,00,000 per transfer."
+        blocked = Bank._screen(sender, "transfer", amount, to_account)
+        if blocked:
+            return False, blocked
+
+        sender['balance'] -= amount
+        recipient['balance'] += amount
+        transfer_desc = description if description else "Money Transfer"
+
+        Bank._record_transaction(sender, "transfer_out", amount, transfer_desc,
+                                 to_account=to_account, recipient_name=recipient['name'])
+        Bank._record_transaction(recipient, "transfer_in", amount, transfer_desc,
+                                 from_account=from_account, sender_name=sender['name'])
+
+        if Bank._save_data(data):
+            return True, f"Transferred {format_inr(amount)} to {recipient['name']}. Balance: {format_inr(sender['balance'])}"
+        return False, "Transfer failed."
+
+    @staticmethod
+    @serialized
+    def add_beneficiary(account_no, pin, beneficiary_account, nickname):
+        user, data = Bank._find_user(account_no, pin)
+        if not user:
+            return False, "Invalid credentials."
+
+        if account_no == beneficiary_account:
+            return False, "Cannot add yourself as beneficiary."
+
+        beneficiary = Bank._find_user_by_account(beneficiary_account)
+        if not beneficiary:
+            return False, "Beneficiary account not found."
+
+        if 'beneficiaries' not in user:
+            user['beneficiaries'] = []
+
+        for ben in user['beneficiaries']:
+            if ben['account'] == beneficiary_account:
+                return False, "Beneficiary already exists."
+
+        user['beneficiaries'].append({
+            "id": Bank._next_local_id(user, 'beneficiaries'),
+            "account": beneficiary_account,
+            "name": beneficiary['name'],
+            "nickname": nickname,
+            "added_on": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        })
+
+        if Bank._save_data(data):
+            return True, f"Added {nickname} ({beneficiary['name']}) as beneficiary!"
+        return False, "Failed to add beneficiary."
+
+    @staticmethod
+    @serialized
+    def remove_beneficiary(account_no, pin, beneficiary_id):
+        user, data = Bank._find_user(account_no, pin)
+        if not user:
+            return False, "Invalid credentials."
+
+        beneficiaries = user.get('beneficiaries', [])
+        user['beneficiaries'] = [b for b in beneficiaries if b['id'] != beneficiary_id]
+
+        if Bank._save_data(data):
+            return True, "Beneficiary removed!"
+        return False, "Failed to remove beneficiary."
+
+    @staticmethod
+    @serialized
+    def pay_bill(account_no, pin, bill_type, provider, bill_number, amount):
+        user, data = Bank._find_user(account_no, pin)
+        if not user:
+            return False, "Invalid credentials."
+
+        if amount <= 0:
+            return False, "Amount must be > 0."
+
+        if user['balance'] < amount:
+            return False, f"Insufficient balance. Available: {format_inr(user['balance'])}"
+
+        user['balance'] -= amount
+
+        if 'bills' not in user:
+            user['bills'] = []
+
+        bill_record = {
+            "id": Bank._next_local_id(user, 'bills'),
+            "type": bill_type,
+            "provider": provider,
+            "bill_number": bill_number,
+            "amount": amount,
+            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "status": "Paid"
+        }
+
+        user['bills'].append(bill_record)
+
+        Bank._record_transaction(user, "bill_payment", amount, f"{bill_type} - {provider}")
+
+        if Bank._save_data(data):
+            return True, f"Bill paid successfully! {format_inr(amount)} | Balance: {format_inr(user['balance'])}"
+        return False, "Bill payment failed."
+
+    @staticmethod
+    def calculate_emi(principal, rate, tenure_months):
+        # Exact rational arithmetic on paise, rounded once at the end
+        if tenure_months <= 0:
+            raise ValueError("Tenure must be at least one month.")
+        r = Fraction(str(rate)) / (12 * 100)
+        if r == 0:
+            emi = -(-principal // tenure_months)
+        else:
+            growth = (1 + r) ** tenure_months
+            emi = round_half_up(principal * r * growth / (growth - 1))
+        total_amount = emi * tenure_months
+        total_interest = total_amount - principal
+        return emi, total_amount, total_interest
+
+    @staticmethod
+    def _monthly_interest(outstanding, rate):
+        return round_half_up(outstanding * Fraction(str(rate)) / (12 * 100))
+
+    @staticmethod
+    @serialized
+    def apply_loan(account_no, pin, loan_type, amount, tenure_months, purpose):
+        user, data = Bank._find_user(account_no, pin)
+        if not user:
+            return False, "Invalid credentials.", 0
+
+        if amount < MIN_LOAN:
+            return False, "Minimum loan amount is ₹10,000.", 0
+
+        if amount > MAX_LOAN:
+            return False, "Maximum loan amount is ₹50,00,000.", 0
+
+        if not isinstance(tenure_months, int) or tenure_months <= 0:
+            return False, "Tenure must be at least one month.", 0
+
+        rates = {
+            "Personal Loan": 12.5,
+            "Home Loan": 8.5,
+            "Car Loan": 10.0,
+            "Education Loan": 9.0
+        }
+
+        rate = rates.get(loan_type, 12.0)
+        emi, total_amount, total_interest = Bank.calculate_emi(amount, rate, tenure_months)
+
+        if 'loans' not in user:
+            user['loans'] = []
+
+        loan = {
+            "loan_id": Bank._generate_loan_id(),
+            "type": loan_type,
+            "principal": amount,
+            "interest_rate": rate,
+            "tenure_months": tenure_months,
+            "emi": emi,
+            "total_amount": total_amount,
+            "total_interest": total_interest,
+            "outstanding": amount,
+            "paid_emis": 0,
+            "purpose": purpose,
+            "applied_on": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "status": "Active",
+            "next_emi_date": (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d")
+        }
+
+        user['loans'].append(loan)
+        Bank._count_active_loans(user)
+
+        user['balance'] += amount
+        Bank._record_transaction(user, "loan_credit", amount, f"Loan Disbursed - {loan_type}")
+
+        if Bank._save_data(data):
+            return True, loan['loan_id'], emi
+        return False, "Loan application failed.", 0
+
+    @staticmethod
+    @serialized
+    def pay_emi(account_no, pin, loan_id):
+        user, data = Bank._find_user(account_no, pin)
+        if not user:
+            return False, "Invalid credentials."
+
+        loan = next((l for l in user.get('loans', []) if l['loan_id'] == loan_id), None)
+        if not loan:
+            return False, "Loan not found."
+
+        if loan['status'] == 'Closed':
+            return False, "Loan already closed."
+
+        emi_amount = loan['emi']
+
+        if user['balance'] < emi_amount:
+            return False, f"Insufficient balance. EMI: {format_inr(emi_amount, 2)}"
+
+        user['balance'] -= emi_amount
+        loan['paid_emis'] += 1
+
+        principal_part = emi_amount - Bank._monthly_interest(loan['outstanding'], loan['interest_rate'])
+        loan['outstanding'] = max(0, loan['outstanding'] - principal_part)
+
+        if loan['paid_emis'] >= loan['tenure_months'] or loan['outstanding'] <= 0:
+            loan['status'] = 'Closed'
+            loan['outstanding'] = 0
+            Bank._count_active_loans(user)
+        else:
+            next_date = datetime.strptime(loan['next_emi_date'], "%Y-%m-%d") + timedelta(days=30)
+            loan['next_emi_date'] = next_date.strftime("%Y-%m-%d")
+
+        Bank._record_transaction(user, "emi_payment", emi_amount, f"EMI Paid - {loan['type']}")
+
+        if Bank._save_data(data):
+            status = "Loan Closed!" if loan['status'] == 'Closed' else f"EMI Paid! Remaining: {loan['tenure_months'] - loan['paid_emis']} EMIs"
+            return True, status
+        return False, "EMI payment failed."
+
+    @staticmethod
+    @serialized
+    def close_loan(account_no, pin, loan_id):
+        user, data = Bank._find_user(account_no, pin)
+        if not user:
+            return False, "Invalid credentials."
+
+        loan = next((l for l in user.get('loans', []) if l['loan_id'] == loan_id), None)
+        if not loan:
+            return False, "Loan not found."
+
+        if loan['status'] == 'Closed':
+            return False, "Loan already closed."
+
+        outstanding = loan['outstanding']
+
+        if user['balance'] < outstanding:
+            return False, f"Insufficient balance. Outstanding: {format_inr(outstanding, 2)}"
+
+        user['balance'] -= outstanding
+        loan['status'] = 'Closed'
+        loan['outstanding'] = 0
+        Bank._count_active_loans(user)
+
+        Bank._record_transaction(user, "loan_closure", outstanding, f"Loan Closed - {loan['type']}")
+
+        if Bank._save_data(data):
+            return True, f"Loan closed! Paid {format_inr(outstanding, 2)}. Balance: {format_inr(user['balance'])}"
+        return False, "Loan closure failed."
+
+    @staticmethod
+    @serialized
+    def add_savings_goal(account_no, pin, goal_name, target_amount, deadline,
+                         sweep_mode=None, sweep_value=0, sweep_period="monthly"):
+        user, data = Bank._find_user(account_no, pin)
+        if not user:
+            return False, "Invalid credentials."
+
+        if 'savings_goals' not in user:
+            user['savings_goals'] = []
+
+        goal = {
+            "id": Bank._next_local_id(user, 'savings_goals'),
+            "name": goal_name,
+            "target_amount": target_amount,
+            "current_amount": 0,
+            "deadline": deadline,
+            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "status": "active"
+        }
+
+        error = Bank._attach_sweep(user, goal, sweep_mode, sweep_value, sweep_period)
+        if error:
+            return False, error
+
+        user['savings_goals'].append(goal)
+
+        if Bank._save_data(data):
+            return True, "Goal added successfully!"
+        return False, "Failed to add goal."
+
+    @staticmethod
+    @serialized
+    def set_goal_sweep(account_no, pin, goal_id, mode, value=0, period="monthly"):
+        user, data = Bank._find_user(account_no, pin)
+        if not user:
+            return False, "Invalid credentials."
+
+        goal = next((g for g in user.get('savings_goals', []) if g['id'] == goal_id), None)
+        if not goal:
+            return False, "Goal not found."
+        if goal['status'] == 'completed':
+            return False, "Goal already completed."
+
+        error = Bank._attach_sweep(user, goal, mode, value, period)
+        if error:
+            return False, error
+
+        if Bank._save_data(data):
+            return True, "Sweep rule removed." if not mode else "Sweep rule saved."
+        return False, "Failed to save sweep rule."
+
+    @staticmethod
+    @serialized
+    def run_periodic_sweeps(today=None):
+        # Batch job: one load, one pass over every account, one save
+        today = today or datetime.now()
+        today_str = today.strftime("%Y-%m-%d")
+        data = Bank._load_data()
+        applied = 0
+
+        for user in data:
+            for goal in user.get('savings_goals', []):
+                rule = goal.get('sweep')
+                if not rule or rule['mode'] != 'fixed' or goal['status'] == 'completed':
+                    continue
+                if rule['next_run'] > today_str:
+                    continue
+
+                if Bank._move_to_goal(user, goal, rule['value'], f"Auto-sweep: {goal['name']}"):
+                    applied += 1
+
+                next_run = datetime.strptime(rule['next_run'], "%Y-%m-%d")
+                while next_run.strftime("%Y-%m-%d") <= today_str:
+                    next_run += timedelta(days=SWEEP_PERIODS[rule['period']])
+                rule['next_run'] = next_run.strftime("%Y-%m-%d")
+
+        if Bank._save_data(data):
+            return True, f"Applied {applied} periodic sweeps."
+        return False, "Sweep run failed."
+
+    @staticmethod
+    def send_emi_reminders(today=None, days_ahead=3):
+        # Batch job: queue a reminder for every active loan due within days_ahead
+        if Bank.notifier is None:
+            return False, "Notifications are not configured."
+        today = today or datetime.now()
+        first = today.strftime("%Y-%m-%d")
+        last = (today + timedelta(days=days_ahead)).strftime("%Y-%m-%d")
+        queued = 0
+
+        for user in Bank._load_data():
+            for loan in user.get('loans', []):
+                if loan['status'] == 'Closed' or not first <= loan['next_emi_date'] <= last:
+                    continue
+                queued += Bank.notifier.submit(emi_reminder(user, loan))
+        return True, f"Queued {queued} EMI reminders."
+
+    @staticmethod
+    @serialized
+    def contribute_to_goal(account_no, pin, goal_id, amount):
+        user, data = Bank._find_user(account_no, pin)
+        if not user:
+            return False, "Invalid credentials."
+        if user['balance'] < amount:
+            return False, "Insufficient balance."
+
+        goal = next((g for g in user.get('savings_goals', []) if g['id'] == goal_id), None)
+        if not goal:
+            return False, "Goal not found."
+        if goal['status'] == 'completed':
+            return False, "Goal already completed."
+
+        user['balance'] -= amount
+        goal['current_amount'] += amount
+
+        if goal['current_amount'] >= goal['target_amount']:
+            goal['status'] = 'completed'
+            user.get('inline_sweeps', {}).pop(str(goal['id']), None)
+
+        Bank._record_transaction(user, "savings_contribution", amount, f"Saved for: {goal['name']}")
+
+        if Bank._save_data(data):
+            return True, f"Contributed {format_inr(amount)} to {goal['name']}!"
+        return False, "Contribution failed."
+
+    @staticmethod
+    def get_details(account_no, pin):
+        user, _ = Bank._find_user(account_no, pin)
+        if not user:
+            return None, "Invalid credentials."
+        return user, "Success"
+
+    @staticmethod
+    @serialized
+    def update_details(account_no, pin, name=None, email=None, mobile=None, address=None, new_pin=None):
+        user, data = Bank._find_user(account_no, pin)
+        if not user:
+            return False, "Invalid credentials."
+
+        if name:
+            user['name'] = name
+        if email:
+            if '@' not in email or '.' not in email:
+                return False, "Invalid email."
+            user['email'] = email
+        if mobile:
+            if len(str(mobile)) != 10 or not str(mobile).isdigit():
+                return False, "Mobile must be 10 digits."
+            user['mobile'] = mobile
+        if address:
+            user['address'] = address
+        if new_pin and len(str(new_pin)) == 4 and str(new_pin).isdigit():
+            user['pin'] = Bank._hash_pin(new_pin)
+        elif new_pin:
+            return False, "PIN must be 4 digits."
+
+        if Bank._save_data(data):
+            return True, "Updated successfully."
+        return False, "Update failed."
+
+    @staticmethod
+    @serialized
+    def delete_account(account_no, pin):
+        user, data = Bank._find_user(account_no, pin)
+        if not user:
+            return False, "Invalid credentials."
+        data.remove(user)
+        if Bank._save_data(data):
+            remove_account(Bank._archive_root(), account_no)
+            return True, "Account deleted."
+        return False, "Deletion failed."
+
+    @staticmethod
+    def filter_transactions(account_no, pin, start_date=None, end_date=None, txn_type=None, min_amount=None,
+                            max_amount=None):
+        user, _ = Bank._find_user(account_no, pin)
+        if not user:
+            return None, "Invalid credentials."
+
+        filtered = []
+
+        start_ts = to_timestamp(start_date.strftime(DATE_FORMAT)) if start_date else None
+        end_ts = to_timestamp(end_date.strftime(DATE_FORMAT)) if end_date else None
+        for txn in history(Bank._archive_root(), user, start_ts, end_ts):
+            if start_ts is not None and txn.ts < start_ts:
+                continue
+            if end_ts is not None and txn.ts > end_ts:
+                continue
+            if txn_type and txn_type != "all" and txn['type'] != txn_type:
+                continue
+            if min_amount and txn['amount'] < min_amount:
+                continue
+            if max_amount and txn['amount'] > max_amount:
+                continue
+            filtered.append(txn)
+
+        return filtered, "Success"
+
+    @staticmethod
+    def balance_series(account_no, pin, start_date=None, end_date=None, points=CHART_POINTS, method="lttb"):
+        # Balance trend over [start_date, end_date] cut down to at most `points`
+        # points, so a narrower range comes back in more detail
+        user, _ = Bank._find_user(account_no, pin)
+        if not user:
+            return None, "Invalid credentials."
+        start_ts = to_timestamp(start_date.strftime(DATE_FORMAT)) if start_date else None
+        end_ts = to_timestamp(end_date.strftime(DATE_FORMAT)) if end_date else None
+        stamps, balances = trends.CACHE.view(Bank._archive_root(), user).window(start_ts, end_ts)
+        ts, balance = downsample(stamps, balances, points, method)
+        return {"ts": ts, "balance": balance, "count": len(stamps)}, "Success"
+
+    @staticmethod
+    def transaction_types(account_no, pin):
+        # Entries per type over the whole ledger, kept as running counters
+        user, _ = Bank._find_user(account_no, pin)
+        if not user:
+            return None, "Invalid credentials."
+        return dict(trends.CACHE.view(Bank._archive_root(), user).types), "Success"
+
+    @staticmethod
+    def get_stats():
+        data = Bank._load_data()
+        return {
+            "accounts": len(data),
+            "total_balance": sum(u['balance'] for u in data),
+            "transactions": sum(transaction_count(u) for u in data),
+            "loans": sum(u.size('loans') for u in data),
+            "active_loans": sum(Bank._active_loans(u) for u in data),
+            "beneficiaries": sum(u.size('beneficiaries') for u in data),
+            "savings_goals": sum(u.size('savings_goals') for u in data),
+        }
+
+    @staticmethod
+    @serialized
+    def import_accounts(records):
+        # Accounts keep their numbers, so an import holding a number that is
+        # already in the book (or twice in the import) is rejected as a whole.
+        # Its ids are reserved before the save, so the allocator never mints them;
+        # numbers the sequence has already passed are rejected the same way.
+        numbers = [record['accountNo'] for record in records]
+        data = Bank._load_data(numbers)
+        existing = {u['accountNo'] for u in data}
+        conflicts = sorted({n for n, count in Counter(numbers).items() if count > 1 or n in existing})
+        if conflicts:
+            return False, f"Import rejected: {len(conflicts)} account numbers already in use.", conflicts
+
+        ids = Bank._ids()
+        taken = ids.reserve("account", numbers)
+        taken += ids.reserve("card", [r['virtual_card']['card_number'] for r in records if r.get('virtual_card')])
+        if taken:
+            return False, f"Import rejected: {len(taken)} numbers may already have been issued.", taken
+        data.extend(Account.from_dict(record) for record in records)
+        if Bank._save_data(data):
+            return True, f"Imported {len(records)} accounts.", []
+        return False, "Import failed.", []
+
+    @staticmethod
+    def export_accounts(account_nos=None):
+        data = Bank._load_data(account_nos or None)
+        if account_nos:
+            wanted = set(account_nos)
+            data = [u for u in data if u['accountNo'] in wanted]
+        # Exports are self-contained: archived entries are folded back into the ledger
+        root = Bank._archive_root()
+        return [Account(**{**{k: v for k, v in u.to_dict().items() if k != 'archive'},
+                           'transactions': history(root, u)}) if u.get('archive') else u for u in data]
+
+    @staticmethod
+    def publish_snapshot(path=None):
+        # Binary read-only copy of the book for reporting workers (bank.snapshot)
+        path = path or f"{os.path.normpath(Bank.database)}.snap"
+        root = Bank._archive_root()
+        accounts, transactions = write_snapshot(path, Bank._load_data(), lambda u: history(root, u))
+        return True, f"Published {accounts} accounts and {transactions} transactions to {path}."
+
+    @staticmethod
+    def refresh_views(rebuild=False):
+        # Batch job: fold new ledger entries into the bank-wide views (bank.views)
+        path = views.views_path(Bank.database)
+        folded, changed, rebuilt = views.refresh(path, Bank._load_data(), Bank._archive_root(), rebuild)
+        how = "Rebuilt views from" if rebuilt else "Folded"
+        return True, f"{how} {folded} transactions of {changed} accounts into {path}."
+
+    @staticmethod
+    def bank_views():
+        # Dashboard document of the bank-wide views, as of their last refresh
+        dashboard = views.load(views.views_path(Bank.database))
+        if dashboard is None:
+            return None, "No views yet; refresh them first."
+        return dashboard, "Success"
+
+    @staticmethod
+    def review_alerts(status="open"):
+        # Fraud alerts in the review queue, newest first; status None for all
+        return Bank._review_queue().alerts(status), "Success"
+
+    @staticmethod
+    def resolve_alert(alert_id, decision, note=""):
+        return Bank._review_queue().resolve(alert_id, decision, note)
+
+    @staticmethod
+    @serialized
+    def archive_transactions(keep_last=None, older_than_days=None):
+        # Batch job: move old entries into per-account cold segments
+        if keep_last is None and older_than_days is None:
+            return False, "Give a number of entries to keep or an age in days."
+        before_ts = None
+        if older_than_days is not None:
+            before_ts = to_timestamp((datetime.now() - timedelta(days=older_than_days)).strftime(DATE_FORMAT))
+        data = Bank._load_data()
+        root = Bank._archive_root()
+        moved = 0
+        for user in data:
+            moved += archive_account(root, user, keep_last, before_ts)
+        if not moved:
+            return True, "Nothing to archive."
+        if Bank._save_data(data):
+            return True, f"Archived {moved} transactions."
+        return False, "Archive run failed."
+
+    @staticmethod
+    @serialized
+    def authorize_card(card_number, cvv, expiry, amount, merchant):
+        # One-off path for callers without a long-lived CardAuthorizer: only the
+        # card's account is loaded, and the balance is checked and written under
+        # the write lock, so an approval is never dropped later
+        from bank.cards import CardAuthorizer
+        account_no = Bank._card_account(card_number)
+        if account_no is None:
+            return False, "Card not found."
+        authorizer = CardAuthorizer(Bank._load_data([account_no]))
+        approved, result = authorizer.authorize(card_number, cvv, expiry, amount, merchant)
+        if approved and not authorizer.flush():
+            return False, "Authorization failed."
+        return approved, result
+
+    @staticmethod
+    def _card_account(card_number):
+        # Card number -> account number, kept per process and built from headers.
+        # Cards are only issued with new accounts, so a miss rebuilds it once.
+        if not luhn_valid(str(card_number)):
+            return None
+        index = Bank._card_index.get(Bank.database)
+        if index is None or card_number not in index:
+            index = Bank._card_index[Bank.database] = {
+                u['virtual_card']['card_number']: u['accountNo'] for u in Bank._load_data() if u.get('virtual_card')}
+        return index.get(card_number)
+
+    @staticmethod
+    def generate_statement_pdf(user, transactions, start_date=None, end_date=None):
+        # reportlab is only imported when a statement is actually rendered
+        from bank.statements import render_statement_pdf
+        return render_statement_pdf(user, transactions, start_date, end_date)
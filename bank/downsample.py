@@ -0,0 +1,67 @@
+"""Downsampling of chart series to a bounded number of points.
+
+lttb() keeps the shape of a line (Largest-Triangle-Three-Buckets: one point
+per bucket, the one spanning the largest triangle with its neighbours);
+minmax() keeps every bucket's extremes, so no spike or dip is lost. Both
+return indices into the input, always including the first and last point,
+and leave series already within the target untouched.
+"""
+
+METHODS = ("lttb", "minmax")
+
+
+def lttb(xs, ys, points):
+    n = len(xs)
+    if points >= n or points < 3:
+        return list(range(n))
+    size = (n - 2) / (points - 2)
+    picked = [0]
+    a = 0
+    for bucket in range(points - 2):
+        # Average of the next bucket (the last point for the final bucket)
+        start = int((bucket + 1) * size) + 1
+        end = min(int((bucket + 2) * size) + 1, n)
+        avg_x = sum(xs[start:end]) / (end - start)
+        avg_y = sum(ys[start:end]) / (end - start)
+        ax, ay = xs[a], ys[a]
+        best, best_area = -1, -1.0
+        for i in range(int(bucket * size) + 1, start):
+            area = abs((ax - avg_x) * (ys[i] - ay) - (ax - xs[i]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = i, area
+        picked.append(best)
+        a = best
+    picked.append(n - 1)
+    return picked
+
+
+def minmax(xs, ys, points):
+    n = len(xs)
+    if points >= n or points < 4:
+        return list(range(n))
+    buckets = (points - 2) // 2
+    size = (n - 2) / buckets
+    picked = [0]
+    for bucket in range(buckets):
+        start = int(bucket * size) + 1
+        end = min(int((bucket + 1) * size) + 1, n - 1)
+        if start >= end:
+            continue
+        low = high = start
+        for i in range(start + 1, end):
+            if ys[i] < ys[low]:
+                low = i
+            elif ys[i] > ys[high]:
+                high = i
+        picked.extend(sorted({low, high}))
+    picked.append(n - 1)
+    return picked
+
+
+def downsample(xs, ys, points, method="lttb"):
+    if method not in METHODS:
+        raise ValueError(f"unknown downsampling method '{method}' (choose from {', '.join(METHODS)})")
+    indices = (lttb if method == "lttb" else minmax)(xs, ys, points)
+    if len(indices) == len(xs):
+        return xs, ys
+    return [xs[i] for i in indices], [ys[i] for i in indices]
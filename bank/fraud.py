@@ -0,0 +1,246 @@
+"""Velocity limits and fraud rules screened on the transaction path.
+
+Every deposit, withdrawal and outgoing transfer is screened against RULES
+before it changes a balance. Each rule looks at the account and the
+attempted amount and either passes, flags the transaction (it goes through
+and an alert is queued for review) or blocks it:
+
+    velocity         count and amount per account and flow over the last hour and day
+    new_beneficiary  large transfers to a recipient first paid or saved less than a day ago
+    unusual_hour     large debits between midnight and 5 a.m.
+
+Velocity windows are kept on the account header as a few time buckets per
+window ([slot, count, amount], oldest first; 5-minute slots for the hour,
+hourly slots for the day), so they are saved with the transaction they
+count and screening costs the same however long the ledger is. A window
+covers its last full buckets plus the current one, so it slides in
+5-minute (hour) or hourly (day) steps. The recipients an account has paid
+are kept on the header too, with the time of the first transfer to each;
+accounts saved before that list existed get it filled in once from their
+whole ledger, archived entries included.
+
+Alerts are appended to <db>.alerts.jsonl, the review queue, followed by
+the reviewers' decisions on them:
+
+    python -m bank alerts                                  # open alerts
+    python -m bank alerts --resolve ID --decision cleared --note "called the customer"
+"""
+import json
+import os
+import random
+from datetime import datetime
+
+from bank import metrics
+from bank.archive import ledger_entries
+from bank.locks import file_lock
+from bank.money import PAISE, format_inr
+from bank.records import from_timestamp, to_timestamp
+
+FLAG, BLOCK = "flag", "block"
+DECISIONS = ("cleared", "confirmed")
+
+# Ledger entry type -> flow whose windows it counts in
+FLOWS = {"deposit": "deposit", "withdrawal": "withdrawal", "transfer_out": "transfer"}
+
+# Window -> (span in seconds, buckets)
+WINDOWS = {"hour": (3600, 12), "day": (86400, 24)}
+
+# Flow -> window -> (max transactions, max amount in paise)
+VELOCITY_LIMITS = {
+    "deposit": {"hour": (10, 100000 * PAISE), "day": (20, 200000 * PAISE)},
+    "withdrawal": {"hour": (10, 100000 * PAISE), "day": (20, 200000 * PAISE)},
+    "transfer": {"hour": (10, 200000 * PAISE), "day": (25, 500000 * PAISE)},
+}
+
+NEW_BENEFICIARY_COOLDOWN = 86400
+NEW_BENEFICIARY_LIMIT = 25000 * PAISE
+
+QUIET_HOURS = (0, 5)
+UNUSUAL_HOUR_AMOUNT = 10000 * PAISE
+
+rule_hits = metrics.REGISTRY.counter("bank_fraud_rule_hits_total", "Fraud rule hits by rule and action.",
+                                     ("rule", "action"))
+
+
+def _totals(buckets, slot, size):
+    # (count, amount) of the buckets inside the window whose newest slot is `slot`
+    count = amount = 0
+    for bucket in buckets:
+        if bucket[0] > slot - size:
+            count += bucket[1]
+            amount += bucket[2]
+    return count, amount
+
+
+def window_totals(user, flow, ts):
+    # {window: (count, amount)} of `flow` at ts, for screens and dashboards
+    windows = (user.get('velocity') or {}).get(flow) or {}
+    totals = {}
+    for name, (span, size) in WINDOWS.items():
+        totals[name] = _totals(windows.get(name, ()), ts // (span // size), size)
+    return totals
+
+
+def payees(user, root=None):
+    # {recipient: ts of the first transfer to it}. For accounts saved before this
+    # was kept it is filled in once from the ledger: the archive under `root`
+    # too when given, so recipients paid long ago are not taken for new ones.
+    known = user.get('payees')
+    if known is None:
+        known = {}
+        hot = user.peek('transactions') or ()
+        for txn in (ledger_entries(root, user, hot=hot) if root is not None else hot):
+            if txn.type == 'transfer_out' and txn.get('to_account'):
+                known.setdefault(txn.get('to_account'), txn.ts)
+        user['payees'] = known
+    return known
+
+
+def record(user, txn_type, amount, ts, counterparty=None, root=None):
+    # Counts a committed ledger entry in its flow's windows
+    flow = FLOWS.get(txn_type)
+    if flow is None:
+        return
+    if txn_type == "transfer_out" and counterparty:
+        payees(user, root).setdefault(counterparty, ts)
+    windows = user.setdefault('velocity', {}).setdefault(flow, {})
+    for name, (span, size) in WINDOWS.items():
+        slot = ts // (span // size)
+        buckets = windows.setdefault(name, [])
+        expired = 0
+        while expired < len(buckets) and buckets[expired][0] <= slot - size:
+            expired += 1
+        del buckets[:expired]
+        # A clock stepped back counts in the newest bucket
+        if buckets and buckets[-1][0] >= slot:
+            buckets[-1][1] += 1
+            buckets[-1][2] += amount
+        else:
+            buckets.append([slot, 1, amount])
+
+
+def velocity(user, flow, amount, ts, recipient):
+    limits = VELOCITY_LIMITS.get(flow)
+    if not limits:
+        return None
+    totals = window_totals(user, flow, ts)
+    for name, (max_count, max_amount) in limits.items():
+        count, total = totals[name]
+        if count >= max_count:
+            return BLOCK, f"{flow.capitalize()} limit reached: {max_count} per {name}."
+        if total + amount > max_amount:
+            return BLOCK, (f"{flow.capitalize()} limit reached: {format_inr(max_amount)} per {name} "
+                           f"({format_inr(max(0, max_amount - total))} left).")
+    return None
+
+
+def new_beneficiary(user, flow, amount, ts, recipient):
+    # A recipient stays new until a day after it was first paid or saved as a
+    # beneficiary, whichever came first
+    if flow != "transfer" or amount <= NEW_BENEFICIARY_LIMIT or recipient is None:
+        return None
+    known = payees(user).get(recipient)
+    name = recipient
+    for ben in user.get('beneficiaries') or ():
+        if ben['account'] == recipient:
+            added = to_timestamp(ben['added_on'])
+            known = added if known is None else min(known, added)
+            name = ben['nickname']
+            break
+    if known is not None and ts - known >= NEW_BENEFICIARY_COOLDOWN:
+        return None
+    return BLOCK, (f"{name} is a new recipient; transfers to it are limited to "
+                   f"{format_inr(NEW_BENEFICIARY_LIMIT)} for a day.")
+
+
+def unusual_hour(user, flow, amount, ts, recipient):
+    hour = ts // 3600 % 24
+    if flow == "deposit" or amount < UNUSUAL_HOUR_AMOUNT or not QUIET_HOURS[0] <= hour < QUIET_HOURS[1]:
+        return None
+    return FLAG, f"{flow.capitalize()} of {format_inr(amount)} at {hour:02d}:{ts // 60 % 60:02d}."
+
+
+RULES = (("velocity", velocity), ("new_beneficiary", new_beneficiary), ("unusual_hour", unusual_hour))
+
+
+def screen(user, flow, amount, ts, recipient=None, rules=RULES):
+    # -> (message of the first blocking hit or None, [(rule, action, message)])
+    hits = []
+    blocked = None
+    for name, rule in rules:
+        hit = rule(user, flow, amount, ts, recipient)
+        if hit is None:
+            continue
+        action, message = hit
+        hits.append((name, action, message))
+        rule_hits.inc(1, (name, action))
+        if action == BLOCK and blocked is None:
+            blocked = message
+    return blocked, hits
+
+
+def alert(user, flow, amount, ts, recipient, hits, blocked):
+    return {"id": f"{random.getrandbits(48):012X}", "date": from_timestamp(ts), "account": user['accountNo'],
+            "name": user['name'], "flow": flow, "amount": amount, "recipient": recipient,
+            "action": "blocked" if blocked else "flagged",
+            "hits": [{"rule": name, "action": action, "message": message} for name, action, message in hits]}
+
+
+def alerts_path(database):
+    return f"{os.path.normpath(database)}.alerts.jsonl"
+
+
+class ReviewQueue:
+    # Append-only: alert lines, then {"review": id, "decision": ...} lines.
+    # Every write holds the queue's lock file, so any number of processes and
+    # threads can share it.
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+
+    def add(self, alerts):
+        if not alerts:
+            return
+        with file_lock(self.lock_path):
+            self._append(alerts)
+
+    def _append(self, items):
+        lines = "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in items)
+        with open(self.path, 'a', encoding='utf-8') as fs:
+            fs.write(lines)
+
+    def alerts(self, status=None):
+        # Newest first; status "open", "cleared" or "confirmed"
+        items = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as fs:
+                for line in fs:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short by a crash
+                    if 'review' in entry:
+                        item = items.get(entry['review'])
+                        if item is not None:
+                            item.update(status=entry['decision'], reviewed_at=entry['date'], note=entry['note'])
+                    else:
+                        entry['status'] = "open"
+                        items[entry['id']] = entry
+        except FileNotFoundError:
+            pass
+        result = [item for item in items.values() if status is None or item['status'] == status]
+        result.reverse()
+        return result
+
+    def resolve(self, alert_id, decision, note=""):
+        if decision not in DECISIONS:
+            return False, f"Decision must be one of: {', '.join(DECISIONS)}."
+        with file_lock(self.lock_path):
+            item = next((a for a in self.alerts() if a['id'] == alert_id), None)
+            if item is None:
+                return False, "Alert not found."
+            if item['status'] != "open":
+                return False, f"Alert already {item['status']}."
+            self._append([{"review": alert_id, "decision": decision, "note": note,
+                          "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}])
+        return True, f"Alert {alert_id} {decision}."
@@ -0,0 +1,187 @@
+import json
+import os
+import string
+import threading
+
+from bank.locks import file_lock
+
+
+def luhn_check_digit(partial):
+    total = 0
+    for i, ch in enumerate(reversed(partial)):
+        d = int(ch)
+        if i % 2 == 0:
+            d *= 2
+            if d > 9:
+                d -= 9
+        total += d
+    return str((10 - total % 10) % 10)
+
+
+def luhn_valid(number):
+    return len(number) > 1 and number.isdigit() and luhn_check_digit(number[:-1]) == number[-1]
+
+
+class IdAllocator:
+    # Each kind draws from a persisted sequence. A process reserves a block of
+    # sequence numbers under a lock file and mints from it in memory, so bulk
+    # imports and parallel workers never scan the database or collide. Sequence
+    # numbers go through an affine permutation of the id space, which keeps ids
+    # unique while they still look like the old random ones.
+    KINDS = {
+        # kind: (id space, multiplier coprime with the space, offset)
+        "account": (26 ** 4 * 10 ** 6, 2654435761, 137438953447),
+        "card": (10 ** 14, 33555777941757, 4398046511104),
+        "loan": (10 ** 8, 2654435761, 16777259),
+    }
+
+    def __init__(self, path, block_size=64, seed=None):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self.block_size = block_size
+        self.seed = seed
+        self._blocks = {}
+        self._skip = {}
+        self._pid = os.getpid()
+        self._mutex = threading.Lock()
+
+    def next_id(self, kind):
+        with self._mutex:
+            if self._pid != os.getpid():
+                # Forked workers must not reuse the parent's block
+                self._blocks = {}
+                self._pid = os.getpid()
+            while True:
+                block = self._blocks.get(kind)
+                if not block or block[0] >= block[1]:
+                    block = self._blocks[kind] = self._reserve_block(kind)
+                seq = block[0]
+                block[0] += 1
+                skip = next((r for r in self._skip.get(kind, ()) if r[0] <= seq < r[1]), None)
+                if skip is None:
+                    return self._format(kind, seq)
+                block[0] = max(block[0], min(skip[1], block[1]))
+
+    def _format(self, kind, seq):
+        space, mult, offset = self.KINDS[kind]
+        value = (seq * mult + offset) % space
+        if kind == "account":
+            letters, digits = divmod(value, 10 ** 6)
+            alpha = ""
+            for _ in range(4):
+                letters, idx = divmod(letters, 26)
+                alpha = string.ascii_uppercase[idx] + alpha
+            return f"{alpha}{digits:06d}"
+        if kind == "card":
+            partial = f"4{value:014d}"
+            return partial + luhn_check_digit(partial)
+        return f"LN{value:08d}"
+
+    def _seq(self, kind, id_):
+        # Inverse of _format; None for ids the sequence can never produce
+        space, mult, offset = self.KINDS[kind]
+        id_ = str(id_)
+        if kind == "account":
+            if len(id_) != 10 or not id_[:4].isalpha() or not id_[:4].isupper() or not id_[4:].isdigit():
+                return None
+            letters = 0
+            for ch in id_[:4]:
+                letters = letters * 26 + string.ascii_uppercase.index(ch)
+            value = letters * 10 ** 6 + int(id_[4:])
+        elif kind == "card":
+            if len(id_) != 16 or not id_.isdigit() or id_[0] != "4":
+                return None
+            value = int(id_[1:15])
+        else:
+            if len(id_) != 10 or not id_.startswith("LN") or not id_[2:].isdigit():
+                return None
+            value = int(id_[2:])
+        return (value - offset) * pow(mult, -1, space) % space
+
+    def _reserve_block(self, kind):
+        with self._file_lock():
+            state = self._read_state()
+            start = state["next"].get(kind, 0)
+            if start + self.block_size > self.KINDS[kind][0]:
+                raise RuntimeError(f"{kind} id space exhausted")
+            end = start + self.block_size
+            state["next"][kind] = end
+            # Reserved ranges the sequence has passed are dropped
+            ranges = [r for r in state["reserved"].get(kind, ()) if r[1] > end]
+            self._skip[kind] = [r for r in state["reserved"].get(kind, ()) if r[0] < end and r[1] > start]
+            state["reserved"][kind] = ranges
+            self._write_state(state)
+        return [start, end]
+
+    def reserve(self, kind, ids):
+        # Records ids minted elsewhere (imported accounts) as ranges of sequence
+        # numbers the sequence skips; a range starting at the high-water mark just
+        # moves the mark. Ids below the mark may sit in a block some process is
+        # minting from, so they cannot be reserved and are returned instead.
+        seqs = {}
+        for id_ in ids:
+            seq = self._seq(kind, id_)
+            if seq is not None:
+                seqs[seq] = id_
+        if not seqs:
+            return []
+        with self._mutex, self._file_lock():
+            state = self._read_state()
+            mark = state["next"].get(kind, 0)
+            _add_ranges(state, kind, sorted(seqs))
+            self._write_state(state)
+        return sorted(id_ for seq, id_ in seqs.items() if seq < mark)
+
+    def _read_state(self):
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as fs:
+                state = json.load(fs)
+            reserved = state.setdefault("reserved", {})
+            for kind, entries in list(reserved.items()):
+                if entries and not isinstance(entries[0], list):
+                    # Sequence files that listed reserved ids one by one
+                    reserved[kind] = []
+                    _add_ranges(state, kind, sorted({s for s in (self._seq(kind, i) for i in entries)
+                                                     if s is not None}))
+            return state
+        # Ids minted before the allocator existed were random; they are recorded
+        # once, when the sequence file is created
+        state = {"next": {}, "reserved": {}}
+        for kind, ids in (self.seed() if self.seed else {}).items():
+            _add_ranges(state, kind, sorted({s for s in (self._seq(kind, i) for i in ids) if s is not None}))
+        self._write_state(state)
+        return state
+
+    def _write_state(self, state):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as fs:
+            json.dump(state, fs)
+        os.replace(tmp_path, self.path)
+
+    def _file_lock(self):
+        return file_lock(self.lock_path)
+
+
+def _add_ranges(state, kind, seqs):
+    # Merges sorted sequence numbers into the kind's [start, end) ranges
+    nxt = state["next"].get(kind, 0)
+    ranges = [list(r) for r in state["reserved"].get(kind, ())]
+    for seq in seqs:
+        if seq < nxt:
+            continue
+        if ranges and ranges[-1][1] == seq:
+            ranges[-1][1] += 1
+        else:
+            ranges.append([seq, seq + 1])
+    ranges.sort()
+    merged = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    while merged and merged[0][0] <= nxt:
+        nxt = max(nxt, merged.pop(0)[1])
+    if nxt:
+        state["next"][kind] = nxt
+    state["reserved"][kind] = merged
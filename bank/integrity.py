@@ -0,0 +1,210 @@
+"""Ledger integrity: balance chains and transfer pairing, verified incrementally.
+
+    python -m bank check                  # verify what is new since the last run
+    python -m bank check --full --jobs 8  # re-verify every entry
+
+Each entry's running balance must follow from the one before it and its
+amount and type, across archived and hot entries, and the last one must
+match the account balance. Every transfer_out must have a transfer_in in
+the recipient's ledger (same accounts and amount) and vice versa.
+
+verify() keeps a watermark per account in <db>.integrity.json: the ledger
+position verified so far, the timestamp and balance of the entry there, and
+a rolling checksum (each entry's digest chained onto the previous one). A
+run skips accounts whose entry count has not moved (from the header alone),
+checks that the entry at the watermark is unchanged, and verifies only the
+entries after it. --full recomputes every chain and checksum, so an edit
+anywhere in already-verified history shows up as a checksum mismatch.
+Problems found in entries are kept in the state and reported by every run
+until a --full run finds them fixed.
+
+Transfers are paired through net counts per (sender, recipient, amount)
+carried from run to run, so each side is counted once, whenever it is
+verified. Accounts are verified in a process pool; each worker loads only
+its own accounts (sharded books only their shards). A run concurrent with
+writes may see one side of a transfer committed mid-run; the next run pairs
+it.
+"""
+import hashlib
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from bank.archive import archive_root, ledger_entries, transaction_count
+from bank.core import DEBIT_TYPES, Bank
+from bank.sharding import is_sharded, shard_of
+
+VERSION = 1
+# Below this many accounts to verify, a pool costs more than it saves
+POOL_MIN_ACCOUNTS = 256
+
+
+def integrity_path(database):
+    return f"{os.path.normpath(database)}.integrity.json"
+
+
+def _digest(previous, txn):
+    extra = json.dumps(txn.extra, sort_keys=True, separators=(',', ':')) if txn.extra else ""
+    entry = f"{txn.type}|{txn.amount}|{txn.ts}|{txn.balance}|{txn.description}|{extra}".encode()
+    return hashlib.blake2b(previous + entry, digest_size=16).digest()
+
+
+def _pair_key(txn, account_no):
+    # "sender>recipient:amount" of either side of a transfer; None for entries
+    # written before transfers recorded their counterparty
+    if txn.type == 'transfer_out':
+        other = txn.get('to_account')
+        return other and f"{account_no}>{other}:{txn.amount}"
+    other = txn.get('from_account')
+    return other and f"{other}>{account_no}:{txn.amount}"
+
+
+def _verify_account(root, user, mark, full):
+    # -> (new mark, problems, transfer deltas, entries verified); the mark stays
+    # put when the verified prefix itself no longer matches
+    account_no = user['accountNo']
+    hot = user.peek('transactions') or ()
+    count = transaction_count(user)
+    problems = []
+    start = 0 if full or mark is None else mark[0]
+    if start > count:
+        return mark, [f"{account_no}: ledger shrank from {start} to {count} entries since it was verified"], {}, 0
+    if start:
+        known = next(ledger_entries(root, user, start - 1, hot))
+        if [known.ts, known.balance] != mark[1:3]:
+            return mark, [f"{account_no}: entry {start - 1} changed after it was verified"], {}, 0
+        balance, digest = mark[2], bytes.fromhex(mark[3])
+    else:
+        balance, digest = 0, b""
+    pairs = {}
+    position = start
+    last = None
+    for txn in ledger_entries(root, user, start, hot):
+        balance = balance - txn.amount if txn.type in DEBIT_TYPES else balance + txn.amount
+        if txn.balance != balance:
+            problems.append(f"{account_no}: entry {position} ({txn.type}) balance {txn.balance} expected {balance}")
+            balance = txn.balance
+        digest = _digest(digest, txn)
+        if txn.type in ('transfer_out', 'transfer_in'):
+            key = _pair_key(txn, account_no)
+            if key:
+                pairs[key] = pairs.get(key, 0) + (1 if txn.type == 'transfer_out' else -1)
+        position += 1
+        last = txn
+        if full and mark is not None and position == mark[0] and digest.hex() != mark[3]:
+            problems.append(f"{account_no}: entries before {position} changed after they were verified")
+    if balance != user['balance']:
+        problems.append(f"{account_no}: account balance {user['balance']} expected {balance}")
+    ts = last.ts if last is not None else (mark[1] if start else None)
+    return [position, ts, balance, digest.hex()], problems, pairs, position - start
+
+
+def _verify_accounts(database, account_nos, marks, full):
+    # Runs in a pool worker: loads just these accounts and verifies them
+    Bank.database = database
+    wanted = set(account_nos)
+    root = archive_root(database)
+    results = {}
+    for user in Bank._load_data(account_nos):
+        if user['accountNo'] in wanted:
+            results[user['accountNo']] = _verify_account(root, user, marks.get(user['accountNo']), full)
+    return results
+
+
+def _read_state(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as fs:
+            state = json.load(fs)
+        if state.get('version') == VERSION:
+            return state
+    except (OSError, ValueError):
+        pass
+    return {"version": VERSION, "accounts": {}, "pairs": {}, "problems": {}}
+
+
+def _write_state(path, state):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as fs:
+        json.dump(state, fs, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def _chunks(database, account_nos, jobs):
+    # One chunk per shard on a sharded book, so no two workers read the same shard
+    if is_sharded(database):
+        shards = Bank._storage().manifest()['shards']
+        groups = {}
+        for account_no in account_nos:
+            groups.setdefault(shard_of(account_no, shards), []).append(account_no)
+        return list(groups.values())
+    size = max(1, math.ceil(len(account_nos) / (jobs * 4)))
+    return [account_nos[i:i + size] for i in range(0, len(account_nos), size)]
+
+
+def verify(jobs=None, full=False):
+    """Verify the ledgers of Bank.database, resuming from the last run unless
+    `full`; returns a summary dict with the problems found."""
+    database = Bank.database
+    path = integrity_path(database)
+    state = _read_state(path)
+    if full:
+        state['pairs'], state['problems'] = {}, {}
+    marks, known = state['accounts'], state['problems']
+    accounts = Bank._load_data()
+    problems = []
+    todo = []
+    for user in accounts:
+        mark = marks.get(user['accountNo'])
+        if full or mark is None or mark[0] != transaction_count(user):
+            todo.append(user['accountNo'])
+        elif mark[2] != user['balance']:
+            problems.append(f"{user['accountNo']}: account balance {user['balance']} expected {mark[2]}")
+    existing = {user['accountNo'] for user in accounts}
+    for account_no in [a for a in marks if a not in existing]:
+        del marks[account_no]
+        known.pop(account_no, None)
+
+    jobs = jobs or os.cpu_count() or 1
+    todo_marks = {account_no: marks[account_no] for account_no in todo if account_no in marks}
+    if jobs <= 1 or len(todo) < POOL_MIN_ACCOUNTS:
+        batches = [_verify_accounts(database, todo, todo_marks, full)]
+    else:
+        with ProcessPoolExecutor(jobs) as pool:
+            futures = [pool.submit(_verify_accounts, database, chunk, todo_marks, full)
+                       for chunk in _chunks(database, todo, jobs)]
+            batches = [future.result() for future in futures]
+
+    pairs = state['pairs']
+    entries = 0
+    for results in batches:
+        for account_no, (mark, found, deltas, verified) in results.items():
+            entries += verified
+            if mark is not None:
+                marks[account_no] = mark
+            if found:
+                kept = known.setdefault(account_no, [])
+                kept.extend(problem for problem in found if problem not in kept)
+            for key, delta in deltas.items():
+                net = pairs.get(key, 0) + delta
+                if net:
+                    pairs[key] = net
+                else:
+                    pairs.pop(key, None)
+
+    for found in known.values():
+        problems.extend(found)
+    # Unpaired transfers; those whose other side is a deleted account cannot be checked
+    orphaned = 0
+    for key, net in sorted(pairs.items()):
+        sender, _, rest = key.partition(">")
+        recipient, _, amount = rest.partition(":")
+        if sender not in existing or recipient not in existing:
+            orphaned += abs(net)
+        elif net > 0:
+            problems.append(f"{sender}: {net} transfer_out of {amount} to {recipient} without a transfer_in")
+        else:
+            problems.append(f"{recipient}: {-net} transfer_in of {amount} from {sender} without a transfer_out")
+    _write_state(path, state)
+    return {"accounts": len(accounts), "verified_accounts": len(todo), "entries": entries, "orphaned": orphaned,
+            "problems": problems, "full": full}
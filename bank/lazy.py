@@ -0,0 +1,14 @@
+import importlib
+
+
+class LazyModule:
+    # Stands in for a heavy module and imports it on first attribute access,
+    # so `pd = LazyModule("pandas")` costs nothing until a page needs pandas.
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
@@ -0,0 +1,87 @@
+import os
+import random
+import socket
+import time
+from contextlib import contextmanager
+
+# How often a waiter checks whether the holder has died
+STALE_CHECK_INTERVAL = 0.05
+
+
+def _owner(lock_path):
+    try:
+        with open(lock_path, 'r') as fs:
+            return fs.read()
+    except FileNotFoundError:
+        return None
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _stale(lock_path, owner, stale_after):
+    # A holder on this host is checked by pid (POSIX only: os.kill would end the
+    # process on Windows); otherwise a lock untouched for stale_after is abandoned
+    pid, _, rest = owner.partition(":")
+    host = rest.partition(":")[0]
+    if os.name == 'posix' and pid.isdigit() and host == socket.gethostname():
+        return not _alive(int(pid))
+    try:
+        return time.time() - os.path.getmtime(lock_path) > stale_after
+    except FileNotFoundError:
+        return False
+
+
+def _break(lock_path, owner, token):
+    # Moves the lock aside in one step, then checks it is the stale one. If a new
+    # holder took the lock in between, its file is linked back into place (link
+    # never replaces an existing file) before the moved name is dropped.
+    moved = f"{lock_path}.{token.rpartition(':')[2]}.stale"
+    try:
+        os.rename(lock_path, moved)
+    except FileNotFoundError:
+        return
+    if _owner(moved) != owner:
+        try:
+            os.link(moved, lock_path)
+        except OSError:
+            pass
+    os.remove(moved)
+
+
+@contextmanager
+def file_lock(lock_path, stale_after=10):
+    # Cross-process mutex: whoever creates the lock file holds it and writes its
+    # owner token ("pid:host:nonce") into it. A waiter breaks the lock only when
+    # its holder is gone, and a holder removes the file only while it is its own.
+    token = f"{os.getpid()}:{socket.gethostname()}:{random.getrandbits(64):016x}"
+    lock_dir = os.path.dirname(lock_path)
+    if lock_dir:
+        os.makedirs(lock_dir, exist_ok=True)
+    next_check = time.monotonic() + STALE_CHECK_INTERVAL
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if time.monotonic() > next_check:
+                owner = _owner(lock_path)
+                if owner and _stale(lock_path, owner, stale_after):
+                    _break(lock_path, owner, token)
+                next_check = time.monotonic() + STALE_CHECK_INTERVAL
+            time.sleep(0.001)
+            continue
+        with os.fdopen(fd, 'w') as fs:
+            fs.write(token)
+        break
+    try:
+        yield
+    finally:
+        if _owner(lock_path) == token:
+            os.remove(lock_path)
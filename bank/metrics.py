@@ -0,0 +1,222 @@
+"""In-process metrics, exported in the Prometheus text format.
+
+    bank_operation_seconds{op}                 latency histogram of every public Bank call
+    bank_operations_total{op,outcome}          ok, refused (returned a failure) or error (raised)
+    bank_storage_read_bytes_total{part}        index, body or whole-document bytes read
+    bank_storage_written_bytes_total           encoded book bytes handed to storage
+    bank_storage_parse_seconds_total           decoding what was read
+    bank_storage_serialize_seconds_total       encoding what is written
+    bank_account_headers_loaded_total          accounts loaded (header only)
+    bank_account_bodies_loaded_total           of those, bodies faulted in
+    bank_cache_requests_total{cache,result}    hits and misses of in-process caches
+    bank_write_lock_*                          write-lock queueing and conflict re-runs
+
+One registry per process, so a Streamlit or API server reports every
+session it serves. render() produces the exposition text; the API serves it
+at GET /metrics and write_textfile() publishes it for node_exporter's
+textfile collector.
+"""
+import bisect
+import functools
+import os
+import threading
+import time
+
+from bank import tracing
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, labels=()):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def get(self, labels=()):
+        return self.values.get(labels, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self.series = {}  # labels -> [per-bucket counts (last is +Inf), sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, labels=()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def quantile(self, labels, q):
+        # Linear interpolation inside the bucket holding the q-th observation
+        series = self.series.get(labels)
+        if not series or not series[2]:
+            return None
+        rank = q * series[2]
+        seen = 0
+        for index, count in enumerate(series[0]):
+            if count and seen + count >= rank:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        for labels, (counts, total, count) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket
+                lines.append(f"{self.name}_bucket{_labels(names, labels + (_number(bound),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        # Callables returning [(name, type, help, [(labelnames, labels, value), ...])],
+        # read at render time for state kept elsewhere (lock stats, lru caches)
+        self.collectors = []
+
+    def counter(self, name, help_text, labelnames=()):
+        metric = Counter(name, help_text, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labelnames=(), buckets=BUCKETS):
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def collector(self, func):
+        self.collectors.append(func)
+        return func
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        # Collectors may each report part of one family (cache hits per cache)
+        families = {}
+        for collect in self.collectors:
+            for name, kind, help_text, samples in collect():
+                family = families.setdefault(name, (kind, help_text, []))
+                family[2].extend(samples)
+        for name, (kind, help_text, samples) in families.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labelnames, labels, value in samples:
+                lines.append(f"{name}{_labels(labelnames, labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        for metric in self.metrics:
+            with metric._lock:
+                if isinstance(metric, Histogram):
+                    metric.series = {}
+                else:
+                    metric.values = {}
+
+
+REGISTRY = Registry()
+
+operation_seconds = REGISTRY.histogram("bank_operation_seconds", "Latency of public Bank operations.", ("op",))
+operations = REGISTRY.counter("bank_operations_total", "Bank operations by outcome.", ("op", "outcome"))
+read_bytes = REGISTRY.counter("bank_storage_read_bytes_total", "Bytes read from book files.", ("part",))
+written_bytes = REGISTRY.counter("bank_storage_written_bytes_total", "Encoded book bytes written.")
+parse_seconds = REGISTRY.counter("bank_storage_parse_seconds_total", "Time spent decoding book files.")
+serialize_seconds = REGISTRY.counter("bank_storage_serialize_seconds_total", "Time spent encoding book files.")
+headers_loaded = REGISTRY.counter("bank_account_headers_loaded_total", "Accounts loaded from storage.")
+bodies_loaded = REGISTRY.counter("bank_account_bodies_loaded_total", "Account bodies faulted in after loading.")
+
+render = REGISTRY.render
+collector = REGISTRY.collector
+
+
+def timed(name):
+    # Outcome follows the (success, message) convention: a falsy first
+    # element is a refusal, an exception an error
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                with tracing.span("domain", name):
+                    result = func(*args, **kwargs)
+                outcome = "refused" if isinstance(result, tuple) and result and not result[0] else "ok"
+                return result
+            finally:
+                operation_seconds.observe(time.perf_counter() - start, (name,))
+                operations.inc(1, (name, outcome))
+        return wrapper
+    return decorate
+
+
+def instrument(cls):
+    # Class decorator: time every public static method under its own name
+    for name, member in list(vars(cls).items()):
+        if isinstance(member, staticmethod) and not name.startswith('_'):
+            setattr(cls, name, staticmethod(timed(name)(member.__func__)))
+    return cls
+
+
+def summary():
+    # Per-operation rows for dashboards
+    rows = []
+    for (op,), (_, total, count) in sorted(operation_seconds.series.items()):
+        rows.append({"op": op, "calls": count, "ok": operations.get((op, "ok")),
+                     "refused": operations.get((op, "refused")), "errors": operations.get((op, "error")),
+                     "mean_ms": total / count * 1000,
+                     "p50_ms": operation_seconds.quantile((op,), 0.5) * 1000,
+                     "p95_ms": operation_seconds.quantile((op,), 0.95) * 1000})
+    return rows
+
+
+def write_textfile(path):
+    # Atomic, so a collector never scrapes half a file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as fs:
+        fs.write(render())
+    os.replace(tmp_path, path)
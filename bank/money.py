@@ -0,0 +1,26 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+# All money is held as integer paise; rupees appear only when formatting for display
+PAISE = 100
+MAX_DEPOSIT = 50000 * PAISE
+MAX_TRANSFER = 100000 * PAISE
+MIN_LOAN = 10000 * PAISE
+MAX_LOAN = 5000000 * PAISE
+
+
+def to_paise(rupees):
+    return int(Decimal(str(rupees)).scaleb(2).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def format_inr(paise, decimals=0, symbol="₹"):
+    sign = "-" if paise < 0 else ""
+    paise = abs(int(paise))
+    if decimals:
+        rupees, rem = divmod(paise, PAISE)
+        return f"{sign}{symbol}{rupees:,}.{rem:02d}"
+    return f"{sign}{symbol}{(paise + PAISE // 2) // PAISE:,}"
+
+
+def round_half_up(value):
+    # Exact rounding of a Fraction (or int) to the nearest integer
+    return int((value * 2 + 1) // 2)
@@ -0,0 +1,237 @@
+"""Background delivery of OTPs, transaction alerts and EMI reminders.
+
+Callers submit() a Notification and return immediately; worker threads
+drain the queue in batches and hand each batch to a transport, retrying
+with exponential backoff. A transport is anything with send(batch):
+
+    console             print to stdout
+    file:PATH           append JSON lines to PATH, readable by the owner only
+                        (local stand-in for a mail gateway)
+    smtp://HOST:PORT    plain SMTP, e.g. `python -m aiosmtpd -n -l localhost:1025`
+"""
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from bank.money import format_inr
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class PartialDelivery(Exception):
+    # Raised by a transport that sent part of a batch; only the rest is retried
+    def __init__(self, undelivered, cause):
+        super().__init__(f"{len(undelivered)} undelivered: {cause}")
+        self.undelivered = undelivered
+
+
+class Notification:
+    __slots__ = ('kind', 'to', 'subject', 'body', 'created_at')
+
+    def __init__(self, kind, to, subject, body):
+        self.kind = kind
+        self.to = to
+        self.subject = subject
+        self.body = body
+        self.created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self.__slots__}
+
+
+def otp_message(email, otp):
+    return Notification("otp", email, "Your account verification code",
+                        f"Your OTP is {otp}. It is valid for 5 minutes. Do not share it with anyone.")
+
+
+def transaction_alert(user, txn, debit):
+    verb = "debited from" if debit else "credited to"
+    subject = f"{'Debit' if debit else 'Credit'} alert: {format_inr(txn['amount'], 2)}"
+    return Notification("alert", user['email'], subject,
+                        f"{format_inr(txn['amount'], 2)} {verb} account {user['accountNo']} on {txn['date']} "
+                        f"({txn['description']}). Balance: {format_inr(txn['balance'], 2)}")
+
+
+def emi_reminder(user, loan):
+    return Notification("emi_reminder", user['email'], f"EMI due on {loan['next_emi_date']}",
+                        f"Your EMI of {format_inr(loan['emi'], 2)} for {loan['type']} {loan['loan_id']} "
+                        f"is due on {loan['next_emi_date']}. Keep sufficient balance in {user['accountNo']}.")
+
+
+class ConsoleTransport:
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send(self, batch):
+        for msg in batch:
+            print(f"[{msg.kind}] to={msg.to} | {msg.subject} | {msg.body}", file=self.stream)
+        self.stream.flush()
+
+
+class FileTransport:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, batch):
+        lines = "".join(json.dumps(msg.to_dict()) + "\n" for msg in batch)
+        # The file holds OTPs in plain text
+        with self._lock:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            with open(fd, 'a', encoding='utf-8') as fs:
+                fs.write(lines)
+
+
+class SmtpTransport:
+    # One connection per batch instead of per message. A message the server
+    # rejects does not stop the rest; when the connection drops, what was sent
+    # before it is not sent again.
+    def __init__(self, host="localhost", port=1025, sender="noreply@bank.local", timeout=10):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.timeout = timeout
+
+    def send(self, batch):
+        import smtplib
+        from email.message import EmailMessage
+
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        undelivered = []
+        error = None
+        try:
+            for i, msg in enumerate(batch):
+                mail = EmailMessage()
+                mail['From'] = self.sender
+                mail['To'] = msg.to
+                mail['Subject'] = msg.subject
+                mail.set_content(msg.body)
+                try:
+                    smtp.send_message(mail)
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException) as err:
+                    undelivered.append(msg)
+                    error = err
+                except (smtplib.SMTPException, OSError) as err:
+                    raise PartialDelivery(undelivered + batch[i:], err)
+        finally:
+            try:
+                smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                smtp.close()
+        if undelivered:
+            raise PartialDelivery(undelivered, error)
+
+
+def transport_from_spec(spec):
+    if spec == "console":
+        return ConsoleTransport()
+    if spec.startswith("file:"):
+        return FileTransport(spec[len("file:"):])
+    if spec.startswith("smtp://"):
+        host, _, port = spec[len("smtp://"):].partition(":")
+        return SmtpTransport(host or "localhost", int(port or 25))
+    raise ValueError(f"Unknown notification transport: {spec}")
+
+
+class NotificationQueue:
+    def __init__(self, transport, workers=2, batch_size=50, linger=0.05, max_attempts=4, backoff=0.5,
+                 maxsize=10000):
+        self.transport = transport
+        self.batch_size = batch_size
+        # How long a worker waits for more messages before sending a partial batch
+        self.linger = linger
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.queue = queue.Queue(maxsize)
+        self.sent = 0
+        self.failed = deque(maxlen=1000)
+        self._count_lock = threading.Lock()
+        self.accepting = True
+        self._closing = threading.Event()
+        self._threads = [threading.Thread(target=self._worker, name=f"bank-notify-{i}", daemon=True)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, notification):
+        if not self.accepting:
+            return False
+        try:
+            self.queue.put_nowait(notification)
+            return True
+        except queue.Full:
+            logger.warning(f"Notification queue full; dropped {notification.kind} for {notification.to}")
+            return False
+
+    def flush(self, timeout=None):
+        # Wait until everything submitted so far is delivered or given up on
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout=10):
+        self.accepting = False
+        self.flush(timeout)
+        self._closing.set()
+        for _ in self._threads:
+            self.queue.put(_STOP)
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _worker(self):
+        while True:
+            first = self.queue.get()
+            if first is _STOP:
+                self.queue.task_done()
+                return
+            batch = [first]
+            stop = False
+            deadline = time.monotonic() + self.linger
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    msg = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if msg is _STOP:
+                    stop = True
+                    break
+                batch.append(msg)
+            try:
+                self._deliver(batch)
+            finally:
+                for _ in range(len(batch) + stop):
+                    self.queue.task_done()
+            if stop:
+                return
+
+    def _deliver(self, batch):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self.transport.send(batch)
+                with self._count_lock:
+                    self.sent += len(batch)
+                return
+            except Exception as err:
+                if isinstance(err, PartialDelivery):
+                    with self._count_lock:
+                        self.sent += len(batch) - len(err.undelivered)
+                    batch = err.undelivered
+                # Backoff is cut short on close so shutdown never waits out a retry
+                if attempt == self.max_attempts or self._closing.wait(self.backoff * 2 ** (attempt - 1)):
+                    logger.error(f"Notification delivery failed after {attempt} attempts: {err}")
+                    self.failed.extend(batch)
+                    return
@@ -0,0 +1,186 @@
+"""Sampling profiler that can be switched on in a running process.
+
+    python -m bank serve --profile-dir /tmp/profiles    # then: kill -USR2 <pid>
+    Streamlit: Metrics page -> Profile
+
+A background thread samples every thread's Python stack at a fixed interval
+for a fixed window and writes the result when the window ends: collapsed
+stacks (one "frame;frame;frame count" line per stack, for flamegraph.pl or
+speedscope) or, for a .json path, a speedscope document. Frames are labeled
+so flame graphs read at the domain level:
+
+    bank: Bank.transfer_money      public and private Bank methods
+    storage: JsonStorage.save      storage, book, sharding, codec and archive code
+    bank.records: History.append   the rest of the bank package
+    json.encoder: JSONEncoder.encode
+
+Each stack starts with its thread's name in brackets. The metrics and
+tracing wrappers around Bank methods are left out, and by default so are
+samples of threads idling in a wait, select or queue get.
+Nothing runs until a profile is started; only one runs at a time.
+"""
+import json
+import os
+import signal
+import sys
+import threading
+import time
+
+INTERVAL = 0.005
+
+_BANK_DIR = os.path.dirname(os.path.abspath(__file__))
+STORAGE_MODULES = frozenset({"storage", "book", "sharding", "codecs", "archive", "snapshot"})
+# Instrumentation wrappers and thread bootstrap frames add depth, not information
+WRAPPER_MODULES = frozenset({"metrics", "tracing", "threading"})
+IDLE_MODULES = frozenset({"threading", "selectors", "queue", "socket", "ssl"})
+# Leaves that block in C, so the waiting frame is the Python caller
+IDLE_LEAVES = frozenset({"concurrent.futures.thread: _worker"})
+
+
+class Profiler:
+    def __init__(self, interval=INTERVAL, idle=False):
+        self.interval = interval
+        self.idle = idle
+        self.samples = {}  # (thread name, label, ...) -> count
+        self.sample_count = 0
+        self.started = None
+        self.elapsed = 0.0
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, seconds, path=None):
+        self._thread = threading.Thread(target=self._run, args=(seconds, path), name="bank-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def wait(self, timeout=None):
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self, seconds, path):
+        self.started = time.time()
+        start = time.perf_counter()
+        deadline = start + seconds
+        own = threading.get_ident()
+        while not self._stop.is_set() and time.perf_counter() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own:
+                    self._sample(names.get(ident, f"thread-{ident}"), frame)
+            self.sample_count += 1
+            self._stop.wait(self.interval)
+        self.elapsed = time.perf_counter() - start
+        if path:
+            self.write(path)
+
+    def _sample(self, thread_name, frame):
+        stack = []
+        leaf = True
+        while frame is not None:
+            code = frame.f_code
+            label = self._labels.get(code)
+            if label is None:
+                label = self._labels[code] = _label(code, frame.f_globals.get('__name__', ''))
+            if leaf and not self.idle and (label[0] in IDLE_MODULES or label[1] in IDLE_LEAVES):
+                return
+            leaf = False
+            if label[0] not in WRAPPER_MODULES:
+                stack.append(label[1])
+            frame = frame.f_back
+        stack.append(f"[{thread_name}]")
+        key = tuple(reversed(stack))
+        self.samples[key] = self.samples.get(key, 0) + 1
+
+    def collapsed(self):
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in sorted(self.samples.items()))
+
+    def speedscope(self, name="bank"):
+        frames, index = [], {}
+        samples, weights = [], []
+        # Sampling itself stretches the interval, so weigh by the measured tick
+        tick = self.elapsed / self.sample_count if self.sample_count else self.interval
+        for stack, count in sorted(self.samples.items()):
+            ids = []
+            for label in stack:
+                if label not in index:
+                    index[label] = len(frames)
+                    frames.append({"name": label})
+                ids.append(index[label])
+            samples.append(ids)
+            weights.append(count * tick)
+        return {"$schema": "https://www.speedscope.app/file-format-schema.json", "exporter": "bank.profiler",
+                "name": name, "activeProfileIndex": 0, "shared": {"frames": frames},
+                "profiles": [{"type": "sampled", "name": name, "unit": "seconds", "startValue": 0,
+                              "endValue": sum(weights), "samples": samples, "weights": weights}]}
+
+    def write(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as fs:
+            if path.endswith(".json"):
+                json.dump(self.speedscope(f"pid {os.getpid()} at {time.strftime('%Y-%m-%d %H:%M:%S')}"), fs)
+            else:
+                fs.write(self.collapsed())
+        os.replace(tmp_path, path)
+
+
+def _label(code, module_name):
+    # -> (module, label); module decides wrapper/idle filtering
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    name = getattr(code, 'co_qualname', code.co_name)
+    if os.path.dirname(os.path.abspath(code.co_filename)) == _BANK_DIR:
+        if module in STORAGE_MODULES:
+            return module, f"storage: {name}"
+        if module == "core":
+            return module, f"bank: {name}"
+        return module, f"bank.{module}: {name}"
+    return module, f"{module_name or module}: {name}"
+
+
+_lock = threading.Lock()
+_active = None
+last_path = None
+
+
+def start_profile(seconds, path, interval=INTERVAL, idle=False):
+    global _active, last_path
+    with _lock:
+        if _active is not None and _active.running():
+            return False, "A profile is already running."
+        _active = Profiler(interval, idle).start(seconds, path)
+        last_path = path
+    return True, f"Profiling for {seconds:g} s into {path}."
+
+
+def stop_profile():
+    with _lock:
+        if _active is None or not _active.running():
+            return False, "No profile is running."
+        _active.stop()
+    return True, "Profile stopped; writing output."
+
+
+def is_running():
+    return _active is not None and _active.running()
+
+
+def default_path(directory, fmt="speedscope"):
+    suffix = ".speedscope.json" if fmt == "speedscope" else ".folded"
+    return os.path.join(directory, f"profile-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}{suffix}")
+
+
+def install_signal(directory, seconds=30, fmt="speedscope", signum=None):
+    # kill -USR2 <pid> starts a profile; sending it again while one runs is ignored.
+    # Must be called from the main thread; not available on Windows.
+    signum = signum or getattr(signal, "SIGUSR2", None)
+    if signum is None:
+        return False
+    os.makedirs(directory, exist_ok=True)
+    signal.signal(signum, lambda sig, frame: start_profile(seconds, default_path(directory, fmt)))
+    return True
@@ -0,0 +1,496 @@
+import bisect
+import sys
+from datetime import datetime, timedelta
+
+from bank.money import to_paise
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+_EPOCH_ORDINAL = _NAIVE_EPOCH.toordinal()
+_day_cache = {}
+
+
+def to_timestamp(date_str):
+    # Naive local seconds since 1970-01-01; round-trips "%Y-%m-%d %H:%M:%S" exactly
+    day = _day_cache.get(date_str[:10])
+    if day is None:
+        day = datetime(int(date_str[0:4]), int(date_str[5:7]), int(date_str[8:10])).toordinal() - _EPOCH_ORDINAL
+        _day_cache[date_str[:10]] = day
+    return day * 86400 + int(date_str[11:13]) * 3600 + int(date_str[14:16]) * 60 + int(date_str[17:19])
+
+
+def to_datetime(ts):
+    return _NAIVE_EPOCH + timedelta(seconds=ts)
+
+
+def from_timestamp(ts):
+    return to_datetime(ts).strftime(DATE_FORMAT)
+
+
+def now_timestamp():
+    return int((datetime.now() - _NAIVE_EPOCH).total_seconds())
+
+
+class _Record:
+    # Slotted record that still answers the dict protocol the UI and Bank use
+    # (record['key'], .get, .setdefault, 'key' in record). Keys outside FIELDS
+    # live in the optional `extra` dict.
+    __slots__ = ('extra',)
+    FIELDS = ()
+    _FIELD_SET = frozenset()
+
+    def __getitem__(self, key):
+        if key in self._FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in self._FIELD_SET:
+            setattr(self, key, value)
+        elif self.extra is None:
+            self.extra = {key: value}
+        else:
+            self.extra[key] = value
+
+    def __contains__(self, key):
+        if key in self._FIELD_SET:
+            return hasattr(self, key)
+        return bool(self.extra) and key in self.extra
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def keys(self):
+        return list(self.to_dict())
+
+    def to_dict(self):
+        record = {key: getattr(self, key) for key in self.FIELDS if hasattr(self, key)}
+        if self.extra:
+            record.update(self.extra)
+        return record
+
+
+class Transaction(_Record):
+    __slots__ = ('type', 'amount', 'ts', 'balance', 'description')
+    FIELDS = ('type', 'amount', 'ts', 'balance', 'description')
+    _FIELD_SET = frozenset(FIELDS)
+
+    def __init__(self, txn_type, amount, ts, balance, description, extra=None):
+        self.type = sys.intern(txn_type)
+        self.amount = amount
+        self.ts = ts
+        self.balance = balance
+        self.description = sys.intern(description)
+        self.extra = extra or None
+
+    def __getitem__(self, key):
+        if key == 'date':
+            return from_timestamp(self.ts)
+        return _Record.__getitem__(self, key)
+
+    def __setitem__(self, key, value):
+        if key == 'date':
+            self.ts = to_timestamp(value)
+        else:
+            _Record.__setitem__(self, key, value)
+
+    def __contains__(self, key):
+        return key == 'date' or _Record.__contains__(self, key)
+
+    def to_dict(self):
+        record = {"type": self.type, "amount": self.amount, "date": from_timestamp(self.ts),
+                  "balance": self.balance, "description": self.description}
+        if self.extra:
+            record.update(self.extra)
+        return record
+
+    @classmethod
+    def from_dict(cls, record):
+        extra = {k: v for k, v in record.items() if k not in _TXN_JSON_KEYS}
+        return cls(record['type'], record['amount'], to_timestamp(record['date']), record['balance'],
+                   record.get('description', ''), extra)
+
+
+_TXN_JSON_KEYS = frozenset({'type', 'amount', 'date', 'balance', 'description'})
+
+# Absolute ts/balance are kept every HISTORY_CHECKPOINT entries so one entry
+# decodes from the nearest checkpoint instead of from the start
+HISTORY_CHECKPOINT = 64
+
+
+class History:
+    # An account's ledger, stored column-wise:
+    #
+    #   n, every    entry count and checkpoint interval
+    #   types, t    distinct types and one code per entry
+    #   descs, d    distinct descriptions and one code per entry
+    #   ts, db      timestamp and balance deltas (the first against 0)
+    #   tcp, bcp    absolute ts and balance of every `every`-th entry
+    #   amt         {index: amount} where amount != |balance delta|
+    #   x           {index: extra} for entries with extra keys
+    #
+    # A loaded History keeps the columns and decodes entries as they are
+    # read; appends collect in a tail that encode() folds into the columns.
+    # Other in-place edits decode everything into a plain list first.
+    __slots__ = ('_enc', '_tail', '_items')
+
+    def __init__(self, transactions=(), encoded=None):
+        self._enc = encoded
+        self._tail = []
+        self._items = None if encoded is not None else list(transactions)
+
+    @classmethod
+    def from_encoded(cls, encoded):
+        return cls(encoded=encoded)
+
+    def __len__(self):
+        if self._items is not None:
+            return len(self._items)
+        return self._enc['n'] + len(self._tail)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __iter__(self):
+        if self._items is not None:
+            return iter(self._items)
+        return self._iter_encoded()
+
+    def _iter_encoded(self):
+        yield from self._walk(0, self._enc['n'])
+        yield from self._tail
+
+    def __reversed__(self):
+        return reversed(self._materialize())
+
+    def __getitem__(self, index):
+        if self._items is not None:
+            return self._items[index]
+        n = self._enc['n']
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return list(self)[index]
+            stop = max(start, stop)
+            return self._decode(start, min(stop, n)) + self._tail[max(0, start - n):max(0, stop - n)]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("history index out of range")
+        return self._decode(index, index + 1)[0] if index < n else self._tail[index - n]
+
+    def _decode(self, start, stop):
+        return list(self._walk(start, stop)) if start < stop else []
+
+    def _walk(self, start, stop):
+        if start >= stop:
+            return
+        enc = self._enc
+        every = enc['every']
+        types, descs, t_codes, d_codes = enc['types'], enc['descs'], enc['t'], enc['d']
+        ts_deltas, bal_deltas = enc['ts'], enc['db']
+        amounts, extras = enc.get('amt') or {}, enc.get('x') or {}
+        block = start // every
+        i = block * every
+        ts, balance = enc['tcp'][block], enc['bcp'][block]
+        while True:
+            if i >= start:
+                amount = amounts.get(str(i)) if amounts else None
+                extra = extras.get(str(i)) if extras else None
+                yield Transaction(types[t_codes[i]], abs(bal_deltas[i]) if amount is None else amount,
+                                  ts, balance, descs[d_codes[i]], extra and dict(extra))
+            i += 1
+            if i >= stop:
+                return
+            ts += ts_deltas[i]
+            balance += bal_deltas[i]
+
+    def points(self, start_ts=None, end_ts=None):
+        # (timestamps, balances) of the entries in range, read straight from
+        # the columns; checkpoint blocks ending before start_ts are skipped
+        stamps, balances = [], []
+        entries = self._items
+        if entries is None:
+            enc = self._enc
+            n = enc['n']
+            if n:
+                every, ts_deltas, bal_deltas = enc['every'], enc['ts'], enc['db']
+                block = 0 if start_ts is None else max(0, bisect.bisect_left(enc['tcp'], start_ts) - 1)
+                i = block * every
+                ts, balance = enc['tcp'][block], enc['bcp'][block]
+                while end_ts is None or ts <= end_ts:
+                    if start_ts is None or ts >= start_ts:
+                        stamps.append(ts)
+                        balances.append(balance)
+                    i += 1
+                    if i >= n:
+                        break
+                    ts += ts_deltas[i]
+                    balance += bal_deltas[i]
+            entries = self._tail
+        for txn in entries:
+            if (start_ts is None or txn.ts >= start_ts) and (end_ts is None or txn.ts <= end_ts):
+                stamps.append(txn.ts)
+                balances.append(txn.balance)
+        return stamps, balances
+
+    def type_counts(self, start=0):
+        # {type: entries} from index `start` on, counted on the type codes
+        counts = {}
+        entries = self._items
+        if entries is None:
+            enc = self._enc
+            if start < enc['n']:
+                names = enc['types']
+                for code in enc['t'][start:]:
+                    name = names[code]
+                    counts[name] = counts.get(name, 0) + 1
+            entries, start = self._tail, max(0, start - enc['n'])
+        for txn in entries[start:]:
+            counts[txn.type] = counts.get(txn.type, 0) + 1
+        return counts
+
+    def _materialize(self):
+        if self._items is None:
+            self._items = self._decode(0, self._enc['n']) + self._tail
+            self._enc = None
+            self._tail = []
+        return self._items
+
+    def append(self, txn):
+        if self._items is not None:
+            self._items.append(txn)
+        else:
+            self._tail.append(txn)
+
+    def extend(self, transactions):
+        for txn in transactions:
+            self.append(txn)
+
+    def __setitem__(self, index, value):
+        self._materialize()[index] = value
+
+    def __delitem__(self, index):
+        del self._materialize()[index]
+
+    def insert(self, index, txn):
+        self._materialize().insert(index, txn)
+
+    def pop(self, index=-1):
+        return self._materialize().pop(index)
+
+    def __eq__(self, other):
+        if isinstance(other, (History, list)):
+            return len(self) == len(other) and all(a.to_dict() == b.to_dict() for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return f"History({len(self)} entries)"
+
+    def encode(self):
+        if self._items is not None:
+            self._enc = _empty_history()
+            self._tail = self._items
+            self._items = None
+        enc = self._enc
+        if self._tail:
+            every = enc['every']
+            types = {name: code for code, name in enumerate(enc['types'])}
+            descs = {text: code for code, text in enumerate(enc['descs'])}
+            amounts = enc.setdefault('amt', {})
+            extras = enc.setdefault('x', {})
+            i = enc['n']
+            ts, balance = enc['last']
+            for txn in self._tail:
+                code = types.get(txn.type)
+                if code is None:
+                    code = types[txn.type] = len(enc['types'])
+                    enc['types'].append(txn.type)
+                enc['t'].append(code)
+                code = descs.get(txn.description)
+                if code is None:
+                    code = descs[txn.description] = len(enc['descs'])
+                    enc['descs'].append(txn.description)
+                enc['d'].append(code)
+                enc['ts'].append(txn.ts - ts)
+                enc['db'].append(txn.balance - balance)
+                if txn.amount != abs(txn.balance - balance):
+                    amounts[str(i)] = txn.amount
+                if txn.extra:
+                    extras[str(i)] = txn.extra
+                if i % every == 0:
+                    enc['tcp'].append(txn.ts)
+                    enc['bcp'].append(txn.balance)
+                ts, balance = txn.ts, txn.balance
+                i += 1
+            enc['n'] = i
+            enc['last'] = [ts, balance]
+            self._tail = []
+        return enc
+
+
+def _empty_history():
+    return {"n": 0, "every": HISTORY_CHECKPOINT, "types": [], "descs": [], "t": [], "d": [], "ts": [], "db": [],
+            "tcp": [], "bcp": [], "amt": {}, "x": {}, "last": [0, 0]}
+
+
+class Account(_Record):
+    FIELDS = ('name', 'age', 'email', 'mobile', 'address', 'pin', 'accountNo', 'balance', 'created_at',
+              'transactions', 'virtual_card', 'savings_goals', 'beneficiaries', 'loans', 'bills')
+    __slots__ = FIELDS + ('_body',)
+    _FIELD_SET = frozenset(FIELDS)
+
+    def __init__(self, **fields):
+        self.extra = None
+        self._body = None
+        for key, value in fields.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, record):
+        if record.get('money_unit') != 'paise':
+            record = _migrate_to_paise(record)
+        account = cls(**record)
+        account.transactions = _history(record.get('transactions', []))
+        return account
+
+    @classmethod
+    def from_header(cls, header, body):
+        # Account whose BODY_FIELDS are read from `body` (a LazyBody) on first access
+        account = cls(**header)
+        account._body = body
+        return account
+
+    def __getattr__(self, name):
+        # Only reached for unset slots
+        if name in _BODY_SET and self._body is not None:
+            self.load_body()
+            return object.__getattribute__(self, name)
+        raise AttributeError(name)
+
+    def __contains__(self, key):
+        if key in _BODY_SET and self._body is not None:
+            return key in self._body.counts
+        return _Record.__contains__(self, key)
+
+    def load_body(self):
+        body, self._body = self._body, None
+        if body is not None:
+            for key, value in body.read().items():
+                setattr(self, key, _history(value) if key == 'transactions' else value)
+
+    def peek(self, collection):
+        # A body collection read without keeping the body loaded, for bulk scans
+        if self._body is None:
+            return self.get(collection)
+        value = self._body.read().get(collection, [])
+        return _history(value) if collection == 'transactions' else value
+
+    @property
+    def body_loaded(self):
+        return self._body is None
+
+    def size(self, collection):
+        # Entry count of a sub-collection without faulting the body in
+        if self._body is not None and collection in _BODY_SET:
+            return self._body.counts.get(collection, 0)
+        return len(self.get(collection) or ())
+
+    def header(self):
+        record = {key: getattr(self, key) for key in HEADER_FIELDS if hasattr(self, key)}
+        if self.extra:
+            record.update(self.extra)
+        return record
+
+    def body(self):
+        body = {key: getattr(self, key) for key in BODY_FIELDS if key in self}
+        if 'transactions' in body:
+            body['transactions'] = _history(body['transactions'])
+        return body
+
+
+# Sub-collections a paged book stores apart from the account header
+BODY_FIELDS = ('transactions', 'savings_goals', 'beneficiaries', 'loans', 'bills')
+_BODY_SET = frozenset(BODY_FIELDS)
+HEADER_FIELDS = tuple(key for key in Account.FIELDS if key not in _BODY_SET)
+
+
+def _history(transactions):
+    if isinstance(transactions, History):
+        return transactions
+    if isinstance(transactions, dict):
+        return History.from_encoded(transactions)
+    return History(t if isinstance(t, Transaction) else Transaction.from_dict(t) for t in transactions)
+
+
+# Money fields per sub-collection, for converting rupee-valued legacy records
+_MONEY_FIELDS = {
+    'transactions': ('amount', 'balance'),
+    'loans': ('principal', 'emi', 'total_amount', 'total_interest', 'outstanding'),
+    'bills': ('amount',),
+    'savings_goals': ('target_amount', 'current_amount'),
+    'card_holds': ('amount',),
+}
+
+
+def _migrate_to_paise(record):
+    record = dict(record)
+    record['balance'] = to_paise(record.get('balance', 0))
+    for collection, fields in _MONEY_FIELDS.items():
+        items = []
+        for item in record.get(collection, []):
+            item = dict(item)
+            for field in fields:
+                if field in item:
+                    item[field] = to_paise(item[field])
+            items.append(item)
+        if collection in record:
+            record[collection] = items
+
+    for goal in record.get('savings_goals', []):
+        sweep = goal.get('sweep')
+        if sweep and sweep['mode'] != 'percent':
+            goal['sweep'] = dict(sweep, value=to_paise(sweep['value']))
+    inline = record.get('inline_sweeps')
+    if inline:
+        record['inline_sweeps'] = {goal_id: rule if rule['mode'] == 'percent' else dict(rule, value=to_paise(rule['value']))
+                                   for goal_id, rule in inline.items()}
+    record['money_unit'] = 'paise'
+    return record
+
+
+def record_to_json(obj):
+    if isinstance(obj, _Record):
+        return obj.to_dict()
+    if isinstance(obj, History):
+        return [txn.to_dict() for txn in obj]
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def record_to_storage(obj):
+    # The stored book keeps ledgers column-encoded; exports and API responses
+    # use record_to_json and get plain entries
+    if isinstance(obj, Account):
+        record = obj.to_dict()
+        transactions = record.get('transactions')
+        if transactions is not None:
+            if not isinstance(transactions, History):
+                transactions = History(transactions)
+            record['transactions'] = transactions.encode()
+        return record
+    if isinstance(obj, History):
+        return obj.encode()
+    return record_to_json(obj)
@@ -0,0 +1,268 @@
+"""Sharded storage: the book split across per-shard JSON files.
+
+    bankdata/
+        manifest.json        {"shards": 16, "generation": 3, "dir": "gen-3"}
+        gen-3/shard-0000.json ...
+        commit.seq           bumped after every commit
+        commit.journal       present only while a multi-shard commit is applied
+
+An account lives in shard crc32(accountNo) % shards, so an operation reads
+and rewrites only the shards of the accounts it involves. A shard write is a
+temp file plus rename. A commit that spans shards (a cross-shard transfer)
+first writes every temp file, then a journal that lists the renames, and only
+then applies them. A crash after that point is rolled forward on the next
+load, so the commit is all-or-nothing.
+"""
+import json
+import logging
+import os
+import random
+import shutil
+import zlib
+
+from bank.book import BookFile, encode_book
+from bank.codecs import Codec
+from bank.locks import file_lock
+from bank.storage import StorageConflict, file_version
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+JOURNAL = "commit.journal"
+SEQ = "commit.seq"
+
+
+def shard_of(account_no, shards):
+    return zlib.crc32(account_no.encode()) % shards
+
+
+def is_sharded(path):
+    return os.path.isfile(os.path.join(path, MANIFEST))
+
+
+class ShardSet(list):
+    # The accounts of the shards one operation loaded; saving it rewrites
+    # exactly those shards (plus any a new account hashes to). versions holds
+    # the file identity each shard was read at, for conflict detection.
+    def __init__(self, accounts, versions, generation):
+        super().__init__(accounts)
+        self.versions = versions
+        self.shards = frozenset(versions)
+        self.generation = generation
+
+
+class ShardedStorage:
+    # Shard files are paged books (bank.book) in the configured codec;
+    # manifest, journal and sequence stay plain JSON
+    def __init__(self, path, codec="auto"):
+        self.path = path
+        self.codec = Codec(codec)
+        self.lock_path = os.path.join(path, ".lock")
+
+    @staticmethod
+    def create(path, accounts=(), shards=16, codec="auto"):
+        os.makedirs(path, exist_ok=True)
+        if is_sharded(path):
+            raise ValueError(f"{path} already holds a sharded book")
+        storage = ShardedStorage(path, codec)
+        manifest = {"shards": shards, "generation": 1, "dir": "gen-1"}
+        storage._write_generation(manifest, accounts)
+        _write_json(os.path.join(path, MANIFEST), manifest)
+        return storage
+
+    def manifest(self):
+        with open(os.path.join(self.path, MANIFEST), 'r', encoding='utf-8') as fs:
+            return json.load(fs)
+
+    def _shard_path(self, manifest, index):
+        return os.path.join(self.path, manifest['dir'], f"shard-{index:04d}.json")
+
+    def _read_shard(self, manifest, index, versions=None):
+        book = BookFile(self._shard_path(manifest, index))
+        if versions is not None:
+            versions[index] = file_version(book.stat())
+        return book.accounts()
+
+    def _seq(self):
+        try:
+            with open(os.path.join(self.path, SEQ), 'r') as fs:
+                return int(fs.read() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def load(self, account_nos=None):
+        try:
+            for _ in range(5):
+                self._recover()
+                seq = self._seq()
+                manifest = self.manifest()
+                indexes = self._indexes(manifest, account_nos)
+                versions = {}
+                try:
+                    accounts = [u for index in indexes for u in self._read_shard(manifest, index, versions)]
+                except FileNotFoundError:
+                    continue  # a reshard retired this generation mid-read
+                # Each shard file is replaced atomically; a read spanning shards
+                # is retried if a commit or reshard landed while it was running.
+                if manifest == self.manifest() and (len(indexes) <= 1 or (
+                        seq == self._seq() and not os.path.exists(os.path.join(self.path, JOURNAL)))):
+                    return ShardSet(accounts, versions, manifest['generation'])
+            with file_lock(self.lock_path):
+                manifest = self.manifest()
+                versions = {}
+                accounts = [u for index in self._indexes(manifest, account_nos)
+                            for u in self._read_shard(manifest, index, versions)]
+                return ShardSet(accounts, versions, manifest['generation'])
+        except Exception as err:
+            logger.error(f"Error loading data: {err}")
+            # Generation None never matches, so saving this empty set cannot wipe shards
+            return ShardSet([], {}, None)
+
+    @staticmethod
+    def _indexes(manifest, account_nos):
+        if account_nos is None:
+            return range(manifest['shards'])
+        return sorted({shard_of(a, manifest['shards']) for a in account_nos})
+
+    def save(self, data):
+        try:
+            with file_lock(self.lock_path):
+                # A commit interrupted after its journal must land before this
+                # one is checked against the shards, or it would be overwritten
+                self._roll_forward()
+                manifest = self.manifest()
+                if isinstance(data, ShardSet):
+                    if data.generation is None:
+                        return False
+                    # Optimistic concurrency: every shard read must be unchanged
+                    if data.generation != manifest['generation'] or any(
+                            file_version(os.stat(self._shard_path(manifest, index))) != version
+                            for index, version in data.versions.items()):
+                        raise StorageConflict(self.path)
+
+                # A plain list is a whole book and replaces every shard
+                loaded = data.shards if isinstance(data, ShardSet) else frozenset(range(manifest['shards']))
+                groups = {index: [] for index in loaded}
+                for user in data:
+                    groups.setdefault(shard_of(user['accountNo'], manifest['shards']), []).append(user)
+                for index in groups.keys() - loaded:
+                    # A shard the operation never read: merge rather than overwrite
+                    incoming = {u['accountNo']: u for u in groups[index]}
+                    kept = [u for u in self._read_shard(manifest, index) if u['accountNo'] not in incoming]
+                    groups[index] = kept + list(incoming.values())
+
+                self._commit({self._shard_path(manifest, index): accounts for index, accounts in groups.items()})
+            return True
+        except StorageConflict:
+            raise
+        except Exception as err:
+            logger.error(f"Error saving data: {err}")
+            return False
+
+    def _commit(self, writes):
+        renames = []
+        for path, accounts in writes.items():
+            tmp_path = _tmp_path(path)
+            with open(tmp_path, 'wb') as fs:
+                fs.write(encode_book(accounts, self.codec))
+                fs.flush()
+                os.fsync(fs.fileno())
+            renames.append([tmp_path, path])
+
+        journal = os.path.join(self.path, JOURNAL)
+        if len(renames) > 1:
+            # Commit point: once the journal exists the renames will happen
+            _write_json(journal, renames, sync=True)
+        for tmp_path, path in renames:
+            os.replace(tmp_path, path)
+        # Bumped before the journal goes, so an overlapping reader sees one or the other
+        _write_json(os.path.join(self.path, SEQ), self._seq() + 1)
+        if len(renames) > 1:
+            os.remove(journal)
+
+    def _recover(self):
+        journal = os.path.join(self.path, JOURNAL)
+        if not os.path.exists(journal):
+            return
+        with file_lock(self.lock_path):
+            self._roll_forward()
+
+    def _roll_forward(self):
+        # Caller holds the lock
+        journal = os.path.join(self.path, JOURNAL)
+        if not os.path.exists(journal):
+            return
+        with open(journal, 'r', encoding='utf-8') as fs:
+            renames = json.load(fs)
+        for tmp_path, path in renames:
+            if os.path.exists(tmp_path):
+                os.replace(tmp_path, path)
+        _write_json(os.path.join(self.path, SEQ), self._seq() + 1)
+        os.remove(journal)
+        logger.warning("Completed an interrupted multi-shard commit.")
+
+    def _write_generation(self, manifest, accounts):
+        groups = {index: [] for index in range(manifest['shards'])}
+        for user in accounts:
+            groups[shard_of(user['accountNo'], manifest['shards'])].append(user)
+        os.makedirs(os.path.join(self.path, manifest['dir']), exist_ok=True)
+        for index, members in groups.items():
+            _write_bytes(self._shard_path(manifest, index), encode_book(members, self.codec), sync=True)
+
+    def reshard(self, shards, attempts=3):
+        # Online: the new generation is built from a snapshot without blocking
+        # writers and published only if no commit landed in the meantime.
+        # Readers switch over when they next read the manifest.
+        for _ in range(attempts):
+            self._recover()
+            seq, old = self._seq(), self.manifest()
+            new = self._next_generation(old, shards)
+            count = self._build(old, new)
+            with file_lock(self.lock_path):
+                self._roll_forward()
+                if seq == self._seq() and old == self.manifest():
+                    self._publish(old, new)
+                    return count
+            shutil.rmtree(os.path.join(self.path, new['dir']), ignore_errors=True)
+        # Writers kept winning the race; finish while holding them off
+        with file_lock(self.lock_path):
+            self._roll_forward()
+            old = self.manifest()
+            new = self._next_generation(old, shards)
+            count = self._build(old, new)
+            self._publish(old, new)
+            return count
+
+    @staticmethod
+    def _next_generation(old, shards):
+        generation = old['generation'] + 1
+        return {"shards": shards, "generation": generation, "dir": f"gen-{generation}"}
+
+    def _build(self, old, new):
+        accounts = [u for index in range(old['shards']) for u in self._read_shard(old, index)]
+        shutil.rmtree(os.path.join(self.path, new['dir']), ignore_errors=True)
+        self._write_generation(new, accounts)
+        return len(accounts)
+
+    def _publish(self, old, new):
+        _write_json(os.path.join(self.path, MANIFEST), new, sync=True)
+        shutil.rmtree(os.path.join(self.path, old['dir']), ignore_errors=True)
+
+
+def _write_json(path, value, sync=False):
+    _write_bytes(path, json.dumps(value, indent=2).encode(), sync)
+
+
+def _tmp_path(path):
+    # Unique per writer, so no writer can clobber a temp file a journal still names
+    return f"{path}.{os.getpid()}-{random.getrandbits(32):08x}.tmp"
+
+
+def _write_bytes(path, raw, sync=False):
+    tmp_path = _tmp_path(path)
+    with open(tmp_path, 'wb') as fs:
+        fs.write(raw)
+        if sync:
+            fs.flush()
+            os.fsync(fs.fileno())
+    os.replace(tmp_path, path)
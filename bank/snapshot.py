@@ -0,0 +1,190 @@
+"""Read-only binary snapshots of the book for reporting processes.
+
+A snapshot is one file with a fixed layout (little-endian):
+
+    header      64 bytes: magic, version, account count, transaction count,
+                created_at, offset/length of the type table
+    accounts    sorted by accountNo, 40 bytes each:
+                accountNo (10s), pad, balance (q), first txn (Q), txn count (Q)
+    columns     ts[q], amount[q], balance[q], account[I], type[B], each
+                n_txns long and 8-byte aligned, ordered by account then ledger
+    types       JSON list mapping type codes to names
+
+It is written to a temp file and renamed into place, so a reader always maps
+a complete snapshot. SnapshotReader opens it with mmap and exposes the
+columns as memoryviews over the mapping: nothing is parsed or copied, so
+every worker on the host shares one page-cache copy and starts instantly.
+The columns can be handed to numpy.frombuffer without copying as well.
+"""
+import json
+import mmap
+import os
+import struct
+import time
+from array import array
+from bisect import bisect_left
+
+MAGIC = b"BNKSNAP1"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQQQQ8x")
+ACCOUNT = struct.Struct("<10s6xqQQ")
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _layout(n_accounts, n_txns):
+    offsets = {}
+    offset = HEADER.size + n_accounts * ACCOUNT.size
+    for name, width in (("ts", 8), ("amount", 8), ("balance", 8), ("account", 4), ("type", 1)):
+        offset = _align(offset)
+        offsets[name] = offset
+        offset += n_txns * width
+    return offsets, _align(offset)
+
+
+def write_snapshot(path, data, transactions_of):
+    # transactions_of(user) yields the full ledger of one account (both tiers)
+    users = sorted(data, key=lambda u: u['accountNo'])
+    types = {}
+    cols = {"ts": array('q'), "amount": array('q'), "balance": array('q'), "account": array('I'),
+            "type": array('B')}
+    accounts = bytearray()
+    for index, user in enumerate(users):
+        start = len(cols["ts"])
+        for txn in transactions_of(user):
+            cols["ts"].append(txn.ts)
+            cols["amount"].append(txn.amount)
+            cols["balance"].append(txn.balance)
+            cols["account"].append(index)
+            cols["type"].append(types.setdefault(txn.type, len(types)))
+        accounts += ACCOUNT.pack(user['accountNo'].encode(), user['balance'], start, len(cols["ts"]) - start)
+
+    n_txns = len(cols["ts"])
+    offsets, types_off = _layout(len(users), n_txns)
+    type_table = json.dumps(list(types)).encode()
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as fs:
+        fs.write(HEADER.pack(MAGIC, VERSION, 0, len(users), n_txns, int(time.time()), types_off,
+                             len(type_table)))
+        fs.write(accounts)
+        for name, offset in offsets.items():
+            fs.write(b"\0" * (offset - fs.tell()))
+            fs.write(cols[name].tobytes())
+        fs.write(b"\0" * (types_off - fs.tell()))
+        fs.write(type_table)
+        fs.flush()
+        os.fsync(fs.fileno())
+    os.replace(tmp_path, path)
+    return len(users), n_txns
+
+
+class SnapshotReader:
+    def __init__(self, path):
+        self.path = path
+        self._mm = None
+        self._open()
+
+    def _open(self):
+        with open(self.path, 'rb') as fs:
+            self._ino = os.fstat(fs.fileno()).st_ino
+            self._mm = mmap.mmap(fs.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.n_accounts, self.n_txns, self.created_at, types_off, types_len = \
+            HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"{self.path} is not a version {VERSION} bank snapshot")
+        self.types = json.loads(self._mm[types_off:types_off + types_len])
+
+        offsets, _ = _layout(self.n_accounts, self.n_txns)
+        self._view = memoryview(self._mm)
+        n = self.n_txns
+        self.ts = self._view[offsets["ts"]:offsets["ts"] + 8 * n].cast('q')
+        self.amount = self._view[offsets["amount"]:offsets["amount"] + 8 * n].cast('q')
+        self.balance = self._view[offsets["balance"]:offsets["balance"] + 8 * n].cast('q')
+        self.account = self._view[offsets["account"]:offsets["account"] + 4 * n].cast('I')
+        self.type = self._view[offsets["type"]:offsets["type"] + n]
+
+    def close(self):
+        if self._mm is not None:
+            for view in (self.ts, self.amount, self.balance, self.account, self.type, self._view):
+                view.release()
+            self._mm.close()
+            self._mm = None
+
+    def refresh(self):
+        # Pick up a newly published snapshot; the old mapping stays valid until now
+        try:
+            changed = os.stat(self.path).st_ino != self._ino
+        except FileNotFoundError:
+            return False
+        if changed:
+            self.close()
+            self._open()
+        return changed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.n_accounts
+
+    def _account(self, index):
+        account_no, balance, start, count = ACCOUNT.unpack_from(self._mm, HEADER.size + index * ACCOUNT.size)
+        return account_no.rstrip(b"\0").decode(), balance, start, count
+
+    def account_numbers(self):
+        return _AccountKeys(self)
+
+    def find(self, account_no):
+        keys = _AccountKeys(self)
+        index = bisect_left(keys, account_no)
+        if index < self.n_accounts and keys[index] == account_no:
+            return index
+        return None
+
+    def accounts(self):
+        for index in range(self.n_accounts):
+            yield self._account(index)
+
+    def balance_of(self, account_no):
+        index = self.find(account_no)
+        return None if index is None else self._account(index)[1]
+
+    def transactions(self, account_no):
+        # (ts, type, amount, balance) rows straight from the columns
+        index = self.find(account_no)
+        if index is None:
+            return []
+        _, _, start, count = self._account(index)
+        return [(self.ts[i], self.types[self.type[i]], self.amount[i], self.balance[i])
+                for i in range(start, start + count)]
+
+    def total_balance(self):
+        return sum(self._account(index)[1] for index in range(self.n_accounts))
+
+    def type_totals(self):
+        counts = [0] * len(self.types)
+        sums = [0] * len(self.types)
+        for code, amount in zip(self.type, self.amount):
+            counts[code] += 1
+            sums[code] += amount
+        return {name: {"count": counts[code], "amount": sums[code]} for code, name in enumerate(self.types)}
+
+
+class _AccountKeys:
+    # Sequence view of the sorted account numbers, for bisect
+    def __init__(self, reader):
+        self.reader = reader
+
+    def __len__(self):
+        return self.reader.n_accounts
+
+    def __getitem__(self, index):
+        offset = HEADER.size + index * ACCOUNT.size
+        return bytes(self.reader._mm[offset:offset + 10]).rstrip(b"\0").decode()
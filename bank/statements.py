@@ -0,0 +1,73 @@
+from datetime import datetime
+from io import BytesIO
+
+from bank import tracing
+from bank.core import DEBIT_TYPES
+from bank.money import format_inr
+
+
+@tracing.traced("pdf")
+def render_statement_pdf(user, transactions, start_date=None, end_date=None):
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    elements = []
+
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=24,
+                                 textColor=colors.HexColor('#667eea'), spaceAfter=30,
+                                 alignment=TA_CENTER, fontName='Helvetica-Bold')
+
+    elements.append(Paragraph("BANK STATEMENT", title_style))
+    elements.append(Spacer(1, 0.3 * inch))
+
+    account_info = [
+        ['Account Holder:', user['name']],
+        ['Account Number:', user['accountNo']],
+        ['Email:', user['email']],
+        ['Mobile:', user.get('mobile', 'N/A')],
+        ['Address:', user.get('address', 'N/A')],
+        ['Balance:', format_inr(user['balance'], 2, "Rs.")],
+        ['Date:', datetime.now().strftime("%Y-%m-%d")],
+    ]
+
+    info_table = Table(account_info, colWidths=[2 * inch, 4 * inch])
+    info_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f0f0f0')),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
+    ]))
+
+    elements.append(info_table)
+    elements.append(Spacer(1, 0.5 * inch))
+
+    if transactions:
+        txn_data = [['Date', 'Type', 'Amount', 'Balance']]
+        for txn in reversed(transactions):
+            txn_type = txn['type'].replace('_', ' ').title()
+            amount_str = format_inr(txn['amount'], 2, "Rs.")
+            if txn['type'] in DEBIT_TYPES:
+                amount_str = f"-{amount_str}"
+            else:
+                amount_str = f"+{amount_str}"
+            txn_data.append([txn['date'], txn_type, amount_str, format_inr(txn['balance'], 2, "Rs.")])
+
+        txn_table = Table(txn_data, colWidths=[2 * inch, 1.5 * inch, 1.5 * inch, 1.5 * inch])
+        txn_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#667eea')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ]))
+        elements.append(txn_table)
+
+    doc.build(elements)
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,103 @@
+import logging
+import os
+
+from bank.book import BookFile, encode_book
+from bank.codecs import CORRUPT_ERRORS, Codec, MissingCodec
+from bank.locks import file_lock
+
+logger = logging.getLogger(__name__)
+
+
+class StorageConflict(Exception):
+    # Another writer committed to the data an operation read; re-run it
+    pass
+
+
+def file_version(stat):
+    # Books are only ever replaced, so inode plus mtime identifies a version
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+# Version of a book that failed to load; saving it is refused
+UNREADABLE = ("unreadable",)
+
+
+class Book(list):
+    # The accounts one operation loaded and the file version they were read
+    # at (None: no file yet). Saving it fails with StorageConflict if another
+    # writer replaced the file in between.
+    def __init__(self, accounts, version):
+        super().__init__(accounts)
+        self.version = version
+
+
+class JsonStorage:
+    # The whole book in one file, paged (bank.book) and encoded with the
+    # configured codec (bank.codecs). Problems are logged rather than raised
+    # so callers keep the (success, message) contract.
+    def __init__(self, path, codec="auto"):
+        self.path = path
+        self.codec = Codec(codec)
+        self.read_only = False
+
+    def load(self, account_nos=None):
+        # The single file always yields the whole book; account_nos is a hint
+        # that only sharded storage can use
+        try:
+            if os.path.exists(self.path):
+                book = BookFile(self.path)
+                version = file_version(book.stat())
+                return Book(book.accounts(), version)
+            return Book([], None)
+        except MissingCodec as err:
+            # Never let a save replace a book this process cannot read
+            self.read_only = True
+            logger.error(f"Error loading data: {err}")
+            return Book([], UNREADABLE)
+        except FileNotFoundError:
+            return Book([], None)
+        except CORRUPT_ERRORS:
+            logger.warning("⚠️ Data file corrupted. Creating new database...")
+            if os.path.exists(self.path):
+                os.replace(self.path, f"{self.path}.backup")
+            return Book([], None)
+        except Exception as err:
+            logger.error(f"Error loading data: {err}")
+            return Book([], UNREADABLE)
+
+    def _version(self):
+        try:
+            return file_version(os.stat(self.path))
+        except FileNotFoundError:
+            return None
+
+    def save(self, data):
+        if self.read_only:
+            logger.error("Refusing to overwrite a data file this process cannot decode.")
+            return False
+        try:
+            db_dir = os.path.dirname(self.path)
+            if db_dir and not os.path.exists(db_dir):
+                os.makedirs(db_dir, exist_ok=True)
+            with file_lock(f"{self.path}.lock"):
+                # Optimistic concurrency across processes; a plain list is a
+                # whole new book and is written as is
+                if isinstance(data, Book):
+                    if data.version == UNREADABLE:
+                        return False
+                    if self._version() != data.version:
+                        raise StorageConflict(self.path)
+                # Replaced by rename: accounts loaded lazily still read their
+                # bodies from the version they were loaded from
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'wb') as fs:
+                    fs.write(encode_book(data, self.codec))
+                os.replace(tmp_path, self.path)
+                if isinstance(data, Book):
+                    data.version = self._version()
+            return True
+        except StorageConflict:
+            raise
+        except Exception as err:
+            logger.error(f"Error saving data: {err}")
+            return False
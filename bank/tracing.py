@@ -0,0 +1,174 @@
+"""Opt-in tracing of Streamlit reruns.
+
+    BANK_TRACE=traces.jsonl streamlit run bank_management_system.py
+    python -m bank traces --file traces.jsonl
+
+Every rerun of the app's main() becomes one JSON line: the page, its wall
+time, the time spent in each phase and the spans behind them, aggregated by
+(phase, name) so a page that faults in thousands of bodies still writes one
+short line. The phases are
+
+    load     reading the book or faulting in an account body
+    save     writing the book
+    domain   Bank operations, minus the load and save inside them
+    chart    building Plotly figures
+    pdf      rendering statements
+    render   the rest of the rerun: Streamlit widgets, tables, sending the page
+
+Phase times are exclusive (nested spans are subtracted from their parent),
+so they add up to the rerun's wall time. Spans are kept per thread, which is
+how Streamlit runs each session's script; outside a traced rerun a span costs
+one attribute lookup.
+"""
+import functools
+import json
+import threading
+import time
+from datetime import datetime
+
+PHASES = ("load", "save", "domain", "chart", "pdf", "render")
+
+_local = threading.local()
+_write_lock = threading.Lock()
+
+
+class Trace:
+    __slots__ = ('page', 'started', 'stack', 'totals')
+
+    def __init__(self, page=None):
+        self.page = page
+        self.started = time.perf_counter()
+        self.stack = []
+        self.totals = {}  # (phase, name) -> [calls, total, self, first start]
+
+    def record(self, outcome="ok"):
+        elapsed = time.perf_counter() - self.started
+        phases = dict.fromkeys(PHASES, 0.0)
+        spans = []
+        for (phase, name), (calls, total, own, first) in sorted(self.totals.items(), key=lambda item: item[1][3]):
+            phases[phase] += own
+            spans.append({"phase": phase, "name": name, "calls": calls, "start_ms": round(first * 1000, 3),
+                          "ms": round(total * 1000, 3), "self_ms": round(own * 1000, 3)})
+        phases["render"] += max(0.0, elapsed - sum(phases.values()))
+        return {"ts": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "page": self.page, "outcome": outcome,
+                "ms": round(elapsed * 1000, 3), "dominant": max(phases, key=phases.get),
+                "phases": {phase: round(value * 1000, 3) for phase, value in phases.items() if value},
+                "spans": spans}
+
+
+class span:
+    # with span("load"): ...  -- a no-op unless the thread is inside rerun()
+    __slots__ = ('phase', 'name', 'trace', 'start', 'children')
+
+    def __init__(self, phase, name=None):
+        self.phase = phase
+        self.name = name or phase
+
+    def __enter__(self):
+        self.trace = trace = getattr(_local, 'trace', None)
+        if trace is not None:
+            self.children = 0.0
+            self.start = time.perf_counter()
+            trace.stack.append(self)
+        return self
+
+    def __exit__(self, *exc):
+        trace = self.trace
+        if trace is None:
+            return False
+        elapsed = time.perf_counter() - self.start
+        trace.stack.pop()
+        if trace.stack:
+            trace.stack[-1].children += elapsed
+        entry = trace.totals.get((self.phase, self.name))
+        if entry is None:
+            entry = trace.totals[(self.phase, self.name)] = [0, 0.0, 0.0, self.start - trace.started]
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] += elapsed - self.children
+        return False
+
+
+def traced(phase, name=None):
+    def decorate(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if getattr(_local, 'trace', None) is None:
+                return func(*args, **kwargs)
+            with span(phase, label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def set_page(page):
+    trace = getattr(_local, 'trace', None)
+    if trace is not None:
+        trace.page = page
+
+
+class rerun:
+    # Traces the block into `path` (one JSON line); path None disables tracing
+    def __init__(self, path, page=None):
+        self.path = path
+        self.page = page
+
+    def __enter__(self):
+        if self.path:
+            _local.trace = Trace(self.page)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        trace = getattr(_local, 'trace', None)
+        if not self.path or trace is None:
+            return False
+        _local.trace = None
+        # Streamlit ends reruns with control-flow exceptions (st.rerun, st.stop)
+        record = trace.record("ok" if exc_type is None else exc_type.__name__)
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with _write_lock, open(self.path, 'a', encoding='utf-8') as fs:
+            fs.write(line)
+        return False
+
+
+def load_traces(path):
+    records = []
+    with open(path, 'r', encoding='utf-8') as fs:
+        for line in fs:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue  # a line cut short by a crash
+    return records
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def summarize(records):
+    # Per page: rerun count, wall-time percentiles and where the time went,
+    # slowest pages (by p95) first
+    pages = {}
+    for record in records:
+        pages.setdefault(record.get('page') or "?", []).append(record)
+    rows = []
+    for page, runs in pages.items():
+        times = sorted(run['ms'] for run in runs)
+        phases = dict.fromkeys(PHASES, 0.0)
+        for run in runs:
+            for phase, value in run['phases'].items():
+                phases[phase] = phases.get(phase, 0.0) + value
+        total = sum(phases.values()) or 1.0
+        rows.append({"page": page, "runs": len(runs), "p50_ms": _percentile(times, 0.5),
+                     "p95_ms": _percentile(times, 0.95), "max_ms": times[-1],
+                     "dominant": max(phases, key=phases.get),
+                     "share": {phase: value / total for phase, value in phases.items() if value}})
+    rows.sort(key=lambda row: row['p95_ms'], reverse=True)
+    return rows
+
+
+def slowest(records, count=10):
+    return sorted(records, key=lambda record: record['ms'], reverse=True)[:count]
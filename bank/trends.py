@@ -0,0 +1,135 @@
+"""Per-account chart data, cached and extended as the ledger grows.
+
+A TrendView holds what the Analytics charts are drawn from: every entry's
+timestamp and balance, and a running count of entries per type. Views live
+in a process-wide cache keyed by book and account and are valid up to a
+ledger position (cold plus hot entries, which archiving does not change)
+whose last entry's timestamp and balance they remember. A request for a
+longer ledger whose entry at that position still matches extends the view
+with just the new entries; anything else (edits, a recreated account)
+rebuilds it from the columns. The cache is bounded by the number of points
+it holds, evicting the least recently used accounts.
+"""
+import bisect
+import threading
+from collections import OrderedDict
+
+from bank import metrics
+from bank.archive import balance_points, cold_entries
+from bank.records import History
+
+MAX_POINTS = 2_000_000
+
+
+class TrendView:
+    __slots__ = ('count', 'last', 'ts', 'balance', 'types')
+
+    def __init__(self, count, last, ts, balance, types):
+        self.count = count
+        self.last = last
+        self.ts = ts
+        self.balance = balance
+        self.types = types
+
+    def window(self, start_ts=None, end_ts=None):
+        lo = 0 if start_ts is None else bisect.bisect_left(self.ts, start_ts)
+        hi = len(self.ts) if end_ts is None else bisect.bisect_right(self.ts, end_ts)
+        return self.ts[lo:hi], self.balance[lo:hi]
+
+
+def _ledger(user):
+    hot = user.get('transactions') or History()
+    if not isinstance(hot, History):
+        hot = History(hot)
+    summary = user.get('archive') or {}
+    archived = summary.get('count', 0)
+    if len(hot):
+        last = hot[-1]
+        last = (last.ts, last.balance)
+    elif summary.get('segments'):
+        last = (summary['segments'][-1]['last_ts'], summary['closing_balance'])
+    else:
+        last = None
+    return hot, archived, archived + len(hot), last
+
+
+def build(root, user):
+    hot, archived, count, last = _ledger(user)
+    stamps, balances = balance_points(root, user)
+    types = {}
+    for txn in cold_entries(root, user):
+        types[txn.type] = types.get(txn.type, 0) + 1
+    for name, n in hot.type_counts().items():
+        types[name] = types.get(name, 0) + n
+    return TrendView(count, last, stamps, balances, types)
+
+
+class TrendCache:
+    def __init__(self, max_points=MAX_POINTS):
+        self.max_points = max_points
+        self.views = OrderedDict()
+        self.points = 0
+        self.requests = {"hit": 0, "extended": 0, "miss": 0}
+        self._lock = threading.Lock()
+
+    def view(self, root, user):
+        key = (root, user['accountNo'])
+        hot, archived, count, last = _ledger(user)
+        with self._lock:
+            view = self.views.get(key)
+            if view is not None:
+                self.views.move_to_end(key)
+                if view.count == count and view.last == last:
+                    self.requests["hit"] += 1
+                    return view
+                if self._extend(view, hot, archived, count, last):
+                    self.requests["extended"] += 1
+                    return view
+        view = build(root, user)
+        with self._lock:
+            old = self.views.pop(key, None)
+            if old is not None:
+                self.points -= len(old.ts)
+            self.views[key] = view
+            self.points += len(view.ts)
+            self._evict()
+            self.requests["miss"] += 1
+        return view
+
+    def _extend(self, view, hot, archived, count, last):
+        # Only when the cached ledger is a prefix of this one; then just the
+        # new entries are decoded
+        if not archived < view.count < count:
+            return False
+        known = hot[view.count - 1 - archived]
+        if (known.ts, known.balance) != view.last:
+            return False
+        start = view.count - archived
+        fresh = hot[start:]
+        view.ts.extend(txn.ts for txn in fresh)
+        view.balance.extend(txn.balance for txn in fresh)
+        for name, n in hot.type_counts(start).items():
+            view.types[name] = view.types.get(name, 0) + n
+        view.count, view.last = count, last
+        self.points += len(fresh)
+        self._evict()
+        return True
+
+    def _evict(self):
+        while self.points > self.max_points and len(self.views) > 1:
+            _, view = self.views.popitem(last=False)
+            self.points -= len(view.ts)
+
+    def clear(self):
+        with self._lock:
+            self.views.clear()
+            self.points = 0
+
+
+CACHE = TrendCache()
+
+
+@metrics.collector
+def _trend_cache_metrics():
+    samples = [(("cache", "result"), ("trends", result), n) for result, n in CACHE.requests.items()]
+    return [("bank_cache_requests_total", "counter", "Lookups in in-process caches.", samples)]
@@ -0,0 +1,194 @@
+"""Bank-wide analytics kept as materialized views over every ledger.
+
+    python -m bank views                 # refresh, then print the headline numbers
+    python -m bank views --every 300     # keep refreshing
+    python -m bank views --rebuild
+
+Views, with amounts in paise:
+
+    daily          {"YYYY-MM-DD": {type: [count, amount]}}
+    senders        {accountNo: [count, amount]} of transfer_out entries
+    receivers      {accountNo: [count, amount]} of transfer_in entries
+    bills          {description, e.g. "Electricity - UPPCL": [count, amount]}
+    deposit_hours  [[count, amount]] for each hour of the day
+
+They live in <db>.views.state together with a watermark per account: the
+ledger position folded in so far (cold plus hot entries) and the timestamp
+and balance of the entry there. A refresh reads every header but skips
+accounts whose entry count has not moved without touching their bodies;
+grown accounts have only their new entries decoded and folded in. A ledger
+that shrank, an entry at the watermark that changed, or a deleted account
+means the views no longer describe the book, so they are rebuilt.
+
+Each refresh also writes <db>.views.json, the dashboard document: the daily
+view plus the top senders and receivers, bills and deposit hours. Its size
+depends on days, providers and TOP, not on the number of transactions, so
+a dashboard loads it in milliseconds however large the book is. Both files
+are replaced by rename.
+"""
+import heapq
+import json
+import os
+from datetime import datetime
+
+from bank.archive import ledger_entries, transaction_count
+from bank.records import History, to_datetime
+
+VERSION = 1
+TOP = 100
+
+_days = {}
+
+
+def views_path(database):
+    return f"{os.path.normpath(database)}.views.json"
+
+
+def _empty_state():
+    return {"version": VERSION, "accounts": {}, "transactions": 0, "daily": {}, "senders": {}, "receivers": {},
+            "bills": {}, "deposit_hours": [[0, 0] for _ in range(24)]}
+
+
+def _read_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as fs:
+            return json.load(fs)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, document):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as fs:
+        json.dump(document, fs, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def load(path):
+    # The dashboard document, or None before the first refresh
+    return _read_json(path)
+
+
+def _day(ts):
+    day = ts // 86400
+    text = _days.get(day)
+    if text is None:
+        text = _days[day] = to_datetime(day * 86400).strftime("%Y-%m-%d")
+    return text
+
+
+def _add(table, key, amount):
+    cell = table.get(key)
+    if cell is None:
+        cell = table[key] = [0, 0]
+    cell[0] += 1
+    cell[1] += amount
+
+
+def _fold(state, account_no, entries):
+    daily, bills, hours = state['daily'], state['bills'], state['deposit_hours']
+    sent, received = state['senders'], state['receivers']
+    folded = 0
+    last = None
+    for txn in entries:
+        kind, amount, ts = txn.type, txn.amount, txn.ts
+        day = _day(ts)
+        per_type = daily.get(day)
+        if per_type is None:
+            per_type = daily[day] = {}
+        _add(per_type, kind, amount)
+        if kind == 'deposit':
+            hour = hours[ts // 3600 % 24]
+            hour[0] += 1
+            hour[1] += amount
+        elif kind == 'bill_payment':
+            _add(bills, txn.description, amount)
+        elif kind == 'transfer_out':
+            _add(sent, account_no, amount)
+        elif kind == 'transfer_in':
+            _add(received, account_no, amount)
+        folded += 1
+        last = txn
+    state['transactions'] += folded
+    return folded, last
+
+
+def _refresh(state, accounts, root):
+    # False when the views must be rebuilt from scratch
+    marks = state['accounts']
+    tracked, seen = len(marks), 0
+    folded = changed = 0
+    for user in accounts:
+        account_no = user['accountNo']
+        count = transaction_count(user)  # from the header
+        mark = marks.get(account_no)
+        seen += mark is not None
+        if count == (mark[0] if mark else 0):
+            continue
+        if mark is not None and mark[0] > count:
+            return False
+        archived = (user.get('archive') or {}).get('count', 0)
+        hot = user.peek('transactions') or History()
+        start = mark[0] if mark else 0
+        if start > archived:
+            # The entry at the watermark must still be the one folded in
+            known = hot[start - 1 - archived]
+            if [known.ts, known.balance] != mark[1:]:
+                return False
+        n, last = _fold(state, account_no, ledger_entries(root, user, start, hot))
+        if last is not None:
+            marks[account_no] = [start + n, last.ts, last.balance]
+        folded += n
+        changed += 1
+    if seen < tracked:
+        return False  # an account the views include is gone
+    return folded, changed
+
+
+def _dashboard(state, accounts):
+    names = {}
+    top = {}
+    for key in ('senders', 'receivers'):
+        top[key] = heapq.nlargest(TOP, state[key].items(), key=lambda item: item[1][1])
+        names.update((account_no, None) for account_no, _ in top[key])
+    for user in accounts:
+        if user['accountNo'] in names:
+            names[user['accountNo']] = user['name']
+    return {"version": VERSION, "refreshed_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "accounts": len(state['accounts']), "transactions": state['transactions'], "daily": state['daily'],
+            "top_senders": [[no, names[no], count, amount] for no, (count, amount) in top['senders']],
+            "top_receivers": [[no, names[no], count, amount] for no, (count, amount) in top['receivers']],
+            "bills": sorted(([desc, count, amount] for desc, (count, amount) in state['bills'].items()),
+                            key=lambda row: row[2], reverse=True),
+            "deposit_hours": state['deposit_hours']}
+
+
+def refresh(path, accounts, root, rebuild=False):
+    """Bring the views at `path` up to date with `accounts`; returns
+    (entries folded in, accounts changed, whether it was a rebuild)."""
+    state_path = f"{os.path.splitext(path)[0]}.state"
+    state = None if rebuild else _read_json(state_path)
+    rebuilt = state is None or state.get('version') != VERSION
+    if rebuilt:
+        state = _empty_state()
+    result = _refresh(state, accounts, root)
+    if result is False:
+        rebuilt = True
+        state = _empty_state()
+        result = _refresh(state, accounts, root)
+    _write_json(state_path, state)
+    _write_json(path, _dashboard(state, accounts))
+    return result[0], result[1], rebuilt
+
+
+def type_totals(dashboard, start=None, end=None):
+    # {type: [count, amount]} over days in [start, end] ("YYYY-MM-DD", inclusive)
+    totals = {}
+    for day, per_type in dashboard['daily'].items():
+        if (start and day < start) or (end and day > end):
+            continue
+        for kind, (count, amount) in per_type.items():
+            cell = totals.setdefault(kind, [0, 0])
+            cell[0] += count
+            cell[1] += amount
+    return totals
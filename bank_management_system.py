@@ -1,685 +1,41 @@
-import json
-import random
-import string
-import hashlib
-from pathlib import Path
-import streamlit as st
+import logging
+import os
 from datetime import datetime, timedelta
-import pandas as pd
-from io import BytesIO
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER
-import plotly.express as px
-import plotly.graph_objects as go
 
-import os
-import sys
+import streamlit as st
 
+from bank import PAISE, SWEEP_PERIODS, Bank, format_inr, metrics, profiler, to_paise, tracing
+from bank.archive import ledger_span
+from bank.core import CHART_POINTS, lock_stats
+from bank.lazy import LazyModule
+from bank.notify import NotificationQueue, transport_from_spec
+from bank.records import to_datetime
 
-class Bank:
-    # Dynamic database path for executable
-    if getattr(sys, 'frozen', False):
-        # Running as compiled executable
-        database = os.path.join(os.path.dirname(sys.executable), 'data.json')
-    else:
-        # Running as script
-        database = 'data.json'
-
-    @staticmethod
-    def _load_data():
-        try:
-            # Ensure the directory exists
-            db_path = Bank.database
-            db_dir = os.path.dirname(db_path)
-            if db_dir and not os.path.exists(db_dir):
-                os.makedirs(db_dir, exist_ok=True)
-
-            if os.path.exists(db_path):
-                with open(db_path, 'r', encoding='utf-8') as fs:
-                    content = fs.read().strip()
-                    if not content:
-                        return []
-                    return json.loads(content)
-            return []
-        except Exception as err:
-            # Create fresh data file if there's an error
-            print(f"⚠️ Creating new database: {err}")
-            return []
-
-    # ... rest of your code remains same
-
-    # ... rest of your Bank class remains the same
-
-    @staticmethod
-    def _hash_pin(pin):
-        return hashlib.sha256(str(pin).encode()).hexdigest()
-
-    @staticmethod
-    def _load_data():
-        try:
-            if Path(Bank.database).exists():
-                with open(Bank.database, 'r') as fs:
-                    content = fs.read().strip()
-                    if not content:
-                        return []
-                    return json.loads(content)
-            return []
-        except json.JSONDecodeError:
-            st.warning("⚠️ Data file corrupted. Creating new database...")
-            if Path(Bank.database).exists():
-                Path(Bank.database).rename(f"{Bank.database}.backup")
-            return []
-        except Exception as err:
-            st.error(f"Error loading data: {err}")
-            return []
-
-    @staticmethod
-    def _save_data(data):
-        try:
-            with open(Bank.database, 'w') as fs:
-                json.dump(data, fs, indent=2)
-            return True
-        except Exception as err:
-            st.error(f"Error saving data: {err}")
-            return False
-
-    @staticmethod
-    def _generate_account_number():
-        alpha = random.choices(string.ascii_uppercase, k=4)
-        num = random.choices(string.digits, k=6)
-        return "".join(alpha + num)
-
-    @staticmethod
-    def _generate_card_number():
-        return "".join([str(random.randint(0, 9)) for _ in range(16)])
-
-    @staticmethod
-    def _generate_cvv():
-        return "".join([str(random.randint(0, 9)) for _ in range(3)])
-
-    @staticmethod
-    def _generate_otp():
-        return "".join([str(random.randint(0, 9)) for _ in range(6)])
-
-    @staticmethod
-    def _generate_loan_id():
-        return "LN" + "".join([str(random.randint(0, 9)) for _ in range(8)])
-
-    @staticmethod
-    def _find_user(account_no, pin):
-        data = Bank._load_data()
-        hashed_pin = Bank._hash_pin(pin)
-        for user in data:
-            if user['accountNo'] == account_no and user['pin'] == hashed_pin:
-                return user, data
-        return None, data
-
-    @staticmethod
-    def _find_user_by_account(account_no):
-        data = Bank._load_data()
-        for user in data:
-            if user['accountNo'] == account_no:
-                return user
-        return None
+# Heavy libraries load on the first page that draws a table or chart
+pd = LazyModule("pandas")
+px = LazyModule("plotly.express")
+go = LazyModule("plotly.graph_objects")
 
-    @staticmethod
-    def create_account(name, age, email, mobile, address, pin):
-        if age < 18:
-            return False, "You must be 18 or older."
-        if len(str(pin)) != 4 or not str(pin).isdigit():
-            return False, "PIN must be 4 digits."
-        if not name or not email or not mobile or not address:
-            return False, "All fields required."
-        if '@' not in email or '.' not in email:
-            return False, "Invalid email."
-        if len(str(mobile)) != 10 or not str(mobile).isdigit():
-            return False, "Mobile must be 10 digits."
-
-        data = Bank._load_data()
-        card_number = Bank._generate_card_number()
-        cvv = Bank._generate_cvv()
-        expiry = (datetime.now() + timedelta(days=1825)).strftime("%m/%y")
-
-        account_info = {
-            "name": name,
-            "age": age,
-            "email": email,
-            "mobile": mobile,
-            "address": address,
-            "pin": Bank._hash_pin(pin),
-            "accountNo": Bank._generate_account_number(),
-            "balance": 0,
-            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "transactions": [],
-            "virtual_card": {
-                "card_number": card_number,
-                "cvv": cvv,
-                "expiry": expiry,
-                "card_holder": name.upper()
-            },
-            "savings_goals": [],
-            "beneficiaries": [],
-            "loans": [],
-            "bills": []
-        }
-
-        data.append(account_info)
-        if Bank._save_data(data):
-            return True, account_info['accountNo']
-        return False, "Failed to create account."
-
-    @staticmethod
-    def deposit_money(account_no, pin, amount):
-        user, data = Bank._find_user(account_no, pin)
-        if not user:
-            return False, "Invalid credentials."
-        if amount <= 0:
-            return False, "Amount must be > 0."
-        if amount > 50000:
-            return False, "Max ₹50,000 per deposit."
-
-        user['balance'] += amount
-        user['transactions'].append({
-            "type": "deposit",
-            "amount": amount,
-            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "balance": user['balance'],
-            "description": "Cash Deposit"
-        })
-
-        if Bank._save_data(data):
-            return True, f"Deposited ₹{amount:,.0f}. Balance: ₹{user['balance']:,.0f}"
-        return False, "Transaction failed."
-
-    @staticmethod
-    def withdraw_money(account_no, pin, amount):
-        user, data = Bank._find_user(account_no, pin)
-        if not user:
-            return False, "Invalid credentials."
-        if amount <= 0:
-            return False, "Amount must be > 0."
-        if user['balance'] < amount:
-            return False, f"Insufficient balance. Available: ₹{user['balance']:,.0f}"
-
-        user['balance'] -= amount
-        user['transactions'].append({
-            "type": "withdrawal",
-            "amount": amount,
-            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "balance": user['balance'],
-            "description": "Cash Withdrawal"
-        })
-
-        if Bank._save_data(data):
-            return True, f"Withdrew ₹{amount:,.0f}. Balance: ₹{user['balance']:,.0f}"
-        return False, "Transaction failed."
-
-    @staticmethod
-    def transfer_money(from_account, pin, to_account, amount, description=""):
-        sender, data = Bank._find_user(from_account, pin)
-        if not sender:
-            return False, "Invalid sender credentials."
-
-        recipient = Bank._find_user_by_account(to_account)
-        if not recipient:
-            return False, "Recipient not found."
-        if from_account == to_account:
-            return False, "Cannot transfer to same account."
-        if amount <= 0:
-            return False, "Amount must be > 0."
-        if sender['balance'] < amount:
-            return False, f"Insufficient balance. Available: ₹{sender['balance']:,.0f}"
-        if amount > 100000:
-            return False, "Max ₹1,00,000 per transfer."
-
-        sender['balance'] -= amount
-        recipient['balance'] += amount
-        transaction_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        transfer_desc = description if description else "Money Transfer"
-
-        sender['transactions'].append({
-            "type": "transfer_out",
-            "amount": amount,
-            "date": transaction_time,
-            "balance": sender['balance'],
-            "to_account": to_account,
-            "recipient_name": recipient['name'],
-            "description": transfer_desc
-        })
-
-        recipient['transactions'].append({
-            "type": "transfer_in",
-            "amount": amount,
-            "date": transaction_time,
-            "balance": recipient['balance'],
-            "from_account": from_account,
-            "sender_name": sender['name'],
-            "description": transfer_desc
-        })
-
-        if Bank._save_data(data):
-            return True, f"Transferred ₹{amount:,.0f} to {recipient['name']}. Balance: ₹{sender['balance']:,.0f}"
-        return False, "Transfer failed."
-
-    @staticmethod
-    def add_beneficiary(account_no, pin, beneficiary_account, nickname):
-        user, data = Bank._find_user(account_no, pin)
-        if not user:
-            return False, "Invalid credentials."
-
-        if account_no == beneficiary_account:
-            return False, "Cannot add yourself as beneficiary."
-
-        beneficiary = Bank._find_user_by_account(beneficiary_account)
-        if not beneficiary:
-            return False, "Beneficiary account not found."
-
-        if 'beneficiaries' not in user:
-            user['beneficiaries'] = []
-
-        for ben in user['beneficiaries']:
-            if ben['account'] == beneficiary_account:
-                return False, "Beneficiary already exists."
-
-        user['beneficiaries'].append({
-            "id": len(user['beneficiaries']) + 1,
-            "account": beneficiary_account,
-            "name": beneficiary['name'],
-            "nickname": nickname,
-            "added_on": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        })
-
-        if Bank._save_data(data):
-            return True, f"Added {nickname} ({beneficiary['name']}) as beneficiary!"
-        return False, "Failed to add beneficiary."
-
-    @staticmethod
-    def remove_beneficiary(account_no, pin, beneficiary_id):
-        user, data = Bank._find_user(account_no, pin)
-        if not user:
-            return False, "Invalid credentials."
-
-        beneficiaries = user.get('beneficiaries', [])
-        user['beneficiaries'] = [b for b in beneficiaries if b['id'] != beneficiary_id]
-
-        if Bank._save_data(data):
-            return True, "Beneficiary removed!"
-        return False, "Failed to remove beneficiary."
-
-    @staticmethod
-    def pay_bill(account_no, pin, bill_type, provider, bill_number, amount):
-        user, data = Bank._find_user(account_no, pin)
-        if not user:
-            return False, "Invalid credentials."
-
-        if amount <= 0:
-            return False, "Amount must be > 0."
-
-        if user['balance'] < amount:
-            return False, f"Insufficient balance. Available: ₹{user['balance']:,.0f}"
-
-        user['balance'] -= amount
-
-        if 'bills' not in user:
-            user['bills'] = []
-
-        bill_record = {
-            "id": len(user['bills']) + 1,
-            "type": bill_type,
-            "provider": provider,
-            "bill_number": bill_number,
-            "amount": amount,
-            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "status": "Paid"
-        }
-
-        user['bills'].append(bill_record)
-
-        user['transactions'].append({
-            "type": "bill_payment",
-            "amount": amount,
-            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "balance": user['balance'],
-            "description": f"{bill_type} - {provider}"
-        })
-
-        if Bank._save_data(data):
-            return True, f"Bill paid successfully! ₹{amount:,.0f} | Balance: ₹{user['balance']:,.0f}"
-        return False, "Bill payment failed."
-
-    @staticmethod
-    def calculate_emi(principal, rate, tenure_months):
-        r = rate / (12 * 100)
-        emi = principal * r * pow(1 + r, tenure_months) / (pow(1 + r, tenure_months) - 1)
-        total_amount = emi * tenure_months
-        total_interest = total_amount - principal
-        return round(emi, 2), round(total_amount, 2), round(total_interest, 2)
-
-    @staticmethod
-    def apply_loan(account_no, pin, loan_type, amount, tenure_months, purpose):
-        user, data = Bank._find_user(account_no, pin)
-        if not user:
-            return False, "Invalid credentials.", 0
-
-        if amount < 10000:
-            return False, "Minimum loan amount is ₹10,000.", 0
-
-        if amount > 5000000:
-            return False, "Maximum loan amount is ₹50,00,000.", 0
-
-        rates = {
-            "Personal Loan": 12.5,
-            "Home Loan": 8.5,
-            "Car Loan": 10.0,
-            "Education Loan": 9.0
-        }
-
-        rate = rates.get(loan_type, 12.0)
-        emi, total_amount, total_interest = Bank.calculate_emi(amount, rate, tenure_months)
-
-        if 'loans' not in user:
-            user['loans'] = []
-
-        loan = {
-            "loan_id": Bank._generate_loan_id(),
-            "type": loan_type,
-            "principal": amount,
-            "interest_rate": rate,
-            "tenure_months": tenure_months,
-            "emi": emi,
-            "total_amount": total_amount,
-            "total_interest": total_interest,
-            "outstanding": amount,
-            "paid_emis": 0,
-            "purpose": purpose,
-            "applied_on": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "status": "Active",
-            "next_emi_date": (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d")
-        }
-
-        user['loans'].append(loan)
-
-        user['balance'] += amount
-        user['transactions'].append({
-            "type": "loan_credit",
-            "amount": amount,
-            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "balance": user['balance'],
-            "description": f"Loan Disbursed - {loan_type}"
-        })
-
-        if Bank._save_data(data):
-            return True, loan['loan_id'], emi
-        return False, "Loan application failed.", 0
-
-    @staticmethod
-    def pay_emi(account_no, pin, loan_id):
-        user, data = Bank._find_user(account_no, pin)
-        if not user:
-            return False, "Invalid credentials."
-
-        loan = next((l for l in user.get('loans', []) if l['loan_id'] == loan_id), None)
-        if not loan:
-            return False, "Loan not found."
-
-        if loan['status'] == 'Closed':
-            return False, "Loan already closed."
-
-        emi_amount = loan['emi']
-
-        if user['balance'] < emi_amount:
-            return False, f"Insufficient balance. EMI: ₹{emi_amount:,.2f}"
-
-        user['balance'] -= emi_amount
-        loan['paid_emis'] += 1
-
-        principal_part = emi_amount - (loan['outstanding'] * loan['interest_rate'] / (12 * 100))
-        loan['outstanding'] = max(0, loan['outstanding'] - principal_part)
-
-        if loan['paid_emis'] >= loan['tenure_months'] or loan['outstanding'] <= 0:
-            loan['status'] = 'Closed'
-            loan['outstanding'] = 0
-        else:
-            next_date = datetime.strptime(loan['next_emi_date'], "%Y-%m-%d") + timedelta(days=30)
-            loan['next_emi_date'] = next_date.strftime("%Y-%m-%d")
-
-        user['transactions'].append({
-            "type": "emi_payment",
-            "amount": emi_amount,
-            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "balance": user['balance'],
-            "description": f"EMI Paid - {loan['type']}"
-        })
-
-        if Bank._save_data(data):
-            status = "Loan Closed!" if loan['status'] == 'Closed' else f"EMI Paid! Remaining: {loan['tenure_months'] - loan['paid_emis']} EMIs"
-            return True, status
-        return False, "EMI payment failed."
-
-    @staticmethod
-    def close_loan(account_no, pin, loan_id):
-        user, data = Bank._find_user(account_no, pin)
-        if not user:
-            return False, "Invalid credentials."
-
-        loan = next((l for l in user.get('loans', []) if l['loan_id'] == loan_id), None)
-        if not loan:
-            return False, "Loan not found."
-
-        if loan['status'] == 'Closed':
-            return False, "Loan already closed."
-
-        outstanding = loan['outstanding']
-
-        if user['balance'] < outstanding:
-            return False, f"Insufficient balance. Outstanding: ₹{outstanding:,.2f}"
-
-        user['balance'] -= outstanding
-        loan['status'] = 'Closed'
-        loan['outstanding'] = 0
-
-        user['transactions'].append({
-            "type": "loan_closure",
-            "amount": outstanding,
-            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "balance": user['balance'],
-            "description": f"Loan Closed - {loan['type']}"
-        })
-
-        if Bank._save_data(data):
-            return True, f"Loan closed! Paid ₹{outstanding:,.2f}. Balance: ₹{user['balance']:,.0f}"
-        return False, "Loan closure failed."
-
-    @staticmethod
-    def add_savings_goal(account_no, pin, goal_name, target_amount, deadline):
-        user, data = Bank._find_user(account_no, pin)
-        if not user:
-            return False, "Invalid credentials."
-
-        if 'savings_goals' not in user:
-            user['savings_goals'] = []
-
-        goal = {
-            "id": len(user['savings_goals']) + 1,
-            "name": goal_name,
-            "target_amount": target_amount,
-            "current_amount": 0,
-            "deadline": deadline,
-            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "status": "active"
-        }
-
-        user['savings_goals'].append(goal)
-
-        if Bank._save_data(data):
-            return True, "Goal added successfully!"
-        return False, "Failed to add goal."
-
-    @staticmethod
-    def contribute_to_goal(account_no, pin, goal_id, amount):
-        user, data = Bank._find_user(account_no, pin)
-        if not user:
-            return False, "Invalid credentials."
-        if user['balance'] < amount:
-            return False, "Insufficient balance."
-
-        goal = next((g for g in user.get('savings_goals', []) if g['id'] == goal_id), None)
-        if not goal:
-            return False, "Goal not found."
-        if goal['status'] == 'completed':
-            return False, "Goal already completed."
-
-        user['balance'] -= amount
-        goal['current_amount'] += amount
-
-        if goal['current_amount'] >= goal['target_amount']:
-            goal['status'] = 'completed'
-
-        user['transactions'].append({
-            "type": "savings_contribution",
-            "amount": amount,
-            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "balance": user['balance'],
-            "description": f"Saved for: {goal['name']}"
-        })
-
-        if Bank._save_data(data):
-            return True, f"Contributed ₹{amount:,.0f} to {goal['name']}!"
-        return False, "Contribution failed."
-
-    @staticmethod
-    def get_details(account_no, pin):
-        user, _ = Bank._find_user(account_no, pin)
-        if not user:
-            return None, "Invalid credentials."
-        return user, "Success"
-
-    @staticmethod
-    def update_details(account_no, pin, name=None, email=None, mobile=None, address=None, new_pin=None):
-        user, data = Bank._find_user(account_no, pin)
-        if not user:
-            return False, "Invalid credentials."
-
-        if name:
-            user['name'] = name
-        if email:
-            if '@' not in email or '.' not in email:
-                return False, "Invalid email."
-            user['email'] = email
-        if mobile:
-            if len(str(mobile)) != 10 or not str(mobile).isdigit():
-                return False, "Mobile must be 10 digits."
-            user['mobile'] = mobile
-        if address:
-            user['address'] = address
-        if new_pin and len(str(new_pin)) == 4 and str(new_pin).isdigit():
-            user['pin'] = Bank._hash_pin(new_pin)
-        elif new_pin:
-            return False, "PIN must be 4 digits."
-
-        if Bank._save_data(data):
-            return True, "Updated successfully."
-        return False, "Update failed."
-
-    @staticmethod
-    def delete_account(account_no, pin):
-        user, data = Bank._find_user(account_no, pin)
-        if not user:
-            return False, "Invalid credentials."
-        data.remove(user)
-        if Bank._save_data(data):
-            return True, "Account deleted."
-        return False, "Deletion failed."
-
-    @staticmethod
-    def filter_transactions(account_no, pin, start_date=None, end_date=None, txn_type=None, min_amount=None,
-                            max_amount=None):
-        user, _ = Bank._find_user(account_no, pin)
-        if not user:
-            return None, "Invalid credentials."
-
-        transactions = user.get('transactions', [])
-        filtered = []
-
-        for txn in transactions:
-            txn_date = datetime.strptime(txn['date'], "%Y-%m-%d %H:%M:%S")
-            if start_date and txn_date < start_date:
-                continue
-            if end_date and txn_date > end_date:
-                continue
-            if txn_type and txn_type != "all" and txn['type'] != txn_type:
-                continue
-            if min_amount and txn['amount'] < min_amount:
-                continue
-            if max_amount and txn['amount'] > max_amount:
-                continue
-            filtered.append(txn)
-
-        return filtered, "Success"
-
-    @staticmethod
-    def generate_statement_pdf(user, transactions, start_date=None, end_date=None):
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        elements = []
-
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=24,
-                                     textColor=colors.HexColor('#667eea'), spaceAfter=30,
-                                     alignment=TA_CENTER, fontName='Helvetica-Bold')
-
-        elements.append(Paragraph("BANK STATEMENT", title_style))
-        elements.append(Spacer(1, 0.3 * inch))
-
-        account_info = [
-            ['Account Holder:', user['name']],
-            ['Account Number:', user['accountNo']],
-            ['Email:', user['email']],
-            ['Mobile:', user.get('mobile', 'N/A')],
-            ['Address:', user.get('address', 'N/A')],
-            ['Balance:', f"Rs.{user['balance']:,.2f}"],
-            ['Date:', datetime.now().strftime("%Y-%m-%d")],
-        ]
-
-        info_table = Table(account_info, colWidths=[2 * inch, 4 * inch])
-        info_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f0f0f0')),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
-        ]))
-
-        elements.append(info_table)
-        elements.append(Spacer(1, 0.5 * inch))
-
-        if transactions:
-            txn_data = [['Date', 'Type', 'Amount', 'Balance']]
-            for txn in reversed(transactions):
-                txn_type = txn['type'].replace('_', ' ').title()
-                amount_str = f"Rs.{txn['amount']:,.2f}"
-                if txn['type'] in ['withdrawal', 'transfer_out', 'savings_contribution', 'bill_payment', 'emi_payment',
-                                   'loan_closure']:
-                    amount_str = f"-{amount_str}"
-                else:
-                    amount_str = f"+{amount_str}"
-                txn_data.append([txn['date'], txn_type, amount_str, f"Rs.{txn['balance']:,.2f}"])
 
-            txn_table = Table(txn_data, colWidths=[2 * inch, 1.5 * inch, 1.5 * inch, 1.5 * inch])
-            txn_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#667eea')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ]))
-            elements.append(txn_table)
+class StreamlitAlerts(logging.Handler):
+    # Storage problems are logged by the core; surface them on the page
+    def emit(self, record):
+        (st.error if record.levelno >= logging.ERROR else st.warning)(self.format(record))
 
-        doc.build(elements)
-        buffer.seek(0)
-        return buffer
+
+_bank_logger = logging.getLogger("bank")
+if not any(isinstance(h, StreamlitAlerts) for h in _bank_logger.handlers):
+    _bank_logger.addHandler(StreamlitAlerts())
+
+
+@st.cache_resource
+def get_notifier():
+    # One delivery queue per server process, shared by every session. Without
+    # BANK_NOTIFY OTPs go to the server's terminal: a development setup only.
+    spec = os.environ.get("BANK_NOTIFY")
+    if spec is None:
+        logging.getLogger(__name__).warning("BANK_NOTIFY is not set; OTPs are printed to the console.")
+    return NotificationQueue(transport_from_spec(spec or "console"))
 
 
 def load_css(dark_mode=False):
@@ -700,33 +56,43 @@ def load_css(dark_mode=False):
             </style>""", unsafe_allow_html=True)
 
 
-def create_transaction_chart(transactions):
-    if not transactions:
+@tracing.traced("chart")
+def create_transaction_chart(series):
+    # series comes from Bank.balance_series, already cut down to a drawable size
+    if not series or not series['ts']:
         return None
-    df_data = [{'Date': datetime.strptime(txn['date'], "%Y-%m-%d %H:%M:%S"),
-                'Balance': txn['balance']} for txn in transactions]
-    df = pd.DataFrame(df_data)
+    dates = [to_datetime(ts) for ts in series['ts']]
+    balances = [balance / PAISE for balance in series['balance']]
+    title = 'Balance Trend'
+    if len(dates) < series['count']:
+        title += f" ({len(dates):,} of {series['count']:,} points)"
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=df['Date'], y=df['Balance'], mode='lines+markers',
+    fig.add_trace(go.Scatter(x=dates, y=balances, mode='lines+markers' if len(dates) <= 200 else 'lines',
                              name='Balance', line=dict(color='#667eea', width=3)))
-    fig.update_layout(title='Balance Trend', xaxis_title='Date', yaxis_title='Balance (Rs.)', height=400)
+    fig.update_layout(title=title, xaxis_title='Date', yaxis_title='Balance (Rs.)', height=400)
     return fig
 
 
-def create_transaction_pie_chart(transactions):
-    if not transactions:
+@tracing.traced("chart")
+def create_transaction_pie_chart(type_counts):
+    # type_counts comes from Bank.transaction_types, which keeps running counters
+    if not type_counts:
         return None
-    type_counts = {}
-    for txn in transactions:
-        t = txn['type'].replace('_', ' ').title()
-        type_counts[t] = type_counts.get(t, 0) + 1
-    fig = px.pie(values=list(type_counts.values()), names=list(type_counts.keys()), title='Transaction Distribution')
+    names = [t.replace('_', ' ').title() for t in type_counts]
+    fig = px.pie(values=list(type_counts.values()), names=names, title='Transaction Distribution')
     fig.update_layout(height=400)
     return fig
 
 
 def main():
+    # BANK_TRACE=traces.jsonl records where each rerun's time goes; see `python -m bank traces`
+    with tracing.rerun(os.environ.get("BANK_TRACE")):
+        app()
+
+
+def app():
     st.set_page_config(page_title="Bank Management", page_icon="🏦", layout="wide")
+    Bank.notifier = get_notifier()
 
     if 'dark_mode' not in st.session_state:
         st.session_state.dark_mode = False
@@ -760,38 +126,37 @@ def main():
             "🏠 Home", "➕ Create", "💰 Deposit", "💸 Withdraw",
             "🔄 Transfer", "👥 Beneficiaries", "💡 Bill Payment",
             "💳 Loans", "📊 Details", "📈 Analytics",
-            "🔍 Search", "💳 Card", "🎯 Goals", "✏️ Update", "🗑️ Delete"
+            "🔍 Search", "💳 Card", "🎯 Goals", "✏️ Update", "🗑️ Delete", "🏛️ Bank Analytics",
+            "🚨 Fraud Review", "📉 Metrics"
         ])
 
     menu_clean = menu.split(" ", 1)[1]
+    tracing.set_page(menu_clean)
 
     if "Home" in menu_clean:
-        data = Bank._load_data()
+        stats = Bank.get_stats()
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.markdown(f"<div class='custom-card'><h3>👥 Accounts</h3><h1>{len(data)}</h1></div>",
+            st.markdown(f"<div class='custom-card'><h3>👥 Accounts</h3><h1>{stats['accounts']}</h1></div>",
                         unsafe_allow_html=True)
         with col2:
             st.markdown(
-                f"<div class='custom-card'><h3>💵 Total Balance</h3><h1>₹{sum(u['balance'] for u in data):,.0f}</h1></div>",
+                f"<div class='custom-card'><h3>💵 Total Balance</h3><h1>{format_inr(stats['total_balance'])}</h1></div>",
                 unsafe_allow_html=True)
         with col3:
             st.markdown(
-                f"<div class='custom-card'><h3>📈 Transactions</h3><h1>{sum(len(u.get('transactions', [])) for u in data)}</h1></div>",
+                f"<div class='custom-card'><h3>📈 Transactions</h3><h1>{stats['transactions']}</h1></div>",
                 unsafe_allow_html=True)
 
         col1, col2, col3 = st.columns(3)
         with col1:
-            total_loans = sum(len(u.get('loans', [])) for u in data)
-            st.markdown(f"<div class='custom-card'><h3>💳 Active Loans</h3><h1>{total_loans}</h1></div>",
+            st.markdown(f"<div class='custom-card'><h3>💳 Active Loans</h3><h1>{stats['active_loans']}</h1></div>",
                         unsafe_allow_html=True)
         with col2:
-            total_beneficiaries = sum(len(u.get('beneficiaries', [])) for u in data)
-            st.markdown(f"<div class='custom-card'><h3>👥 Beneficiaries</h3><h1>{total_beneficiaries}</h1></div>",
+            st.markdown(f"<div class='custom-card'><h3>👥 Beneficiaries</h3><h1>{stats['beneficiaries']}</h1></div>",
                         unsafe_allow_html=True)
         with col3:
-            total_goals = sum(len(u.get('savings_goals', [])) for u in data)
-            st.markdown(f"<div class='custom-card'><h3>🎯 Savings Goals</h3><h1>{total_goals}</h1></div>",
+            st.markdown(f"<div class='custom-card'><h3>🎯 Savings Goals</h3><h1>{stats['savings_goals']}</h1></div>",
                         unsafe_allow_html=True)
 
     elif "Create" in menu_clean:
@@ -819,7 +184,7 @@ def main():
                 elif len(str(pin)) != 4:
                     st.error("❌ PIN must be 4 digits!")
                 else:
-                    otp = Bank._generate_otp()
+                    otp = Bank.send_otp(email)
                     st.session_state.otp_code = otp
                     st.session_state.otp_email = email
                     st.session_state.otp_time = datetime.now()
@@ -830,27 +195,12 @@ def main():
             st.info("📝 Step 2: Verify OTP")
             st.success(f"📧 OTP sent to: {st.session_state.otp_email}")
 
-            st.markdown(f"""
-                <div style='background: linear-gradient(135deg, #00d2ff 0%, #3a7bd5 100%); 
-                            padding: 30px;
-                            border-radius: 15px;
-                            text-align: center;
-                            margin: 20px 0;
-                            box-shadow: 0 10px 30px rgba(0,0,0,0.3);'>
-                    <h2 style='color: white; margin: 0;'>🔐 Your OTP Code</h2>
-                    <h1 style='color: white; font-size: 48px; letter-spacing: 10px; margin: 20px 0;'>
-                        {st.session_state.otp_code}
-                    </h1>
-                    <p style='color: white; margin: 0;'>⏰ Valid for 5 minutes | Copy this code</p>
-                </div>
-            """, unsafe_allow_html=True)
-
             time_left = 300 - (datetime.now() - st.session_state.otp_time).seconds
 
             if time_left > 0:
                 st.warning(f"⏰ Time remaining: {time_left // 60} minutes {time_left % 60} seconds")
 
-                otp_input = st.text_input("🔐 Enter the 6-digit OTP shown above", max_chars=6, key="otp_verify")
+                otp_input = st.text_input("🔐 Enter the 6-digit OTP from your email", max_chars=6, key="otp_verify")
 
                 col1, col2, col3 = st.columns(3)
                 with col1:
@@ -880,7 +230,7 @@ def main():
                             st.error("❌ Invalid OTP!")
                 with col2:
                     if st.button("🔄 Resend OTP", use_container_width=True):
-                        otp = Bank._generate_otp()
+                        otp = Bank.send_otp(st.session_state.otp_email)
                         st.session_state.otp_code = otp
                         st.session_state.otp_time = datetime.now()
                         st.success(f"✅ New OTP sent!")
@@ -908,7 +258,7 @@ def main():
             pin = st.text_input("🔒 PIN", type="password", max_chars=4)
             amount = st.number_input("💵 Amount", min_value=1, value=1000)
             if st.form_submit_button("💰 Deposit"):
-                success, msg = Bank.deposit_money(account_no, pin, amount)
+                success, msg = Bank.deposit_money(account_no, pin, to_paise(amount))
                 if success:
                     st.success(msg)
                     st.balloons()
@@ -922,7 +272,7 @@ def main():
             pin = st.text_input("🔒 PIN", type="password", max_chars=4)
             amount = st.number_input("💵 Amount", min_value=1, value=500)
             if st.form_submit_button("💸 Withdraw"):
-                success, msg = Bank.withdraw_money(account_no, pin, amount)
+                success, msg = Bank.withdraw_money(account_no, pin, to_paise(amount))
                 if success:
                     st.success(msg)
                 else:
@@ -940,7 +290,7 @@ def main():
                 amount = st.number_input("Amount", min_value=1, value=1000)
             desc = st.text_input("Description (Optional)")
             if st.form_submit_button("🔄 Transfer"):
-                success, msg = Bank.transfer_money(from_acc, pin, to_acc, amount, desc)
+                success, msg = Bank.transfer_money(from_acc, pin, to_acc, to_paise(amount), desc)
                 if success:
                     st.success(msg)
                     st.balloons()
@@ -991,7 +341,7 @@ def main():
                                                                   key=f"desc_{ben['id']}")
                                 if st.button(f"💸 Transfer ₹{transfer_amt:,.0f}", key=f"trans_{ben['id']}"):
                                     success, m = Bank.transfer_money(account_no, pin, ben['account'],
-                                                                     transfer_amt, transfer_desc)
+                                                                     to_paise(transfer_amt), transfer_desc)
                                     if success:
                                         st.success(m)
                                         st.balloons()
@@ -1047,7 +397,7 @@ def main():
                     st.error("❌ Please fill all details")
                 else:
                     success, msg = Bank.pay_bill(account_no, pin, bill_type, provider,
-                                                 bill_number, amount)
+                                                 bill_number, to_paise(amount))
                     if success:
                         st.success(msg)
                         st.balloons()
@@ -1072,7 +422,7 @@ def main():
                         "Date": b['date'][:10],
                         "Type": b['type'],
                         "Provider": b['provider'],
-                        "Amount": f"₹{b['amount']:,.0f}",
+                        "Amount": f"{format_inr(b['amount'])}",
                         "Status": b['status']
                     } for b in reversed(bills[-10:])]
                     st.dataframe(pd.DataFrame(bills_data), use_container_width=True, hide_index=True)
@@ -1109,7 +459,7 @@ def main():
                         st.error("❌ Please specify purpose")
                     else:
                         success, loan_id, emi = Bank.apply_loan(account_no, pin, loan_type,
-                                                                amount, tenure, purpose)
+                                                                to_paise(amount), tenure, purpose)
                         if success:
                             st.success("🎉 Loan Approved!")
                             st.balloons()
@@ -1119,7 +469,7 @@ def main():
                                     <h3 style='color: #155724;'>Loan Details</h3>
                                     <p style='color: #155724;'><b>ID:</b> {loan_id}</p>
                                     <p style='color: #155724;'><b>Amount:</b> ₹{amount:,.0f}</p>
-                                    <p style='color: #155724;'><b>EMI:</b> ₹{emi:,.2f}</p>
+                                    <p style='color: #155724;'><b>EMI:</b> {format_inr(emi, 2)}</p>
                                     <p style='color: #155724;'><b>Tenure:</b> {tenure} months</p>
                                 </div>
                             """, unsafe_allow_html=True)
@@ -1151,14 +501,14 @@ def main():
 
                                 col1, col2, col3 = st.columns(3)
                                 with col1:
-                                    st.metric("💵 Principal", f"₹{loan['principal']:,.0f}")
+                                    st.metric("💵 Principal", f"{format_inr(loan['principal'])}")
                                     st.metric("📊 Rate", f"{loan['interest_rate']}%")
                                 with col2:
-                                    st.metric("💳 EMI", f"₹{loan['emi']:,.2f}")
-                                    st.metric("💰 Interest", f"₹{loan['total_interest']:,.0f}")
+                                    st.metric("💳 EMI", f"{format_inr(loan['emi'], 2)}")
+                                    st.metric("💰 Interest", f"{format_inr(loan['total_interest'])}")
                                 with col3:
                                     st.metric("✅ Paid", f"{loan['paid_emis']}/{loan['tenure_months']}")
-                                    st.metric("⚠️ Outstanding", f"₹{loan['outstanding']:,.0f}")
+                                    st.metric("⚠️ Outstanding", f"{format_inr(loan['outstanding'])}")
 
                                 progress = (loan['paid_emis'] / loan['tenure_months']) * 100
                                 st.progress(min(progress / 100, 1.0))
@@ -1166,7 +516,7 @@ def main():
 
                                 col1, col2, col3 = st.columns(3)
                                 with col1:
-                                    st.info(f"💵 Balance: ₹{user['balance']:,.0f}")
+                                    st.info(f"💵 Balance: {format_inr(user['balance'])}")
                                 with col2:
                                     if user['balance'] >= loan['emi']:
                                         if st.button(f"💰 Pay EMI", key=f"emi_{loan['loan_id']}", type="primary"):
@@ -1199,9 +549,9 @@ def main():
                                 with st.expander(f"✅ {loan['type']} - {loan['loan_id']}"):
                                     col1, col2, col3 = st.columns(3)
                                     with col1:
-                                        st.metric("Principal", f"₹{loan['principal']:,.0f}")
+                                        st.metric("Principal", f"{format_inr(loan['principal'])}")
                                     with col2:
-                                        st.metric("Interest Paid", f"₹{loan['total_interest']:,.0f}")
+                                        st.metric("Interest Paid", f"{format_inr(loan['total_interest'])}")
                                     with col3:
                                         st.metric("Status", "CLOSED ✅")
                     else:
@@ -1231,11 +581,11 @@ def main():
                             with st.expander(f"🏦 {loan['type']} - {loan['loan_id']}", expanded=True):
                                 col1, col2, col3, col4 = st.columns(4)
                                 with col1:
-                                    st.metric("💵 Loan Amount", f"₹{loan['principal']:,.0f}")
+                                    st.metric("💵 Loan Amount", f"{format_inr(loan['principal'])}")
                                 with col2:
                                     st.metric("📊 Rate", f"{loan['interest_rate']}%")
                                 with col3:
-                                    st.metric("💳 EMI", f"₹{loan['emi']:,.2f}")
+                                    st.metric("💳 EMI", f"{format_inr(loan['emi'], 2)}")
                                 with col4:
                                     st.metric("⏳ Remaining", f"{loan['tenure_months'] - loan['paid_emis']} EMIs")
 
@@ -1243,7 +593,7 @@ def main():
                                 with col1:
                                     st.metric("✅ Paid", f"{loan['paid_emis']}/{loan['tenure_months']}")
                                 with col2:
-                                    st.metric("💰 Outstanding", f"₹{loan['outstanding']:,.0f}")
+                                    st.metric("💰 Outstanding", f"{format_inr(loan['outstanding'])}")
 
                                 progress = (loan['paid_emis'] / loan['tenure_months']) * 100
                                 st.progress(min(progress / 100, 1.0))
@@ -1260,13 +610,13 @@ def main():
                                 )
 
                                 if payment_type == "💰 Pay Single EMI":
-                                    st.warning(f"⚠️ EMI Amount: ₹{loan['emi']:,.2f} will be deducted")
-                                    st.info(f"💵 Your Balance: ₹{user['balance']:,.0f}")
+                                    st.warning(f"⚠️ EMI Amount: {format_inr(loan['emi'], 2)} will be deducted")
+                                    st.info(f"💵 Your Balance: {format_inr(user['balance'])}")
 
                                     if user['balance'] < loan['emi']:
-                                        st.error(f"❌ Insufficient balance! Need ₹{loan['emi']:,.2f}")
+                                        st.error(f"❌ Insufficient balance! Need {format_inr(loan['emi'], 2)}")
                                     else:
-                                        if st.button(f"✅ Confirm - Pay EMI ₹{loan['emi']:,.2f}",
+                                        if st.button(f"✅ Confirm - Pay EMI {format_inr(loan['emi'], 2)}",
                                                      key=f"pay_emi_{idx}", type="primary"):
                                             success, msg_result = Bank.pay_emi(account_no_pay, pin_pay, loan['loan_id'])
                                             if success:
@@ -1277,14 +627,14 @@ def main():
                                                 st.error(f"❌ {msg_result}")
 
                                 else:
-                                    st.warning(f"⚠️ Outstanding: ₹{loan['outstanding']:,.2f} will be deducted")
-                                    st.info(f"💵 Your Balance: ₹{user['balance']:,.0f}")
+                                    st.warning(f"⚠️ Outstanding: {format_inr(loan['outstanding'], 2)} will be deducted")
+                                    st.info(f"💵 Your Balance: {format_inr(user['balance'])}")
 
                                     if user['balance'] < loan['outstanding']:
-                                        st.error(f"❌ Insufficient balance! Need ₹{loan['outstanding']:,.2f}")
+                                        st.error(f"❌ Insufficient balance! Need {format_inr(loan['outstanding'], 2)}")
                                     else:
                                         confirm_close = st.checkbox(
-                                            f"I confirm closing loan by paying ₹{loan['outstanding']:,.2f}",
+                                            f"I confirm closing loan by paying {format_inr(loan['outstanding'], 2)}",
                                             key=f"confirm_close_{idx}"
                                         )
                                         if confirm_close:
@@ -1385,18 +735,18 @@ def main():
             st.markdown("---")
 
             if st.button("🧮 Calculate EMI", use_container_width=True, type="primary"):
-                emi, total, interest = Bank.calculate_emi(calc_amount, calc_rate, calc_tenure)
+                emi, total, interest = Bank.calculate_emi(to_paise(calc_amount), calc_rate, calc_tenure)
 
                 st.markdown("### 💰 Results")
 
                 col1, col2, col3 = st.columns(3)
                 with col1:
-                    st.metric("📅 Monthly EMI", f"₹{emi:,.2f}")
+                    st.metric("📅 Monthly EMI", f"{format_inr(emi, 2)}")
                 with col2:
-                    st.metric("💵 Total Payment", f"₹{total:,.2f}",
-                              delta=f"+₹{total - calc_amount:,.2f}")
+                    st.metric("💵 Total Payment", f"{format_inr(total, 2)}",
+                              delta=f"+{format_inr(total - to_paise(calc_amount), 2)}")
                 with col3:
-                    st.metric("📊 Total Interest", f"₹{interest:,.2f}")
+                    st.metric("📊 Total Interest", f"{format_inr(interest, 2)}")
 
                 st.markdown("---")
                 col1, col2 = st.columns([1, 1])
@@ -1406,17 +756,17 @@ def main():
                     summary = {
                         "Parameter": ["Principal", "Rate", "Tenure", "EMI", "Interest", "Total"],
                         "Value": [f"₹{calc_amount:,.0f}", f"{calc_rate}% p.a.",
-                                  f"{calc_tenure} months", f"₹{emi:,.2f}",
-                                  f"₹{interest:,.2f}", f"₹{total:,.2f}"]
+                                  f"{calc_tenure} months", f"{format_inr(emi, 2)}",
+                                  f"{format_inr(interest, 2)}", f"{format_inr(total, 2)}"]
                     }
                     st.dataframe(pd.DataFrame(summary), hide_index=True, use_container_width=True)
 
-                    st.info(f"💡 Recommended Income: ₹{emi * 3:,.0f}+")
+                    st.info(f"💡 Recommended Income: {format_inr(emi * 3)}+")
 
                 with col2:
                     st.markdown("##### 📊 Breakdown")
                     fig = px.pie(
-                        values=[calc_amount, interest],
+                        values=[calc_amount, interest / PAISE],
                         names=['Principal', 'Interest'],
                         color_discrete_sequence=['#667eea', '#f5365c'],
                         hole=0.4
@@ -1439,20 +789,20 @@ def main():
                 with col1:
                     st.metric("Name", user['name'])
                 with col2:
-                    st.metric("Balance", f"₹{user['balance']:,.0f}")
+                    st.metric("Balance", f"{format_inr(user['balance'])}")
                 with col3:
                     st.metric("Account", user['accountNo'])
 
                 st.info(f"📧 {user['email']} | 📱 {user.get('mobile', 'N/A')}")
 
                 if user.get('transactions'):
-                    txn_data = [{"Type": t['type'], "Amount": f"₹{t['amount']:,.0f}",
+                    txn_data = [{"Type": t['type'], "Amount": f"{format_inr(t['amount'])}",
                                  "Date": t['date']} for t in reversed(user['transactions'][-10:])]
                     st.dataframe(pd.DataFrame(txn_data), use_container_width=True, hide_index=True)
             else:
                 st.error(msg)
 
-    elif "Analytics" in menu_clean:
+    elif menu_clean == "Analytics":
         st.markdown("### 📈 Analytics")
         col1, col2 = st.columns(2)
         with col1:
@@ -1463,19 +813,42 @@ def main():
         if st.button("View Analytics"):
             user, msg = Bank.get_details(account_no, pin)
             if user and user.get('transactions'):
-                txns = user['transactions']
-                col1, col2 = st.columns(2)
-                with col1:
-                    fig = create_transaction_chart(txns)
-                    if fig:
-                        st.plotly_chart(fig, use_container_width=True)
-                with col2:
-                    fig = create_transaction_pie_chart(txns)
-                    if fig:
-                        st.plotly_chart(fig, use_container_width=True)
+                st.session_state.analytics = (account_no, pin)
             else:
+                st.session_state.analytics = None
                 st.error(msg if not user else "No transactions")
 
+        if st.session_state.get('analytics'):
+            # The range and detail controls rerun the page, which re-queries
+            # just that window at up to the chosen number of points
+            account_no, pin = st.session_state.analytics
+            user, _ = Bank.get_details(account_no, pin)
+            span = ledger_span(user) if user else None
+            start = end = None
+            points, method = CHART_POINTS, "lttb"
+            if span and span[0] < span[1]:
+                first, last = to_datetime(span[0]), to_datetime(span[1])
+                col1, col2, col3 = st.columns([3, 1, 1])
+                with col1:
+                    start, end = st.slider("Range", min_value=first, max_value=last, value=(first, last),
+                                           format="YYYY-MM-DD", key=f"range_{account_no}")
+                with col2:
+                    points = st.select_slider("Detail", [250, 500, 1000, 2000, 4000], value=CHART_POINTS)
+                with col3:
+                    method = st.selectbox("Sampling", ["lttb", "minmax"],
+                                          help="lttb keeps the line's shape; minmax keeps every peak and dip")
+            series, _ = Bank.balance_series(account_no, pin, start, end, points, method)
+            col1, col2 = st.columns(2)
+            with col1:
+                fig = create_transaction_chart(series)
+                if fig:
+                    st.plotly_chart(fig, use_container_width=True)
+            with col2:
+                type_counts, _ = Bank.transaction_types(account_no, pin)
+                fig = create_transaction_pie_chart(type_counts)
+                if fig:
+                    st.plotly_chart(fig, use_container_width=True)
+
     elif "Search" in menu_clean:
         st.markdown("### 🔍 Search Transactions")
         with st.form("search"):
@@ -1494,7 +867,7 @@ def main():
             filtered, msg = Bank.filter_transactions(account_no, pin, start_dt, end_dt)
             if filtered:
                 st.success(f"Found {len(filtered)} transactions")
-                txn_data = [{"Type": t['type'], "Amount": f"₹{t['amount']:,.0f}",
+                txn_data = [{"Type": t['type'], "Amount": f"{format_inr(t['amount'])}",
                              "Date": t['date']} for t in reversed(filtered)]
                 st.dataframe(pd.DataFrame(txn_data), use_container_width=True, hide_index=True)
             else:
@@ -1564,18 +937,28 @@ def main():
 
                             col1, col2, col3 = st.columns(3)
                             with col1:
-                                st.metric("Target", f"₹{goal['target_amount']:,.0f}")
+                                st.metric("Target", f"{format_inr(goal['target_amount'])}")
                             with col2:
-                                st.metric("Saved", f"₹{goal['current_amount']:,.0f}")
+                                st.metric("Saved", f"{format_inr(goal['current_amount'])}")
                             with col3:
-                                st.metric("Remaining", f"₹{goal['target_amount'] - goal['current_amount']:,.0f}")
+                                st.metric("Remaining", f"{format_inr(goal['target_amount'] - goal['current_amount'])}")
 
                             st.progress(min(progress / 100, 1.0))
 
+                            sweep = goal.get('sweep')
+                            if sweep and goal['status'] != 'completed':
+                                if sweep['mode'] == 'fixed':
+                                    st.caption(f"🔁 Auto-sweep {format_inr(sweep['value'])} {sweep['period']} "
+                                               f"| Next: {sweep['next_run']}")
+                                elif sweep['mode'] == 'percent':
+                                    st.caption(f"🔁 Auto-sweep {sweep['value']}% of incoming money")
+                                else:
+                                    st.caption(f"🔁 Round-up spends to nearest {format_inr(sweep['value'])}")
+
                             if goal['status'] != 'completed':
                                 amt = st.number_input(f"Amount", min_value=1, value=100, key=f"c_{goal['id']}")
                                 if st.button(f"Add ₹{amt:,.0f}", key=f"b_{goal['id']}"):
-                                    success, m = Bank.contribute_to_goal(account_no, pin, goal['id'], amt)
+                                    success, m = Bank.contribute_to_goal(account_no, pin, goal['id'], to_paise(amt))
                                     if success:
                                         st.success(m)
                                         st.rerun()
@@ -1598,12 +981,27 @@ def main():
                     target = st.number_input("Target", min_value=1, value=10000)
                 with col2:
                     deadline = st.date_input("Deadline", min_value=datetime.now())
+
+                sweep_modes = {"None": None, "Fixed amount per period": "fixed",
+                               "% of incoming money": "percent", "Round-up spends": "roundup"}
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    sweep_label = st.selectbox("🔁 Auto-sweep", list(sweep_modes.keys()))
+                with col2:
+                    sweep_value = st.number_input("Amount / % / Round-up to", min_value=1, value=10)
+                with col3:
+                    sweep_period = st.selectbox("Period (fixed only)", list(SWEEP_PERIODS.keys()), index=2)
                 if st.form_submit_button("Create Goal"):
-                    success, msg = Bank.add_savings_goal(account_no, pin, goal_name, target,
-                                                         deadline.strftime("%Y-%m-%d"))
+                    sweep_mode = sweep_modes[sweep_label]
+                    success, msg = Bank.add_savings_goal(account_no, pin, goal_name, to_paise(target),
+                                                         deadline.strftime("%Y-%m-%d"), sweep_mode,
+                                                         sweep_value if sweep_mode == 'percent' else to_paise(sweep_value),
+                                                         sweep_period)
                     if success:
                         st.success(msg)
                         st.balloons()
+                    else:
+                        st.error(msg)
 
     elif "Update" in menu_clean:
         st.markdown("### ✏️ Update Details")
@@ -1645,6 +1043,153 @@ def main():
                     else:
                         st.error(msg)
 
+    elif "Bank Analytics" in menu_clean:
+        st.markdown("### 🏛️ Bank Analytics")
+        if st.button("🔄 Refresh views"):
+            with st.spinner("Folding in new transactions…"):
+                success, msg = Bank.refresh_views()
+            (st.success if success else st.error)(msg)
+        dashboard, msg = Bank.bank_views()
+        if not dashboard:
+            st.info(msg)
+        else:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Transactions", f"{dashboard['transactions']:,}")
+            with col2:
+                st.metric("Accounts", f"{dashboard['accounts']:,}")
+            with col3:
+                st.metric("Views refreshed", dashboard['refreshed_at'])
+
+            days = sorted(dashboard['daily'])
+            if days:
+                first = datetime.strptime(days[0], "%Y-%m-%d").date()
+                last = datetime.strptime(days[-1], "%Y-%m-%d").date()
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    start, end = st.slider("Days", min_value=first, max_value=last,
+                                           value=(max(first, last - timedelta(days=90)), last))
+                with col2:
+                    measure = st.radio("Measure", ["Amount", "Count"], horizontal=True)
+                rows = [{"Date": day, "Type": kind.replace('_', ' ').title(),
+                         "Amount": amount / PAISE, "Count": count}
+                        for day in days if str(start) <= day <= str(end)
+                        for kind, (count, amount) in dashboard['daily'][day].items()]
+                fig = px.bar(pd.DataFrame(rows), x="Date", y=measure, color="Type",
+                             title=f"Daily volume by type ({measure.lower()})")
+                fig.update_layout(height=420, bargap=0.05)
+                st.plotly_chart(fig, use_container_width=True)
+
+            col1, col2 = st.columns(2)
+            for col, key, title in ((col1, 'top_senders', "📤 Top senders"),
+                                    (col2, 'top_receivers', "📥 Top receivers")):
+                with col:
+                    st.markdown(f"#### {title}")
+                    st.dataframe(pd.DataFrame([{"Account": no, "Name": name, "Transfers": count,
+                                                "Amount": format_inr(amount)}
+                                               for no, name, count, amount in dashboard[key][:20]]),
+                                 use_container_width=True, hide_index=True)
+
+            col1, col2 = st.columns(2)
+            with col1:
+                if dashboard['bills']:
+                    bills = pd.DataFrame([{"Provider": desc, "Amount": amount / PAISE, "Payments": count}
+                                          for desc, count, amount in dashboard['bills'][:15]])
+                    fig = px.bar(bills, x="Amount", y="Provider", orientation="h", hover_data=["Payments"],
+                                 title="Bill payments by provider")
+                    fig.update_layout(height=420, yaxis={'categoryorder': 'total ascending'})
+                    st.plotly_chart(fig, use_container_width=True)
+            with col2:
+                hours = pd.DataFrame([{"Hour": f"{hour:02d}:00", "Deposits": count, "Amount": amount / PAISE}
+                                      for hour, (count, amount) in enumerate(dashboard['deposit_hours'])])
+                fig = px.bar(hours, x="Hour", y="Deposits", hover_data=["Amount"], title="Deposits by hour")
+                fig.update_layout(height=420)
+                st.plotly_chart(fig, use_container_width=True)
+
+    elif "Fraud Review" in menu_clean:
+        st.markdown("### 🚨 Fraud Review")
+        st.caption("Transactions the fraud rules blocked or flagged, newest first.")
+        status = st.radio("Show", ["open", "cleared", "confirmed", "all"], horizontal=True)
+        alerts, _ = Bank.review_alerts(None if status == "all" else status)
+        if not alerts:
+            st.info("No alerts")
+        else:
+            st.dataframe(pd.DataFrame([{"ID": a['id'], "Date": a['date'], "Account": a['account'], "Name": a['name'],
+                                        "Flow": a['flow'].title(), "Amount": format_inr(a['amount']),
+                                        "Action": a['action'], "Rules": ", ".join(h['rule'] for h in a['hits']),
+                                        "Status": a['status']} for a in alerts[:500]]),
+                         use_container_width=True, hide_index=True)
+            pending = [a for a in alerts if a['status'] == "open"]
+            if pending:
+                st.markdown("#### Review")
+                alert = st.selectbox("Alert", pending, format_func=lambda a: f"{a['id']} | {a['date']} | "
+                                     f"{a['account']} | {a['flow']} {format_inr(a['amount'])}")
+                for hit in alert['hits']:
+                    st.write(f"**{hit['rule']}** ({hit['action']}): {hit['message']}")
+                note = st.text_input("Note")
+                col1, col2 = st.columns(2)
+                for col, decision, label in ((col1, "cleared", "✅ Clear"), (col2, "confirmed", "🚫 Confirm fraud")):
+                    with col:
+                        if st.button(label, use_container_width=True):
+                            success, msg = Bank.resolve_alert(alert['id'], decision, note)
+                            (st.success if success else st.error)(msg)
+                            if success:
+                                st.rerun()
+
+    elif "Metrics" in menu_clean:
+        st.markdown("### 📉 Metrics")
+        st.caption("Since this server process started, across every session it serves.")
+        rows = metrics.summary()
+        if rows:
+            st.dataframe(pd.DataFrame(rows).round(2), use_container_width=True, hide_index=True)
+        else:
+            st.info("No operations yet")
+
+        headers = metrics.headers_loaded.get()
+        bodies = metrics.bodies_loaded.get()
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            read = sum(metrics.read_bytes.values.values())
+            st.metric("Read", f"{read / 2 ** 20:,.1f} MiB", f"parse {metrics.parse_seconds.get():.2f} s",
+                      delta_color="off")
+        with col2:
+            st.metric("Written", f"{metrics.written_bytes.get() / 2 ** 20:,.1f} MiB",
+                      f"serialize {metrics.serialize_seconds.get():.2f} s", delta_color="off")
+        with col3:
+            st.metric("Bodies loaded", f"{bodies:,} / {headers:,}",
+                      f"{bodies / headers:.0%} of headers" if headers else None, delta_color="off")
+        with col4:
+            stats = lock_stats.snapshot()
+            st.metric("Write lock", f"{stats['acquired']:,} writes",
+                      f"{stats['contended']:,} queued, {stats['conflicts']:,} conflicts", delta_color="off")
+
+        st.download_button("📥 Prometheus text", metrics.render(), "bank_metrics.prom", "text/plain")
+        if st.button("Reset counters"):
+            metrics.REGISTRY.reset()
+            st.rerun()
+
+        st.markdown("#### 🔥 Profile")
+        st.caption("Samples every thread of this server (all sessions) and writes a flame graph profile.")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            seconds = st.number_input("Seconds", min_value=1, max_value=300, value=30)
+        with col2:
+            fmt = st.selectbox("Format", ["speedscope", "collapsed"])
+        with col3:
+            directory = st.text_input("Directory", os.environ.get("BANK_PROFILE_DIR", "profiles"))
+        if profiler.is_running():
+            st.info(f"Profiling into {profiler.last_path}…")
+            if st.button("Stop"):
+                profiler.stop_profile()
+                st.rerun()
+        elif st.button("Start profile"):
+            os.makedirs(directory, exist_ok=True)
+            success, msg = profiler.start_profile(seconds, profiler.default_path(directory, fmt))
+            (st.success if success else st.error)(msg)
+        if not profiler.is_running() and profiler.last_path and os.path.exists(profiler.last_path):
+            with open(profiler.last_path, 'rb') as fs:
+                st.download_button("📥 Last profile", fs.read(), os.path.basename(profiler.last_path))
+
     st.markdown("---")
     st.markdown("""
         <div style='text-align: center; color: #6c757d;'>
@@ -1653,6 +1198,9 @@ def main():
         </div>
     """, unsafe_allow_html=True)
 
+    if os.environ.get("BANK_METRICS_FILE"):
+        metrics.write_textfile(os.environ["BANK_METRICS_FILE"])
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,73 @@
+"""Sustained card authorizations per second against in-memory state.
+
+    python benchmarks/bench_card_auth.py --accounts 100000 --auths 200000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bank import CardAuthorizer  # noqa: E402
+
+
+def build_accounts(count, seed):
+    rng = random.Random(seed)
+    data = []
+    for i in range(count):
+        data.append({
+            "name": f"User {i}",
+            "accountNo": f"BENCH{i:06d}",
+            "balance": 10 ** 9,
+            "transactions": [],
+            "virtual_card": {
+                "card_number": f"4{i:015d}",
+                "cvv": f"{rng.randint(0, 999):03d}",
+                "expiry": "12/99",
+                "card_holder": f"USER {i}"
+            }
+        })
+    return data
+
+
+def percentile(sorted_values, pct):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=100000)
+    parser.add_argument("--auths", type=int, default=200000)
+    parser.add_argument("--budget-us", type=float, default=1000.0, help="p99 latency budget in microseconds")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    data = build_accounts(args.accounts, args.seed)
+    authorizer = CardAuthorizer(data)
+    rng = random.Random(args.seed)
+    cards = [(u['virtual_card']['card_number'], u['virtual_card']['cvv']) for u in data]
+
+    latencies = []
+    clock = time.perf_counter_ns
+    started = clock()
+    for _ in range(args.auths):
+        card_number, cvv = cards[rng.randrange(len(cards))]
+        t0 = clock()
+        approved, _ = authorizer.authorize(card_number, cvv, "12/99", 250, "Bench Store")
+        latencies.append(clock() - t0)
+        assert approved
+    elapsed = (clock() - started) / 1e9
+
+    latencies.sort()
+    p99_us = percentile(latencies, 99) / 1000
+    print(f"accounts      {args.accounts:,}")
+    print(f"authorizations {args.auths:,} in {elapsed:.2f}s -> {args.auths / elapsed:,.0f}/s")
+    print(f"latency us    p50={percentile(latencies, 50) / 1000:.1f} p99={p99_us:.1f} "
+          f"max={latencies[-1] / 1000:.1f}")
+    print(f"budget        {'OK' if p99_us <= args.budget_us else 'EXCEEDED'} (p99 <= {args.budget_us:.0f}us)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Save/load time and file size of the book under each available codec.
+
+    python benchmarks/bench_codecs.py --accounts 2000 --transactions 200
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bank import Account, Transaction  # noqa: E402
+from bank.codecs import available  # noqa: E402
+from bank.storage import JsonStorage  # noqa: E402
+
+TYPES = ["deposit", "withdrawal", "transfer_out", "transfer_in", "bill_payment", "emi_payment"]
+DESCRIPTIONS = ["Cash Deposit", "Cash Withdrawal", "Money Transfer", "Electricity - UPPCL", "EMI Paid - Home Loan"]
+
+
+def build_book(accounts, per_account, seed):
+    rng = random.Random(seed)
+    book = []
+    for i in range(accounts):
+        balance = 0
+        history = []
+        for j in range(per_account):
+            amount = rng.randint(100, 5000000)
+            balance += amount
+            history.append(Transaction(rng.choice(TYPES), amount, 1700000000 + j * 3600, balance,
+                                       rng.choice(DESCRIPTIONS)))
+        book.append(Account(name=f"User {i}", age=30, email=f"user{i}@example.com", mobile="9876543210",
+                            address="Delhi", pin="0" * 64, accountNo=f"BNCH{i:06d}", balance=balance,
+                            created_at="2024-01-01 00:00:00", transactions=history, savings_goals=[],
+                            beneficiaries=[], loans=[], bills=[], money_unit="paise"))
+    return book
+
+
+def best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=2000)
+    parser.add_argument("--transactions", type=int, default=200, help="per account")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    book = build_book(args.accounts, args.transactions, args.seed)
+    print(f"book  {args.accounts:,} accounts x {args.transactions:,} transactions")
+    print(f"{'codec':<20} {'size MiB':>9} {'save s':>8} {'load s':>8}")
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for spec in available():
+            storage = JsonStorage(os.path.join(tmp, f"data.{spec}"), spec)
+            save = best_of(args.repeat, lambda: storage.save(book))
+            load = best_of(args.repeat, storage.load)
+            assert len(storage.load()) == len(book)
+            size = os.path.getsize(storage.path)
+            baseline = baseline or (size, save, load)
+            print(f"{spec:<20} {size / 2 ** 20:>9.1f} {save:>8.2f} {load:>8.2f}"
+                  f"   ({size / baseline[0]:.2f}x size, {save / baseline[1]:.2f}x save, "
+                  f"{load / baseline[2]:.2f}x load vs json-pretty)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Fraud-rule latency per transaction, alone and as a share of the transfer path.
+
+    python benchmarks/bench_fraud_rules.py --accounts 20000 --screens 200000
+    python benchmarks/bench_fraud_rules.py --transfers 200 --budget-pct 5
+
+First bank.fraud.screen() plus record() run on in-memory accounts whose
+velocity windows are already full, on a simulated clock. Then real transfers
+on a generated book are timed with the rules on and off; the screen's p50 is
+reported as a share of the transfer's p50 and checked against --budget-pct.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bank import Bank, IdAllocator, fraud  # noqa: E402
+from bank.records import now_timestamp  # noqa: E402
+from synthetic import PIN, generate, write_bank  # noqa: E402
+
+FLOWS = ("deposit", "withdrawal", "transfer")
+TXN_TYPES = {flow: txn_type for txn_type, flow in fraud.FLOWS.items()}
+
+
+def percentile(sorted_values, pct):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+
+def bench_screen(accounts, screens, rng):
+    # Each account gets a day of traffic first, so every window has all its buckets
+    ts = now_timestamp() - 86400
+    for user in accounts:
+        for step in range(0, 86400, 3000):
+            flow = rng.choice(FLOWS)
+            fraud.record(user, TXN_TYPES[flow], rng.randint(100, 50000), ts + step)
+    ts += 86400
+    clock = time.perf_counter_ns
+    latencies = []
+    blocked = flagged = 0
+    for _ in range(screens):
+        user = accounts[rng.randrange(len(accounts))]
+        flow = rng.choice(FLOWS)
+        amount = rng.randint(100, 3000000)
+        recipient = rng.choice(user.beneficiaries)['account'] if flow == "transfer" and user.beneficiaries else None
+        ts += rng.randint(0, 2)
+        t0 = clock()
+        message, hits = fraud.screen(user, flow, amount, ts, recipient)
+        if message is None:
+            fraud.record(user, TXN_TYPES[flow], amount, ts)
+        latencies.append(clock() - t0)
+        blocked += message is not None
+        flagged += message is None and bool(hits)
+    latencies.sort()
+    return latencies, blocked, flagged
+
+
+def time_transfers(numbers, count, rng):
+    timings = []
+    for _ in range(count):
+        sender, recipient = rng.sample(numbers, 2)
+        start = time.perf_counter_ns()
+        Bank.transfer_money(sender, PIN, recipient, rng.randint(100, 10000))
+        timings.append(time.perf_counter_ns() - start)
+    timings.sort()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=20000)
+    parser.add_argument("--screens", type=int, default=200000)
+    parser.add_argument("--book-accounts", type=int, default=2000, help="size of the book for timed transfers")
+    parser.add_argument("--transactions", type=int, default=100, help="per account in that book")
+    parser.add_argument("--transfers", type=int, default=200, help="timed transfers with rules on and off")
+    parser.add_argument("--budget-pct", type=float, default=5.0, help="max screen p50 as a share of transfer p50")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        ids = IdAllocator(os.path.join(tmp, "ids"), block_size=4096)
+        accounts = list(generate(ids, args.accounts, 0, loans=0, bills=0, goals=0, beneficiaries=3.0,
+                                 seed=args.seed))
+    latencies, blocked, flagged = bench_screen(accounts, args.screens, rng)
+    screen_p50 = percentile(latencies, 50)
+    print(f"accounts      {args.accounts:,} with full hour and day windows")
+    print(f"screens       {args.screens:,}: {blocked:,} blocked, {flagged:,} flagged, "
+          f"{sum(latencies) / 1e9:.2f}s -> {args.screens / (sum(latencies) / 1e9):,.0f}/s")
+    print(f"screen us     p50={screen_p50 / 1000:.1f} p99={percentile(latencies, 99) / 1000:.1f} "
+          f"max={latencies[-1] / 1000:.1f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        Bank.database = os.path.join(tmp, "data.json")
+        numbers = write_bank(Bank.database, args.book_accounts, args.transactions, seed=args.seed)
+        time_transfers(numbers, 5, rng)  # warm-up
+        results = {}
+        for label, rules in (("off", ()), ("on", fraud.RULES)):
+            Bank.fraud_rules = rules
+            results[label] = time_transfers(numbers, args.transfers, rng)
+        Bank.fraud_rules = fraud.RULES
+    transfer_p50 = percentile(results["on"], 50)
+    print(f"transfer ms   {args.book_accounts:,} accounts x {args.transactions} transactions: "
+          + ", ".join(f"rules {label} p50={percentile(t, 50) / 1e6:.2f} p99={percentile(t, 99) / 1e6:.2f}"
+                      for label, t in results.items()))
+    share = 100 * screen_p50 / transfer_p50
+    print(f"budget        {'OK' if share <= args.budget_pct else 'EXCEEDED'} "
+          f"(screen is {share:.2f}% of a transfer, limit {args.budget_pct:g}%)")
+
+
+if __name__ == "__main__":
+    main()
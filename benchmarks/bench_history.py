@@ -0,0 +1,94 @@
+"""Size and load time of the book with per-entry ledgers vs column-encoded History.
+
+    python benchmarks/bench_history.py --accounts 2000 --transactions 200
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bank import Account, Transaction  # noqa: E402
+from bank.codecs import Codec  # noqa: E402
+from bank.records import record_to_json  # noqa: E402
+from bank.storage import JsonStorage  # noqa: E402
+
+TYPES = ["deposit", "withdrawal", "transfer_out", "transfer_in", "bill_payment", "emi_payment"]
+DEBITS = {"withdrawal", "transfer_out", "bill_payment", "emi_payment"}
+DESCRIPTIONS = ["Cash Deposit", "Cash Withdrawal", "Money Transfer", "Electricity - UPPCL", "EMI Paid - Home Loan"]
+
+
+def build_book(accounts, per_account, seed):
+    rng = random.Random(seed)
+    book = []
+    for i in range(accounts):
+        balance = 0
+        ts = 1700000000
+        history = []
+        for _ in range(per_account):
+            txn_type = rng.choice(TYPES)
+            amount = rng.randint(100, 5000000)
+            if txn_type in DEBITS and amount > balance:
+                txn_type = "deposit"
+            balance += -amount if txn_type in DEBITS else amount
+            ts += rng.randint(60, 86400)
+            history.append(Transaction(txn_type, amount, ts, balance, rng.choice(DESCRIPTIONS)))
+        book.append(Account(name=f"User {i}", age=30, email=f"user{i}@example.com", mobile="9876543210",
+                            address="Delhi", pin="0" * 64, accountNo=f"BNCH{i:06d}", balance=balance,
+                            created_at="2024-01-01 00:00:00", transactions=history, savings_goals=[],
+                            beneficiaries=[], loans=[], bills=[], money_unit="paise"))
+    return book
+
+
+def best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def read_all(storage):
+    return sum(txn.amount for user in storage.load() for txn in user['transactions'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=2000)
+    parser.add_argument("--transactions", type=int, default=200, help="per account")
+    parser.add_argument("--codec", default="auto")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    book = build_book(args.accounts, args.transactions, args.seed)
+    spec = Codec(args.codec).spec
+    print(f"book  {args.accounts:,} accounts x {args.transactions:,} transactions, codec {spec}")
+    print(f"{'ledger':<10} {'size MiB':>9} {'load s':>8} {'load+scan s':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        # The pre-History layout: one JSON object per entry
+        entries = JsonStorage(os.path.join(tmp, "entries.json"), args.codec)
+        with open(entries.path, 'w') as fs:
+            json.dump(book, fs, separators=(",", ":"), default=record_to_json)
+        columns = JsonStorage(os.path.join(tmp, "columns.json"), args.codec)
+        columns.save(book)
+        baseline = None
+        for label, storage in (("entries", entries), ("columns", columns)):
+            assert read_all(storage) == read_all(entries)
+            size = os.path.getsize(storage.path)
+            load = best_of(args.repeat, storage.load)
+            scan = best_of(args.repeat, lambda: read_all(storage))
+            baseline = baseline or (size, load, scan)
+            print(f"{label:<10} {size / 2 ** 20:>9.1f} {load:>8.2f} {scan:>12.2f}"
+                  f"   ({baseline[0] / size:.1f}x smaller, {baseline[1] / load:.1f}x faster load, "
+                  f"{baseline[2] / scan:.1f}x faster load+scan)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Cold-start cost of importing the headless core vs the Streamlit app module.
+
+    python benchmarks/bench_import_time.py --runs 10
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("streamlit", "pandas", "plotly", "reportlab")
+
+PROBE = (
+    "import sys, time; t = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - t, ','.join(m for m in {heavy!r} if m in sys.modules))"
+)
+
+
+def cold_import(module, runs):
+    timings, loaded = [], ""
+    for _ in range(runs):
+        started = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY)], cwd=ROOT,
+                             capture_output=True, text=True)
+        wall = time.perf_counter() - started
+        if out.returncode != 0:
+            return None, None, out.stderr.strip().splitlines()[-1]
+        import_time, _, loaded = out.stdout.strip().partition(" ")
+        timings.append((float(import_time), wall))
+    timings.sort()
+    return timings[len(timings) // 2], loaded or "-", None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'module':<28}{'import ms':>10}{'process ms':>12}  heavy modules loaded")
+    for module in ("bank", "bank.cards", "bank_management_system"):
+        timing, loaded, error = cold_import(module, args.runs)
+        if error:
+            print(f"{module:<28}{'n/a':>10}{'n/a':>12}  {error}")
+            continue
+        print(f"{module:<28}{timing[0] * 1000:>10.1f}{timing[1] * 1000:>12.1f}  {loaded}")
+
+
+if __name__ == "__main__":
+    main()
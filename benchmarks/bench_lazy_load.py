@@ -0,0 +1,76 @@
+"""Login and deposit latency on a single-document book vs a paged book (bank.book).
+
+    python benchmarks/bench_lazy_load.py --accounts 2000 --transactions 200
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bank import Account, Bank, Transaction  # noqa: E402
+from bank.codecs import Codec  # noqa: E402
+from bank.storage import JsonStorage  # noqa: E402
+
+TYPES = ["deposit", "transfer_in", "bill_payment"]
+PIN = "1234"
+
+
+def build_book(accounts, per_account, seed):
+    rng = random.Random(seed)
+    pin = Bank._hash_pin(PIN)
+    book = []
+    for i in range(accounts):
+        balance = 0
+        history = []
+        for j in range(per_account):
+            amount = rng.randint(100, 5000000)
+            balance += amount
+            history.append(Transaction(rng.choice(TYPES), amount, 1700000000 + j * 3600, balance, "Synthetic"))
+        bills = [{"id": k, "biller": "Electricity", "amount": 150000, "due_date": "2024-06-01", "status": "pending"}
+                 for k in range(5)]
+        book.append(Account(name=f"User {i}", age=30, email=f"user{i}@example.com", mobile="9876543210",
+                            address="Delhi", pin=pin, accountNo=f"BNCH{i:06d}", balance=balance,
+                            created_at="2024-01-01 00:00:00", transactions=history, savings_goals=[],
+                            beneficiaries=[], loans=[], bills=bills, money_unit="paise"))
+    return book
+
+
+def mean_ms(repeat, func):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=2000)
+    parser.add_argument("--transactions", type=int, default=200, help="per account")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    book = build_book(args.accounts, args.transactions, args.seed)
+    account_no = book[len(book) // 2]['accountNo']
+    print(f"book  {args.accounts:,} accounts x {args.transactions:,} transactions")
+    print(f"{'layout':<10} {'size MiB':>9} {'login ms':>9} {'deposit ms':>11}")
+    # One account deposits --repeat times; velocity limits would refuse most of them
+    Bank.fraud_rules = ()
+    with tempfile.TemporaryDirectory() as tmp:
+        # json-pretty is always written as one document; orjson/json as a paged book
+        paged = Codec("auto").spec
+        for label, spec in (("document", "json-pretty"), ("paged", paged)):
+            Bank.database = os.path.join(tmp, f"data.{spec}")
+            Bank.codec = spec
+            JsonStorage(Bank.database, spec).save(book)
+            login = mean_ms(args.repeat, lambda: Bank.get_details(account_no, PIN))
+            deposit = mean_ms(args.repeat, lambda: Bank.deposit_money(account_no, PIN, 100))
+            print(f"{label:<10} {os.path.getsize(Bank.database) / 2 ** 20:>9.1f} {login:>9.1f} {deposit:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Resident memory of transaction history: JSON dicts vs slotted records.
+
+    python benchmarks/bench_record_memory.py --transactions 1000000
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bank import Transaction  # noqa: E402
+
+TYPES = ["deposit", "withdrawal", "transfer_out", "transfer_in", "bill_payment", "emi_payment"]
+
+
+def build_json(count, seed):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    balance = 0
+    history = []
+    for i in range(count):
+        amount = rng.randint(1, 50000)
+        balance += amount
+        history.append({
+            "type": rng.choice(TYPES),
+            "amount": amount,
+            "date": (start + timedelta(minutes=7 * i)).strftime("%Y-%m-%d %H:%M:%S"),
+            "balance": balance,
+            "description": rng.choice(["Cash Deposit", "Cash Withdrawal", "Money Transfer", "Electricity - UPPCL"])
+        })
+    return json.dumps(history)
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--transactions", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    text = build_json(args.transactions, args.seed)
+    dicts, dict_bytes = measure(lambda: json.loads(text))
+    del dicts
+    records, record_bytes = measure(lambda: [Transaction.from_dict(t) for t in json.loads(text)])
+    del records
+
+    per_million = 1000000 / args.transactions
+    print(f"transactions  {args.transactions:,}")
+    print(f"dicts         {dict_bytes * per_million / 2 ** 20:,.1f} MiB per million")
+    print(f"records       {record_bytes * per_million / 2 ** 20:,.1f} MiB per million")
+    print(f"saving        {(dict_bytes - record_bytes) * per_million / 2 ** 20:,.1f} MiB per million "
+          f"({100 * (1 - record_bytes / dict_bytes):.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Reporting worker startup and memory: parsing the JSON book vs mapping a snapshot.
+
+    python benchmarks/bench_snapshot.py --accounts 2000 --transactions 200 --workers 8
+"""
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bank import Account, Transaction  # noqa: E402
+from bank.snapshot import SnapshotReader, write_snapshot  # noqa: E402
+from bank.storage import JsonStorage  # noqa: E402
+
+TYPES = ["deposit", "withdrawal", "transfer_out", "transfer_in", "bill_payment", "emi_payment"]
+
+
+def build_book(accounts, per_account, seed):
+    rng = random.Random(seed)
+    book = []
+    for i in range(accounts):
+        balance = 0
+        history = []
+        for j in range(per_account):
+            amount = rng.randint(100, 5000000)
+            balance += amount
+            history.append(Transaction(rng.choice(TYPES), amount, 1700000000 + j * 3600, balance, "Synthetic"))
+        book.append(Account(name=f"User {i}", accountNo=f"BNCH{i:06d}", balance=balance, pin="x",
+                            transactions=history))
+    return book
+
+
+def json_worker(path):
+    start = time.perf_counter()
+    data = JsonStorage(path).load()
+    total = sum(u['balance'] for u in data)
+    totals = {}
+    for user in data:
+        for txn in user['transactions']:
+            totals[txn.type] = totals.get(txn.type, 0) + txn.amount
+    elapsed = time.perf_counter() - start
+    return elapsed, total, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def snapshot_worker(path):
+    start = time.perf_counter()
+    with SnapshotReader(path) as snap:
+        total = snap.total_balance()
+        snap.type_totals()
+    elapsed = time.perf_counter() - start
+    return elapsed, total, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run(worker, path, workers):
+    with Pool(workers, maxtasksperchild=1) as pool:
+        results = pool.map(worker, [path] * workers)
+    return (max(r[0] for r in results), {r[1] for r in results}, max(r[2] for r in results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=2000)
+    parser.add_argument("--transactions", type=int, default=200, help="per account")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    book = build_book(args.accounts, args.transactions, args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "data.json")
+        snap_path = os.path.join(tmp, "data.snap")
+        JsonStorage(json_path).save(book)
+        start = time.perf_counter()
+        write_snapshot(snap_path, book, lambda u: u['transactions'])
+        publish = time.perf_counter() - start
+        del book
+
+        print(f"book          {args.accounts:,} accounts x {args.transactions:,} transactions")
+        print(f"file size     json {os.path.getsize(json_path) / 2 ** 20:,.1f} MiB, "
+              f"snapshot {os.path.getsize(snap_path) / 2 ** 20:,.1f} MiB (published in {publish:.2f} s)")
+        for label, worker, path in (("json", json_worker, json_path), ("snapshot", snapshot_worker, snap_path)):
+            elapsed, totals, rss = run(worker, path, args.workers)
+            assert len(totals) == 1
+            print(f"{label:<13} {args.workers} workers: slowest open+report {elapsed * 1000:,.0f} ms, "
+                  f"peak RSS {rss / 1024:,.0f} MiB per worker")
+
+
+if __name__ == "__main__":
+    main()
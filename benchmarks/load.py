@@ -0,0 +1,212 @@
+"""Concurrent load harness: many sessions driving the Bank from threads and processes.
+
+    python benchmarks/load.py --processes 4 --threads 8 --duration 30
+    python benchmarks/load.py --shards 16 --processes 4 --threads 8 --mix get_details=50,deposit=20,transfer=30
+
+Each of --processes worker processes runs --threads session threads (as a
+Streamlit server does), picking operations from --mix until --duration
+runs out. Every session keeps the net money it moved into or out of the
+bank through operations that reported success. At the end:
+
+    expected total = opening total + sum of those nets
+
+is compared with the balances actually stored, so a lost update (an
+operation whose effect another writer overwrote) shows up as a mismatch.
+The ledgers are verified too, with a full bank.integrity.verify() run
+(balance chains and transfer pairing). The report gives throughput,
+latency percentiles per operation, and write-lock contention and conflict
+re-runs per process. The exit status is non-zero if money was not
+conserved or the ledgers are inconsistent.
+
+Without --db a synthetic bank (benchmarks/synthetic.py) is generated in a
+temp directory; with --db the given book is used and modified.
+
+Fraud rules are off unless --fraud-rules is given: a few sessions hammering
+the same accounts hit the velocity limits within seconds, and the run would
+then measure refusals instead of writes. The report says which was used.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bank import Bank, fraud  # noqa: E402
+from bank.core import lock_stats  # noqa: E402
+from bank.integrity import verify  # noqa: E402
+from synthetic import PIN, write_bank  # noqa: E402
+
+DEFAULT_MIX = "get_details=40,deposit=20,transfer=20,pay_bill=10,pay_emi=10"
+
+
+def _get_details(rng, numbers, loans):
+    user, _ = Bank.get_details(rng.choice(numbers), PIN)
+    return user is not None, 0
+
+
+def _deposit(rng, numbers, loans):
+    amount = rng.randint(100, 500000)
+    ok, _ = Bank.deposit_money(rng.choice(numbers), PIN, amount)
+    return ok, amount if ok else 0
+
+
+def _transfer(rng, numbers, loans):
+    sender, recipient = rng.sample(numbers, 2)
+    ok, _ = Bank.transfer_money(sender, PIN, recipient, rng.randint(100, 100000))
+    return ok, 0
+
+
+def _pay_bill(rng, numbers, loans):
+    amount = rng.randint(100, 200000)
+    ok, _ = Bank.pay_bill(rng.choice(numbers), PIN, "Electricity", "UPPCL", "1234567890", amount)
+    return ok, -amount if ok else 0
+
+
+def _pay_emi(rng, numbers, loans):
+    if not loans:
+        return False, 0
+    account_no, loan_id, emi = rng.choice(loans)
+    ok = Bank.pay_emi(account_no, PIN, loan_id)[0]
+    return ok, -emi if ok else 0
+
+
+OPERATIONS = {"get_details": _get_details, "deposit": _deposit, "transfer": _transfer, "pay_bill": _pay_bill,
+              "pay_emi": _pay_emi}
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation '{name}' (choose from {', '.join(OPERATIONS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def _session(seed, deadline, mix, numbers, loans, results):
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    latencies = {name: [] for name in names}
+    failed = dict.fromkeys(names, 0)
+    errors = []
+    net = 0
+    while time.monotonic() < deadline:
+        name = rng.choices(names, weights)[0]
+        start = time.perf_counter()
+        try:
+            ok, moved = OPERATIONS[name](rng, numbers, loans)
+        except Exception as err:
+            errors.append(f"{name}: {type(err).__name__}: {err}")
+            continue
+        latencies[name].append(time.perf_counter() - start)
+        failed[name] += not ok
+        net += moved
+    results.append((latencies, failed, errors, net))
+
+
+def _worker(database, codec, fraud_rules, index, threads, duration, mix, numbers, loans, seed):
+    Bank.database = database
+    Bank.codec = codec
+    Bank.fraud_rules = fraud.RULES if fraud_rules else ()
+    lock_stats.reset()
+    deadline = time.monotonic() + duration
+    results = []
+    sessions = [threading.Thread(target=_session, args=(seed * 1000 + index * threads + n, deadline, mix, numbers,
+                                                          loans, results))
+                for n in range(threads)]
+    for session in sessions:
+        session.start()
+    for session in sessions:
+        session.join()
+    return results, lock_stats.snapshot()
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000 if ordered else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="existing book to load (modified in place); default: generate one")
+    parser.add_argument("--accounts", type=int, default=2000, help="size of the generated bank")
+    parser.add_argument("--transactions", type=int, default=50, help="per account in the generated bank")
+    parser.add_argument("--shards", type=int, default=0, help="generate a sharded bank")
+    parser.add_argument("--codec", default="auto")
+    parser.add_argument("--processes", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=8, help="sessions per process")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"default {DEFAULT_MIX}")
+    parser.add_argument("--fraud-rules", action="store_true", help="screen operations with the fraud rules")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = args.db
+        if database is None:
+            database = os.path.join(tmp, "bank" if args.shards else "data.json")
+            write_bank(database, args.accounts, args.transactions, args.shards, args.codec, loans=1.0,
+                       seed=args.seed)
+        Bank.database, Bank.codec = database, args.codec
+        book = Bank._load_data()
+        numbers = [u['accountNo'] for u in book]
+        loans = [(u['accountNo'], loan['loan_id'], loan['emi']) for u in book for loan in u.get('loans', [])
+                 if loan['status'] == 'Active']
+        opening = sum(u['balance'] for u in book)
+        del book
+
+        print(f"book      {database} ({len(numbers):,} accounts, {len(loans):,} active loans)")
+        print(f"load      {args.processes} processes x {args.threads} sessions for {args.duration:g} s, "
+              f"mix {', '.join(f'{k}={v:g}' for k, v in args.mix.items())}, "
+              f"fraud rules {'on' if args.fraud_rules else 'off'}")
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(args.processes) as pool:
+            runs = pool.starmap(_worker, [(database, args.codec, args.fraud_rules, index, args.threads, args.duration,
+                                           args.mix, numbers, loans, args.seed) for index in range(args.processes)])
+
+        latencies = {name: [] for name in args.mix}
+        failed = dict.fromkeys(args.mix, 0)
+        errors = []
+        net = 0
+        for results, _ in runs:
+            for session_latencies, session_failed, session_errors, session_net in results:
+                for name in args.mix:
+                    latencies[name].extend(session_latencies[name])
+                    failed[name] += session_failed[name]
+                errors.extend(session_errors)
+                net += session_net
+
+        total_ops = sum(len(values) for values in latencies.values())
+        print(f"\nthroughput {total_ops / args.duration:,.1f} ops/s ({total_ops:,} operations)")
+        print(f"{'operation':<12} {'ops':>7} {'refused':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+        for name, values in latencies.items():
+            values.sort()
+            print(f"{name:<12} {len(values):>7,} {failed[name]:>8,} {_percentile(values, 0.5):>8.1f} "
+                  f"{_percentile(values, 0.95):>8.1f} {_percentile(values, 0.99):>8.1f} "
+                  f"{(values[-1] * 1000 if values else 0):>8.1f}")
+
+        print(f"\n{'process':<8} {'writes':>8} {'queued':>8} {'wait s':>8} {'conflicts':>10}")
+        for index, (_, stats) in enumerate(runs):
+            print(f"{index:<8} {stats['acquired']:>8,} {stats['contended']:>8,} {stats['wait_seconds']:>8.2f} "
+                  f"{stats['conflicts']:>10,}")
+        if errors:
+            print(f"\n{len(errors)} operations raised, e.g. {errors[0]}")
+
+        book = Bank._load_data()
+        actual = sum(u['balance'] for u in book)
+        expected = opening + net
+        problems = verify(full=True)['problems']
+        print(f"\nmoney     opening {opening:,} + net {net:,} = expected {expected:,}; stored {actual:,} paise")
+        if actual != expected:
+            print(f"LOST UPDATES: {actual - expected:+,} paise unaccounted for")
+        print(f"ledger    {len(problems)} problems" + (f", e.g. {problems[0]}" if problems else ""))
+        sys.exit(1 if actual != expected or problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Per-operation benchmark suite over synthetic banks, with run-to-run comparison.
+
+    python benchmarks/suite.py --accounts 10000 100000 --backends json sharded
+    python benchmarks/suite.py --compare benchmarks/results/3f2c1ab.json benchmarks/results/9d8e7f6.json
+
+Each (backend, size) book is generated once with benchmarks/synthetic.py.
+Each operation then runs in a freshly spawned process against a copy of
+it, so the peak RSS it reports belongs to that operation alone. A run is
+saved as benchmarks/results/<commit>.json with latency percentiles,
+throughput, peak RSS and the book's size on disk after the operation.
+--compare prints the ratios between two saved runs and exits non-zero when
+an operation got slower than --threshold.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bank import Bank  # noqa: E402
+from synthetic import PIN, write_bank  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS = os.path.join(ROOT, "benchmarks", "results")
+BACKENDS = ("json", "sharded")
+
+
+def _op_create_account(bank, rng, numbers):
+    return bank.create_account("Bench User", 30, "bench@example.com", "9876543210", "Delhi", PIN)
+
+
+def _op_get_details(bank, rng, numbers):
+    return bank.get_details(rng.choice(numbers), PIN)
+
+
+def _op_deposit_money(bank, rng, numbers):
+    return bank.deposit_money(rng.choice(numbers), PIN, rng.randint(100, 100000))
+
+
+def _op_withdraw_money(bank, rng, numbers):
+    return bank.withdraw_money(rng.choice(numbers), PIN, 100)
+
+
+def _op_transfer_money(bank, rng, numbers):
+    sender, recipient = rng.sample(numbers, 2)
+    return bank.transfer_money(sender, PIN, recipient, 100)
+
+
+def _op_pay_bill(bank, rng, numbers):
+    return bank.pay_bill(rng.choice(numbers), PIN, "Electricity", "UPPCL", "1234567890", 100)
+
+
+def _op_filter_transactions(bank, rng, numbers):
+    return bank.filter_transactions(rng.choice(numbers), PIN, txn_type="deposit")
+
+
+def _op_get_stats(bank, rng, numbers):
+    return bank.get_stats()
+
+
+def _op_generate_statement_pdf(bank, rng, numbers):
+    user, _ = bank.get_details(rng.choice(numbers), PIN)
+    return bank.generate_statement_pdf(user, list(user['transactions']))
+
+
+OPERATIONS = {name[4:]: func for name, func in globals().items() if name.startswith("_op_")}
+
+
+def _run_case(database, codec, op, numbers, iterations, seed):
+    # Runs in a spawned child: everything it allocates is this operation's
+    Bank.database = database
+    Bank.codec = codec
+    rng = random.Random(seed)
+    func = OPERATIONS[op]
+    try:
+        func(Bank, rng, numbers)  # warm-up: imports, id blocks, page cache
+    except ImportError as err:
+        return {"skipped": str(err)}
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func(Bank, rng, numbers)
+        timings.append(time.perf_counter() - start)
+    return {"timings": timings, "peak_rss": _peak_rss()}
+
+
+def _peak_rss():
+    # VmHWM starts afresh at exec; Linux carries ru_maxrss over from the parent
+    try:
+        with open("/proc/self/status") as fs:
+            for line in fs:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _disk_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(base, name)) for base, _, names in os.walk(path) for name in names)
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(args):
+    context = multiprocessing.get_context("spawn")
+    report = {"commit": _commit(), "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+              "python": platform.python_version(), "platform": platform.platform(),
+              "config": {"transactions": args.transactions, "iterations": args.iterations, "codec": args.codec,
+                         "shards": args.shards, "seed": args.seed},
+              "results": []}
+    ops = args.ops or list(OPERATIONS)
+    print(f"{'backend':<8} {'accounts':>9} {'operation':<24} {'p50 ms':>8} {'p95 ms':>8} {'ops/s':>8} "
+          f"{'peak MiB':>9} {'size MiB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for accounts in args.accounts:
+            for backend in args.backends:
+                source = os.path.join(tmp, f"{backend}-{accounts}", "bank" if backend == "sharded" else "data.json")
+                numbers = write_bank(source, accounts, args.transactions, args.shards if backend == "sharded" else 0,
+                                     args.codec, seed=args.seed)
+                for op in ops:
+                    case = os.path.join(tmp, "case")
+                    shutil.copytree(os.path.dirname(source), case)
+                    database = os.path.join(case, os.path.basename(source))
+                    with context.Pool(1) as pool:
+                        outcome = pool.apply(_run_case, (database, args.codec, op, numbers, args.iterations,
+                                                         args.seed))
+                    row = {"backend": backend, "accounts": accounts, "op": op}
+                    if "skipped" in outcome:
+                        row["skipped"] = outcome["skipped"]
+                        print(f"{backend:<8} {accounts:>9,} {op:<24} skipped: {outcome['skipped']}")
+                    else:
+                        timings = outcome["timings"]
+                        row.update(p50_ms=_percentile(timings, 0.5) * 1000, p95_ms=_percentile(timings, 0.95) * 1000,
+                                   mean_ms=sum(timings) / len(timings) * 1000, ops_per_s=len(timings) / sum(timings),
+                                   peak_rss_mib=outcome["peak_rss"] / 2 ** 20, size_mib=_disk_size(database) / 2 ** 20)
+                        print(f"{backend:<8} {accounts:>9,} {op:<24} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+                              f"{row['ops_per_s']:>8.1f} {row['peak_rss_mib']:>9.1f} {row['size_mib']:>9.1f}")
+                    report["results"].append(row)
+                    shutil.rmtree(case)
+
+    out = args.out or os.path.join(RESULTS, f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as fs:
+        json.dump(report, fs, indent=2)
+    print(f"Saved {out}")
+
+
+def compare(base_path, head_path, threshold):
+    with open(base_path) as fs:
+        base = json.load(fs)
+    with open(head_path) as fs:
+        head = json.load(fs)
+    before = {(r["backend"], r["accounts"], r["op"]): r for r in base["results"] if "skipped" not in r}
+    print(f"{base['commit']} -> {head['commit']} (ratios are head / base; > 1 is slower or bigger)")
+    print(f"{'backend':<8} {'accounts':>9} {'operation':<24} {'p50':>7} {'p95':>7} {'peak RSS':>9} {'size':>7}")
+    regressions = 0
+    for row in head["results"]:
+        old = before.get((row["backend"], row["accounts"], row["op"]))
+        if old is None or "skipped" in row:
+            continue
+        ratios = [row[key] / old[key] if old[key] else float("inf")
+                  for key in ("p50_ms", "p95_ms", "peak_rss_mib", "size_mib")]
+        slower = ratios[0] > 1 + threshold
+        regressions += slower
+        print(f"{row['backend']:<8} {row['accounts']:>9,} {row['op']:<24} "
+              + " ".join(f"{ratio:>{width}.2f}x" for ratio, width in zip(ratios, (6, 6, 8, 6)))
+              + ("  REGRESSION" if slower else ""))
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accounts", type=int, nargs="+", default=[10000])
+    parser.add_argument("--transactions", type=int, default=100, help="per account")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--ops", nargs="+", choices=sorted(OPERATIONS), help="default: all")
+    parser.add_argument("--iterations", type=int, default=20, help="timed calls per operation")
+    parser.add_argument("--shards", type=int, default=16)
+    parser.add_argument("--codec", default="auto")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="result file (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "HEAD"), help="compare two saved runs")
+    parser.add_argument("--threshold", type=float, default=0.10, help="p50 slowdown counted as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(*args.compare, args.threshold))
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
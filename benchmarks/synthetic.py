@@ -0,0 +1,148 @@
+"""Seeded synthetic bank for benchmarks.
+
+    python benchmarks/synthetic.py --accounts 10000 --transactions 100 --out /tmp/bank/data.json
+    python benchmarks/synthetic.py --accounts 10000 --shards 16 --out /tmp/bank/bankdata
+
+Every account has the PIN 1234 and a consistent balance chain, so the book
+passes `python -m bank check`. Ids come from the book's own IdAllocator file,
+so the Bank keeps minting fresh ones afterwards. The same seed and options
+always produce the same book.
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bank import Account, Bank, History, IdAllocator, Transaction  # noqa: E402
+from bank.records import to_timestamp  # noqa: E402
+from bank.sharding import ShardedStorage  # noqa: E402
+from bank.storage import JsonStorage  # noqa: E402
+
+PIN = "1234"
+START = to_timestamp("2023-01-01 09:00:00")
+
+# type: (weight, debit, description)
+TXN_MIX = {
+    "deposit": (30, False, "Cash Deposit"),
+    "withdrawal": (20, True, "Cash Withdrawal"),
+    "transfer_in": (15, False, "Money Transfer"),
+    "transfer_out": (15, True, "Money Transfer"),
+    "bill_payment": (12, True, "Electricity - UPPCL"),
+    "emi_payment": (8, True, "EMI Paid - Personal Loan"),
+}
+BILLS = [("Electricity", "UPPCL"), ("Mobile", "Jio"), ("Internet", "Airtel"), ("Water", "Jal Board")]
+LOANS = {"Personal Loan": 12.0, "Home Loan": 8.5, "Car Loan": 9.5, "Education Loan": 10.0}
+GOALS = ["Vacation", "Emergency Fund", "New Phone", "Car", "Wedding"]
+
+
+def _count(rng, mean):
+    # Non-negative integer with the given mean
+    whole = int(mean)
+    return whole + (rng.random() < mean - whole)
+
+
+def _ledger(rng, count):
+    names = list(TXN_MIX)
+    weights = [TXN_MIX[name][0] for name in names]
+    ts, balance = START + rng.randint(0, 86400 * 30), 0
+    history = []
+    for txn_type in rng.choices(names, weights, k=count):
+        _, debit, description = TXN_MIX[txn_type]
+        amount = rng.randint(100, 2000000)
+        if debit and amount > balance:
+            txn_type, debit, description = "deposit", False, TXN_MIX["deposit"][2]
+        balance += -amount if debit else amount
+        ts += rng.randint(60, 86400 * 3)
+        history.append(Transaction(txn_type, amount, ts, balance, description))
+    return History(history), balance
+
+
+def generate(ids, accounts, transactions=100, loans=0.3, bills=2.0, goals=0.5, beneficiaries=1.0, seed=42):
+    """Yield `accounts` Account records minting ids from `ids` (an IdAllocator);
+    the mix options are per-account means."""
+    rng = random.Random(seed)
+    pin = Bank._hash_pin(PIN)
+    created = datetime(2023, 1, 1)
+    numbers = []
+    for i in range(accounts):
+        account_no = ids.next_id("account")
+        name = f"User {i}"
+        history, balance = _ledger(rng, transactions)
+        account = Account(name=name, age=rng.randint(18, 80), email=f"user{i}@example.com",
+                          mobile=f"9{rng.randint(0, 10 ** 9 - 1):09d}", address=f"{i} MG Road, Delhi", pin=pin,
+                          accountNo=account_no, balance=balance,
+                          created_at=(created + timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S"),
+                          transactions=history,
+                          virtual_card={"card_number": ids.next_id("card"), "cvv": f"{rng.randint(0, 999):03d}",
+                                        "expiry": "12/29", "card_holder": name.upper()},
+                          savings_goals=[], beneficiaries=[], loans=[], bills=[], money_unit="paise")
+
+        for n in range(_count(rng, bills)):
+            bill_type, provider = rng.choice(BILLS)
+            account.bills.append({"id": n + 1, "type": bill_type, "provider": provider,
+                                  "bill_number": f"{rng.randint(0, 10 ** 10):010d}",
+                                  "amount": rng.randint(10000, 500000), "date": "2024-01-15 10:00:00",
+                                  "status": "Paid"})
+        for _ in range(_count(rng, loans)):
+            loan_type = rng.choice(list(LOANS))
+            principal = rng.randint(50000, 2000000) * 100
+            tenure = rng.choice([12, 24, 36, 60])
+            emi, total_amount, total_interest = Bank.calculate_emi(principal, LOANS[loan_type], tenure)
+            paid = rng.randint(0, tenure - 1)
+            account.loans.append({"loan_id": ids.next_id("loan"), "type": loan_type, "principal": principal,
+                                  "interest_rate": LOANS[loan_type], "tenure_months": tenure, "emi": emi,
+                                  "total_amount": total_amount, "total_interest": total_interest,
+                                  "outstanding": max(0, total_amount - paid * emi), "paid_emis": paid,
+                                  "purpose": "Synthetic", "applied_on": "2024-01-01 10:00:00",
+                                  "status": "Active", "next_emi_date": "2024-02-01"})
+        for n in range(_count(rng, goals)):
+            target = rng.randint(1000, 500000) * 100
+            account.savings_goals.append({"id": n + 1, "name": rng.choice(GOALS), "target_amount": target,
+                                          "current_amount": rng.randint(0, target), "deadline": "2026-12-31",
+                                          "created_at": "2024-01-01 10:00:00", "status": "active"})
+        for n in range(_count(rng, beneficiaries) if numbers else 0):
+            other = rng.choice(numbers)
+            account.beneficiaries.append({"id": n + 1, "account": other, "name": "Payee",
+                                          "nickname": f"Payee {n + 1}", "added_on": "2024-01-01 10:00:00"})
+        numbers.append(account_no)
+        yield account
+
+
+def write_bank(path, accounts, transactions=100, shards=0, codec="auto", **mix):
+    """Generate a book at `path` (sharded if shards > 0); returns its account numbers."""
+    if os.path.exists(path):
+        raise SystemExit(f"{path} already exists")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    ids = IdAllocator(f"{os.path.normpath(path)}.ids", block_size=4096)
+    book = list(generate(ids, accounts, transactions, **mix))
+    if shards:
+        ShardedStorage.create(path, book, shards, codec)
+    elif not JsonStorage(path, codec).save(book):
+        raise SystemExit(f"Could not write {path}")
+    return [account['accountNo'] for account in book]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", required=True, help="book path (a directory when --shards is given)")
+    parser.add_argument("--accounts", type=int, default=10000)
+    parser.add_argument("--transactions", type=int, default=100, help="per account")
+    parser.add_argument("--loans", type=float, default=0.3, help="mean per account")
+    parser.add_argument("--bills", type=float, default=2.0, help="mean per account")
+    parser.add_argument("--goals", type=float, default=0.5, help="mean per account")
+    parser.add_argument("--beneficiaries", type=float, default=1.0, help="mean per account")
+    parser.add_argument("--shards", type=int, default=0, help="write a sharded book with this many shards")
+    parser.add_argument("--codec", default="auto")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    numbers = write_bank(args.out, args.accounts, args.transactions, args.shards, args.codec, loans=args.loans,
+                         bills=args.bills, goals=args.goals, beneficiaries=args.beneficiaries, seed=args.seed)
+    print(f"Wrote {len(numbers):,} accounts x {args.transactions:,} transactions to {args.out} (PIN {PIN})")
+
+
+if __name__ == "__main__":
+    main()
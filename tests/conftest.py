@@ -0,0 +1,22 @@
+import pytest
+
+from bank import Bank
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    # Each test gets its own book; per-database caches are keyed by the path
+    monkeypatch.setattr(Bank, "database", str(tmp_path / "data.json"))
+    monkeypatch.setattr(Bank, "notifier", None)
+    monkeypatch.setattr(Bank, "codec", Bank.codec)
+    monkeypatch.setattr(Bank, "_outbox", [])
+    monkeypatch.setattr(Bank, "_alerts", [])
+    return Bank.database
+
+
+def open_account(name="Test User", pin="1234", deposit=0):
+    ok, account_no = Bank.create_account(name, 30, "test@example.com", "9876543210", "1 Main St", pin)
+    assert ok, account_no
+    if deposit:
+        assert Bank.deposit_money(account_no, pin, deposit)[0]
+    return account_no
@@ -0,0 +1,59 @@
+import asyncio
+import http.client
+import json
+
+from bank import Bank
+from bank.api import BankAPIServer
+from conftest import open_account
+
+
+def call(requests, pin="1234"):
+    # Runs [(method, path, body)] against a server on an ephemeral port -> [(status, payload)]
+    def fetch(port):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        responses = []
+        for method, path, body in requests:
+            conn.request(method, path, json.dumps(body) if body is not None else None, {"X-Pin": pin})
+            response = conn.getresponse()
+            raw = response.read()
+            ctype = response.getheader("Content-Type", "")
+            responses.append((response.status, json.loads(raw) if ctype.startswith("application/json") else raw))
+        conn.close()
+        return responses
+
+    async def run():
+        server = await BankAPIServer(port=0, workers=2).start()
+        try:
+            return await asyncio.to_thread(fetch, server.port)
+        finally:
+            await server.close()
+
+    return asyncio.run(run())
+
+
+def test_invalid_bodies_are_rejected_with_400(database):
+    payer = open_account(deposit=10000)
+    payee = open_account()
+    base = f"/accounts/{payer}"
+    responses = call([
+        ("POST", f"{base}/transfer", {"to": 5, "amount": 100}),
+        ("POST", f"{base}/transfer", {"to": payee, "amount": 100, "description": ["rent"]}),
+        ("POST", f"{base}/transfer", {"to": payee, "amount": "100"}),
+        ("POST", f"{base}/goals", {"name": "Car", "deadline": "2030-01-01", "target_amount": 500, "sweep": 5}),
+        ("POST", f"{base}/goals", {"name": "Car", "deadline": "2030-01-01", "target_amount": 500,
+                                   "sweep": {"mode": "percent", "value": "ten"}}),
+        ("GET", f"{base}/statement?start=yesterday", None),
+        ("POST", f"{base}/transfer", {"to": payee, "amount": 100, "description": "rent"}),
+    ])
+    assert [status for status, _ in responses] == [400, 400, 400, 400, 400, 400, 200]
+    assert responses[1][1]["message"] == "'description' must be a string"
+    assert Bank.get_details(payee, "1234")[0]['balance'] == 100
+
+
+def test_wrong_pin_is_401_and_unknown_route_404(database):
+    account_no = open_account()
+    responses = call([
+        ("GET", f"/accounts/{account_no}", None),
+        ("GET", "/nowhere", None),
+    ], pin="9999")
+    assert [status for status, _ in responses] == [401, 404]
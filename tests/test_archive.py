@@ -0,0 +1,59 @@
+import copy
+import os
+import shutil
+from datetime import datetime, timedelta
+
+from bank import Bank
+from bank.archive import _read_segment, archive_account, archive_root
+from conftest import open_account
+
+
+def amounts(transactions):
+    return [t['amount'] for t in transactions]
+
+
+def test_archived_entries_are_still_searched(database):
+    account_no = open_account()
+    for amount in (100, 200, 300, 400, 500):
+        assert Bank.deposit_money(account_no, "1234", amount)[0]
+    assert Bank.withdraw_money(account_no, "1234", 250)[0]
+
+    assert Bank.archive_transactions(keep_last=4) == (True, "Archived 2 transactions.")
+    assert Bank.archive_transactions(keep_last=2) == (True, "Archived 2 transactions.")
+    user = Bank.get_details(account_no, "1234")[0]
+    assert len(user['transactions']) == 2 and user['archive']['count'] == 4
+    segments = [s['file'] for s in user['archive']['segments']]
+    assert sorted(os.listdir(os.path.join(archive_root(database), account_no))) == sorted(segments)
+
+    found, _ = Bank.filter_transactions(account_no, "1234")
+    assert amounts(found) == [100, 200, 300, 400, 500, 250]
+    found, _ = Bank.filter_transactions(account_no, "1234", txn_type="deposit", min_amount=200, max_amount=400)
+    assert amounts(found) == [200, 300, 400]
+    tomorrow = datetime.now() + timedelta(days=1)
+    assert Bank.filter_transactions(account_no, "1234", start_date=tomorrow)[0] == []
+
+
+def test_nothing_to_archive(database):
+    account_no = open_account()
+    assert Bank.deposit_money(account_no, "1234", 100)[0]
+    assert Bank.archive_transactions(keep_last=5) == (True, "Nothing to archive.")
+    assert Bank.archive_transactions() == (False, "Give a number of entries to keep or an age in days.")
+
+
+def test_racing_runs_never_share_a_segment(database):
+    account_no = open_account()
+    for amount in (100, 200, 300):
+        assert Bank.deposit_money(account_no, "1234", amount)[0]
+    user = Bank.get_details(account_no, "1234")[0]
+    stale = copy.deepcopy(user)
+    root = archive_root(database)
+    assert archive_account(root, user, keep_last=1) == 2
+    assert archive_account(root, stale, keep_last=2) == 1
+    first, = (os.path.join(root, account_no, s['file']) for s in user['archive']['segments'])
+    second, = (os.path.join(root, account_no, s['file']) for s in stale['archive']['segments'])
+    assert first != second
+    assert amounts(_read_segment(first)) == [100, 200]
+
+    # A segment replaced under the same name (a restored backup) is read again
+    shutil.copyfile(second, first)
+    assert amounts(_read_segment(first)) == [100]
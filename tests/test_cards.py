@@ -0,0 +1,61 @@
+from bank import Bank, CardAuthorizer
+from conftest import open_account
+
+
+def card_of(account_no):
+    card = Bank.get_details(account_no, "1234")[0]['virtual_card']
+    return card['card_number'], card['cvv'], card['expiry']
+
+
+def test_flush_keeps_writes_made_after_the_authorizer_loaded(database):
+    payer = open_account(deposit=100000)
+    other = open_account(deposit=5000)
+    authorizer = CardAuthorizer()
+    approved, auth_code = authorizer.authorize(*card_of(payer), 2500, "Cafe")
+    assert approved
+
+    # Written by another path between the authorization and the flush
+    assert Bank.deposit_money(payer, "1234", 700)[0]
+    assert Bank.deposit_money(other, "1234", 300)[0]
+
+    assert authorizer.flush()
+    assert authorizer.pending == 0
+    payer_user = Bank.get_details(payer, "1234")[0]
+    assert payer_user['balance'] == 100000 + 700 - 2500
+    assert [t['type'] for t in payer_user['transactions']] == ["deposit", "deposit", "card_payment"]
+    assert [h['auth_code'] for h in payer_user['card_holds']] == [auth_code]
+    assert Bank.get_details(other, "1234")[0]['balance'] == 5300
+
+
+def test_flush_reapplies_reversals_and_drops_uncovered_authorizations(database):
+    payer = open_account(deposit=10000)
+    authorizer = CardAuthorizer()
+    card = card_of(payer)
+    _, first = authorizer.authorize(*card, 4000, "Shop")
+    _, second = authorizer.authorize(*card, 5000, "Shop")
+    assert authorizer.reverse(card[0], first)[0]
+    assert Bank.withdraw_money(payer, "1234", 3000)[0]
+
+    assert authorizer.flush()
+    assert authorizer.dropped == [second]
+    payer_user = Bank.get_details(payer, "1234")[0]
+    assert payer_user['balance'] == 7000
+    assert payer_user['card_holds'] == []
+    # The in-memory copy now matches the book, so the next authorization sees the withdrawal
+    assert authorizer.authorize(*card, 7500, "Shop") == (False, "Insufficient balance.")
+
+
+def test_authorize_card_checks_the_stored_balance(database):
+    payer = open_account(deposit=10000)
+    card = card_of(payer)
+    approved, auth_code = Bank.authorize_card(*card, 4000, "Shop")
+    assert approved
+    assert Bank.withdraw_money(payer, "1234", 5000)[0]
+    assert Bank.authorize_card(*card, 2000, "Shop") == (False, "Insufficient balance.")
+    # A card issued after the index was built is still found
+    later = open_account(deposit=3000)
+    assert Bank.authorize_card(*card_of(later), 2000, "Shop")[0]
+    payer_user = Bank.get_details(payer, "1234")[0]
+    assert payer_user['balance'] == 1000
+    assert [h['auth_code'] for h in payer_user['card_holds']] == [auth_code]
+    assert Bank.authorize_card("4000000000000002", "123", card[2], 10, "Shop") == (False, "Card not found.")
@@ -0,0 +1,30 @@
+import io
+import json
+import sys
+
+from bank import Bank, cli
+from conftest import open_account
+
+
+def test_batch_skips_bad_lines_and_runs_the_rest(database, monkeypatch, capsys):
+    account_no = open_account()
+    jobs = [
+        "5",
+        '["deposit"]',
+        json.dumps({"command": "deposit", "account": account_no, "pin": "1234", "amount": 250}),
+        json.dumps({"command": "loan-apply", "account": account_no, "pin": "1234", "type": "Personal Loan",
+                    "amount": 20000, "tenure": 0, "purpose": "Trip"}),
+        json.dumps({"command": "deposit", "account": account_no, "pin": "1234", "amount": 50}),
+    ]
+    monkeypatch.setattr(sys, "stdin", io.StringIO("\n".join(jobs) + "\n"))
+    assert cli.main(["--db", database, "--json", "batch"]) == 1
+    results = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [r['ok'] for r in results] == [False, False, True, False, True]
+    user = Bank.get_details(account_no, "1234")[0]
+    assert user['balance'] == 30000 and user['loans'] == []
+
+
+def test_zero_tenure_loan_is_refused(database):
+    account_no = open_account(deposit=100000)
+    assert Bank.apply_loan(account_no, "1234", "Personal Loan", 2000000, 0, "Trip") == \
+        (False, "Tenure must be at least one month.", 0)
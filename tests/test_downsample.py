@@ -0,0 +1,40 @@
+import pytest
+
+from bank import Bank
+from bank.downsample import downsample, lttb, minmax
+from conftest import open_account
+
+
+def test_lttb_keeps_the_ends_and_the_budget():
+    xs = list(range(1000))
+    ys = [x % 37 for x in xs]
+    picked = lttb(xs, ys, 50)
+    assert len(picked) == 50 and picked[0] == 0 and picked[-1] == 999
+    assert picked == sorted(set(picked))
+
+
+def test_minmax_keeps_every_spike():
+    xs = list(range(1000))
+    ys = [0] * 1000
+    ys[123], ys[777] = 500, -500
+    sx, sy = downsample(xs, ys, 20, "minmax")
+    assert len(sx) <= 20 and 500 in sy and -500 in sy
+    assert sx[0] == 0 and sx[-1] == 999
+    assert minmax(xs, ys, 2000) == xs
+
+
+def test_short_series_and_unknown_methods():
+    assert downsample([1, 2, 3], [4, 5, 6], 10) == ([1, 2, 3], [4, 5, 6])
+    with pytest.raises(ValueError):
+        downsample([1, 2, 3], [4, 5, 6], 2, "median")
+
+
+def test_balance_series_is_cut_down_on_the_server(database, monkeypatch):
+    monkeypatch.setattr(Bank, "fraud_rules", ())
+    account_no = open_account()
+    for n in range(30):
+        assert Bank.deposit_money(account_no, "1234", 10 + n)[0]
+    series, _ = Bank.balance_series(account_no, "1234", points=10)
+    assert series['count'] == 30 and len(series['ts']) == len(series['balance']) == 10
+    assert series['balance'][-1] == sum(10 + n for n in range(30))
+    assert Bank.balance_series(account_no, "0000") == (None, "Invalid credentials.")
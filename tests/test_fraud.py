@@ -0,0 +1,46 @@
+from bank import Bank, core, fraud
+from bank.money import PAISE
+from bank.records import now_timestamp
+from conftest import open_account
+
+
+def test_eleventh_deposit_in_an_hour_is_blocked_and_queued(database):
+    account_no = open_account()
+    for _ in range(10):
+        assert Bank.deposit_money(account_no, "1234", 100)[0]
+    ok, msg = Bank.deposit_money(account_no, "1234", 100)
+    assert not ok and msg == "Deposit limit reached: 10 per hour."
+    assert Bank.get_details(account_no, "1234")[0]['balance'] == 1000
+
+    alerts, _ = Bank.review_alerts()
+    assert [(a['account'], a['action'], a['hits'][0]['rule']) for a in alerts] == [(account_no, "blocked", "velocity")]
+    assert Bank.resolve_alert(alerts[0]['id'], "cleared", "customer confirmed")[0]
+    assert Bank.resolve_alert(alerts[0]['id'], "confirmed")[0] is False
+    assert Bank.review_alerts()[0] == []
+
+
+def test_large_transfer_to_a_new_recipient_is_blocked(database):
+    payer = open_account(deposit=40000 * PAISE)
+    payee = open_account()
+    ok, msg = Bank.transfer_money(payer, "1234", payee, 30000 * PAISE)
+    assert not ok and msg.startswith(f"{payee} is a new recipient")
+    assert Bank.transfer_money(payer, "1234", payee, 20000 * PAISE)[0]
+
+
+def test_recipient_paid_before_the_archive_is_not_new(database, monkeypatch):
+    payer = open_account(deposit=40000 * PAISE)
+    payee = open_account()
+    two_days_ago = now_timestamp() - 2 * fraud.NEW_BENEFICIARY_COOLDOWN
+    with monkeypatch.context() as patch:
+        patch.setattr(core, "now_timestamp", lambda: two_days_ago)
+        assert Bank.transfer_money(payer, "1234", payee, 100 * PAISE)[0]
+    assert Bank.deposit_money(payer, "1234", 100)[0]
+    assert Bank.archive_transactions(keep_last=1)[0]
+
+    # An account saved before recipients were kept on the header
+    data = Bank._load_data()
+    for user in data:
+        user.extra.pop('payees', None)
+    assert Bank._storage().save(data)
+
+    assert Bank.transfer_money(payer, "1234", payee, 30000 * PAISE)[0]
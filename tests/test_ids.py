@@ -0,0 +1,58 @@
+import os
+
+from bank import Bank, IdAllocator
+from bank.records import Account
+from conftest import open_account
+
+
+def record(account_no):
+    return {"name": "Imported", "age": 40, "email": "imported@example.com", "mobile": "9123456780",
+            "address": "2 High St", "pin": Bank._hash_pin("4321"), "accountNo": account_no, "balance": 5000,
+            "created_at": "2024-01-01 10:00:00", "transactions": [], "virtual_card": None,
+            "savings_goals": [], "beneficiaries": [], "loans": [], "bills": [], "money_unit": "paise"}
+
+
+def upcoming(tmp_path, count):
+    # A fresh sequence mints the same numbers a new book's allocator will
+    probe = IdAllocator(os.path.join(tmp_path, "probe.ids"))
+    return [probe.next_id("account") for _ in range(count)]
+
+
+def account_numbers():
+    return [u['accountNo'] for u in Bank._load_data()]
+
+
+def test_imported_numbers_are_never_minted(database, tmp_path):
+    numbers = upcoming(tmp_path, 3)
+    ok, msg, conflicts = Bank.import_accounts([record(n) for n in numbers])
+    assert ok, msg
+    created = [open_account() for _ in range(5)]
+    assert not set(created) & set(numbers)
+    assert len(set(account_numbers())) == 8
+
+
+def test_imports_from_another_process_are_skipped(database, tmp_path, monkeypatch):
+    path = f"{os.path.normpath(Bank.database)}.ids"
+    monkeypatch.setitem(Bank._allocators, Bank.database, IdAllocator(path, block_size=4, seed=Bank._existing_ids))
+    first, held, *_, ahead = upcoming(tmp_path, 5)
+    assert open_account() == first
+    # Another process (its own allocator on the same sequence file) imports
+    # a number this one still holds in its block, and one past the mark
+    ours = Bank._allocators.pop(Bank.database)
+    ok, _, taken = Bank.import_accounts([record(held)])
+    assert not ok and taken == [held]
+    ok, msg, _ = Bank.import_accounts([record(ahead)])
+    assert ok, msg
+    Bank._allocators[Bank.database] = ours
+    created = [open_account() for _ in range(6)]
+    assert ahead not in created and held in created
+    assert len(set(account_numbers())) == 8
+
+
+def test_import_with_a_number_in_use_is_rejected(database):
+    existing = open_account()
+    ok, _, conflicts = Bank.import_accounts([record("ZZZZ000001"), record(existing)])
+    assert not ok and conflicts == [existing]
+    ok, _, conflicts = Bank.import_accounts([record("ZZZZ000002"), record("ZZZZ000002")])
+    assert not ok and conflicts == ["ZZZZ000002"]
+    assert account_numbers() == [existing]
@@ -0,0 +1,53 @@
+from bank import Bank
+from bank.integrity import verify
+from bank.records import Transaction
+from conftest import open_account
+
+
+def rewrite(account_no, change):
+    # Saves the account's ledger with change(list of entry dicts) applied, bypassing the core
+    data = Bank._load_data()
+    user = next(u for u in data if u['accountNo'] == account_no)
+    entries = [t.to_dict() for t in user['transactions']]
+    change(user, entries)
+    user['transactions'] = [Transaction.from_dict(entry) for entry in entries]
+    assert Bank._storage().save(data)
+
+
+def test_clean_ledgers_verify_incrementally(database):
+    payer = open_account(deposit=5000)
+    payee = open_account()
+    assert Bank.transfer_money(payer, "1234", payee, 1200)[0]
+    first = verify(jobs=1)
+    assert first['problems'] == [] and first['entries'] == 3
+    assert Bank.deposit_money(payee, "1234", 300)[0]
+    second = verify(jobs=1)
+    assert second['problems'] == [] and second['verified_accounts'] == 1 and second['entries'] == 1
+
+
+def test_tampered_entry_is_found(database):
+    account_no = open_account(deposit=5000)
+    assert Bank.withdraw_money(account_no, "1234", 1000)[0]
+    assert verify(jobs=1)['problems'] == []
+
+    def inflate(user, entries):
+        entries[0]['amount'] = 50000
+
+    # Same entry count, so only a full run rereads the verified entries
+    rewrite(account_no, inflate)
+    assert verify(jobs=1)['problems'] == []
+    problems = verify(jobs=1, full=True)['problems']
+    assert f"{account_no}: entry 0 (deposit) balance 5000 expected 50000" in problems
+    assert f"{account_no}: entries before 2 changed after they were verified" in problems
+
+
+def test_unpaired_transfer_is_found(database):
+    payer = open_account(deposit=5000)
+    payee = open_account()
+    assert Bank.transfer_money(payer, "1234", payee, 1200)[0]
+
+    def drop_last(user, entries):
+        user['balance'] -= entries.pop()['amount']
+
+    rewrite(payee, drop_last)
+    assert verify(jobs=1)['problems'] == [f"{payer}: 1 transfer_out of 1200 to {payee} without a transfer_in"]
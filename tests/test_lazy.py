@@ -0,0 +1,36 @@
+from bank import Bank
+from bank.records import Account
+from conftest import open_account
+
+
+def test_stats_come_from_headers_alone(database, monkeypatch):
+    payer = open_account(deposit=5000)
+    payee = open_account()
+    assert Bank.transfer_money(payer, "1234", payee, 1200)[0]
+    assert Bank.apply_loan(payer, "1234", "Car Loan", 2000000, 24, "Car")[0]
+
+    def fault(self):
+        raise AssertionError("body loaded")
+
+    monkeypatch.setattr(Account, "load_body", fault)
+    stats = Bank.get_stats()
+    assert (stats['accounts'], stats['transactions'], stats['loans'], stats['active_loans']) == (2, 4, 1, 1)
+    assert stats['total_balance'] == 5000 + 2000000
+
+
+def test_bodies_load_on_first_access_and_unread_ones_survive_a_save(database):
+    payer = open_account(deposit=5000)
+    payee = open_account()
+    assert Bank.transfer_money(payer, "1234", payee, 1200)[0]
+
+    data = Bank._load_data()
+    assert not any(u.body_loaded for u in data)
+    first = data[0]
+    assert [t.type for t in first.peek('transactions')] == ["deposit", "transfer_out"]
+    assert not first.body_loaded
+    assert first['transactions'][-1].amount == 1200 and first.body_loaded
+
+    # Only the payer's body is read and rewritten; the payee's is carried over as stored
+    assert Bank.deposit_money(payer, "1234", 300)[0]
+    ledgers = {u['accountNo']: [t.type for t in u['transactions']] for u in Bank._load_data()}
+    assert ledgers == {payer: ["deposit", "transfer_out", "deposit"], payee: ["transfer_in"]}
@@ -0,0 +1,16 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+HARNESS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "load.py")
+
+
+@pytest.mark.parametrize("extra", [[], ["--shards", "3", "--fraud-rules"]], ids=["single-file", "sharded"])
+def test_concurrent_writers_lose_no_money(tmp_path, extra):
+    run = subprocess.run([sys.executable, HARNESS, "--accounts", "30", "--transactions", "5", "--processes", "2",
+                          "--threads", "2", "--duration", "1", *extra],
+                         cwd=tmp_path, capture_output=True, text=True, timeout=120)
+    assert run.returncode == 0, run.stdout + run.stderr
+    assert "ledger    0 problems" in run.stdout
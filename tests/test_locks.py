@@ -0,0 +1,25 @@
+import os
+import socket
+import subprocess
+import sys
+
+from bank import Bank
+from bank.locks import file_lock
+from conftest import open_account
+
+
+def test_account_opens_in_a_missing_directory(database, tmp_path, monkeypatch):
+    monkeypatch.setattr(Bank, "database", str(tmp_path / "new" / "data.json"))
+    account_no = open_account()
+    assert [u['accountNo'] for u in Bank._load_data()] == [account_no]
+
+
+def test_lock_of_a_dead_holder_is_broken(tmp_path):
+    lock_path = str(tmp_path / "data.json.lock")
+    holder = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    with open(lock_path, 'w') as fs:
+        fs.write(f"{holder.stdout.strip()}:{socket.gethostname()}:0")
+    with file_lock(lock_path):
+        with open(lock_path) as fs:
+            assert fs.read().startswith(f"{os.getpid()}:")
+    assert os.listdir(tmp_path) == []
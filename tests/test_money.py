@@ -0,0 +1,42 @@
+from fractions import Fraction
+
+from bank import Bank
+from bank.money import PAISE, format_inr, round_half_up, to_paise
+from bank.records import Account
+from conftest import open_account
+
+
+def test_rupees_convert_to_exact_paise():
+    assert to_paise(0.1) + to_paise(0.2) == to_paise(0.3) == 30
+    assert to_paise("19.995") == 2000
+    assert round_half_up(Fraction(5, 2)) == 3 and round_half_up(Fraction(-5, 2)) == -2
+    assert format_inr(123456789, 2) == "₹1,234,567.89"
+    assert format_inr(-150) == "-₹2"
+
+
+def test_emi_schedule_closes_the_loan_without_drift(database):
+    account_no = open_account(deposit=50000 * PAISE)
+    ok, loan_id, emi = Bank.apply_loan(account_no, "1234", "Personal Loan", 100000 * PAISE, 12, "Renovation")
+    assert ok
+    assert emi == 890829  # ₹8,908.29: the exact annuity, rounded once
+    for _ in range(11):
+        assert Bank.pay_emi(account_no, "1234", loan_id)[0]
+    assert Bank.pay_emi(account_no, "1234", loan_id) == (True, "Loan Closed!")
+    user = Bank.get_details(account_no, "1234")[0]
+    assert user['loans'][0]['outstanding'] == 0
+    assert user['balance'] == 150000 * PAISE - 12 * emi
+    assert Bank.calculate_emi(12000 * PAISE, 0, 7) == (171429, 1200003, 3)
+
+
+def test_rupee_valued_records_are_read_as_paise():
+    account = Account.from_dict({
+        "accountNo": "ABCD000001", "balance": 1234.56,
+        "transactions": [{"type": "deposit", "amount": 1234.56, "date": "2024-01-01 10:00:00", "balance": 1234.56,
+                          "description": "Opening"}],
+        "savings_goals": [{"id": 1, "name": "Car", "target_amount": 500.5, "current_amount": 0.1,
+                           "sweep": {"mode": "roundup", "value": 10}}],
+    })
+    assert account['balance'] == 123456 and account['money_unit'] == 'paise'
+    assert account['transactions'][0].amount == 123456
+    goal = account['savings_goals'][0]
+    assert (goal['target_amount'], goal['current_amount'], goal['sweep']['value']) == (50050, 10, 1000)
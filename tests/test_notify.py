@@ -0,0 +1,51 @@
+import json
+import os
+import smtplib
+import stat
+
+from bank.notify import FileTransport, NotificationQueue, SmtpTransport, otp_message
+
+
+class FlakySmtp:
+    # Refuses the second recipient once and drops the connection at the fourth
+    sent = []
+    refused = set()
+
+    def __init__(self, host, port, timeout):
+        pass
+
+    def send_message(self, mail):
+        to = mail['To']
+        if to == "b@example.com" and to not in self.refused:
+            self.refused.add(to)
+            raise smtplib.SMTPRecipientsRefused({to: (550, b"mailbox busy")})
+        if to == "d@example.com" and to not in self.refused:
+            self.refused.add(to)
+            raise smtplib.SMTPServerDisconnected("connection lost")
+        self.sent.append(to)
+
+    def quit(self):
+        pass
+
+
+def test_otp_file_is_private(tmp_path):
+    path = str(tmp_path / "notifications.jsonl")
+    FileTransport(path).send([otp_message("a@example.com", "123456")])
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    with open(path) as fs:
+        assert "123456" in json.loads(fs.readline())['body']
+
+
+def test_smtp_partial_failure_resends_only_the_undelivered(monkeypatch):
+    monkeypatch.setattr(smtplib, "SMTP", FlakySmtp)
+    monkeypatch.setattr(FlakySmtp, "sent", [])
+    monkeypatch.setattr(FlakySmtp, "refused", set())
+    queue = NotificationQueue(SmtpTransport(), workers=1, linger=0.2, backoff=0.01)
+    for to in ("a", "b", "c", "d", "e"):
+        queue.submit(otp_message(f"{to}@example.com", "123456"))
+    assert queue.flush(5)
+    queue.close()
+    assert sorted(FlakySmtp.sent) == ["a@example.com", "b@example.com", "c@example.com", "d@example.com",
+                                      "e@example.com"]
+    assert queue.sent == 5 and not queue.failed
+
@@ -0,0 +1,46 @@
+import json
+
+from bank.records import HISTORY_CHECKPOINT, History, Transaction
+
+START = 1700000000
+
+
+def ledger(count):
+    balance, entries = 0, []
+    for i in range(count):
+        if i % 3 == 2:
+            balance -= 150 + i
+            entries.append(Transaction("withdrawal", 150 + i, START + 60 * i, balance, "ATM"))
+        else:
+            balance += 1000 + i
+            extra = {"from_account": "ABCD123456", "sender_name": "Payer"} if i % 5 == 0 else None
+            entries.append(Transaction("transfer_in" if extra else "deposit", 1000 + i, START + 60 * i, balance,
+                                       "Money Transfer" if extra else "Cash", extra))
+    # An entry whose amount is not its balance change (a legacy correction)
+    entries.append(Transaction("deposit", 999, START + 60 * count, balance, "Correction"))
+    return entries
+
+
+def round_trip(history):
+    return History.from_encoded(json.loads(json.dumps(history.encode())))
+
+
+def test_history_round_trips_through_its_encoding():
+    entries = ledger(3 * HISTORY_CHECKPOINT + 7)
+    decoded = round_trip(History(entries))
+    assert len(decoded) == len(entries)
+    assert [t.to_dict() for t in decoded] == [t.to_dict() for t in entries]
+    # Reads starting past a checkpoint decode only from the nearest one
+    start = HISTORY_CHECKPOINT + 5
+    assert [t.to_dict() for t in decoded[start:start + 70]] == [t.to_dict() for t in entries[start:start + 70]]
+    assert decoded[-1].amount == 999
+
+
+def test_history_appends_fold_into_the_encoding():
+    entries = ledger(HISTORY_CHECKPOINT - 1)
+    history = round_trip(History(entries[:40]))
+    history.extend(entries[40:])
+    assert len(history) == len(entries)
+    again = round_trip(history)
+    assert [t.to_dict() for t in again] == [t.to_dict() for t in entries]
+    assert again.points() == ([t.ts for t in entries], [t.balance for t in entries])
@@ -0,0 +1,87 @@
+import os
+
+import pytest
+
+from bank import Bank, cli
+from bank.integrity import verify
+from bank.sharding import ShardedStorage, shard_of
+from bank.storage import StorageConflict
+from conftest import open_account
+
+
+def book():
+    return {u['accountNo']: (u['balance'], [t.to_dict() for t in u['transactions']])
+            for u in Bank._load_data()}
+
+
+def test_reshard_keeps_every_account_and_rupee(database, tmp_path):
+    Bank.database = str(tmp_path / "bank")
+    storage = ShardedStorage.create(Bank.database, shards=4)
+    numbers = [open_account(deposit=10000 * (n + 1)) for n in range(12)]
+    for n, sender in enumerate(numbers):
+        assert Bank.transfer_money(sender, "1234", numbers[(n + 5) % len(numbers)], 1000 + n)[0]
+    before = book()
+
+    for shards in (7, 1, 5):
+        assert storage.reshard(shards) == len(numbers)
+        manifest = storage.manifest()
+        assert manifest['shards'] == shards
+        assert book() == before
+        assert sum(balance for balance, _ in book().values()) == sum(10000 * (n + 1) for n in range(12))
+        # Every account sits in the shard its number hashes to, and only there
+        for index in range(shards):
+            members = [u['accountNo'] for u in storage._read_shard(manifest, index)]
+            assert all(shard_of(n, shards) == index for n in members)
+        assert len(os.listdir(Bank.database)) <= 3  # manifest, one generation, commit.seq
+
+
+def test_converting_to_shards_keeps_archived_history(database, tmp_path):
+    numbers = [open_account(deposit=1000 * (n + 1)) for n in range(3)]
+    for account_no in numbers:
+        for amount in (200, 300):
+            assert Bank.deposit_money(account_no, "1234", amount)[0]
+    assert cli.main(["archive", "--keep", "1"]) == 0
+
+    target = str(tmp_path / "shards")
+    assert cli.main(["reshard", "--shards", "4", "--to", target]) == 0
+    Bank.database = target
+    for account_no in numbers:
+        transactions, _ = Bank.filter_transactions(account_no, "1234")
+        assert [t['amount'] for t in transactions][:2] == [1000 * (numbers.index(account_no) + 1), 200]
+        assert len(transactions) == 3
+    assert verify(full=True)['problems'] == []
+    assert open_account() not in numbers
+
+
+def test_a_save_never_overwrites_an_interrupted_commit(database, tmp_path, monkeypatch):
+    Bank.database = str(tmp_path / "bank")
+    storage = ShardedStorage.create(Bank.database, shards=2)
+    numbers = [open_account(deposit=5000) for _ in range(6)]
+    first = next(n for n in numbers if shard_of(n, 2) == 0)
+    second = next(n for n in numbers if shard_of(n, 2) == 1)
+    third = next(n for n in numbers if shard_of(n, 2) == 0 and n != first)
+    stale = storage.load([third])
+
+    # A two-shard commit dies after writing its journal, before any rename
+    replace = os.replace
+
+    def crash(src, dst):
+        if "shard-" in os.path.basename(dst):
+            raise OSError("simulated crash")
+        replace(src, dst)
+    data = storage.load([first, second])
+    for user in data:
+        if user['accountNo'] in (first, second):
+            user['balance'] += 700 if user['accountNo'] == first else -700
+    monkeypatch.setattr(os, "replace", crash)
+    assert not storage.save(data)
+    monkeypatch.setattr(os, "replace", replace)
+
+    # A writer that loaded before the crash must not overwrite the journalled shard
+    for user in stale:
+        if user['accountNo'] == third:
+            user['balance'] += 1
+    with pytest.raises(StorageConflict):
+        storage.save(stale)
+    balances = {u['accountNo']: u['balance'] for u in storage.load()}
+    assert balances[first] == 5700 and balances[second] == 4300 and balances[third] == 5000
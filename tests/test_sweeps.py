@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+
+from bank import Bank
+from conftest import open_account
+
+
+def goal_and_balance(account_no):
+    user = Bank.get_details(account_no, "1234")[0]
+    return user['savings_goals'][0]['current_amount'], user['balance']
+
+
+def test_percent_sweep_follows_deposits_until_the_goal_is_met(database):
+    account_no = open_account()
+    assert Bank.add_savings_goal(account_no, "1234", "Bike", 1500, "2030-01-01", "percent", 10)[0]
+    assert Bank.deposit_money(account_no, "1234", 10005)[0]
+    assert goal_and_balance(account_no) == (1001, 9004)
+    assert Bank.deposit_money(account_no, "1234", 10000)[0]
+    # Capped at what the goal still needs, then the rule is dropped
+    assert goal_and_balance(account_no) == (1500, 18505)
+    assert Bank.deposit_money(account_no, "1234", 10000)[0]
+    assert goal_and_balance(account_no) == (1500, 28505)
+
+
+def test_round_up_sweep_on_withdrawals(database):
+    account_no = open_account(deposit=10000)
+    assert Bank.add_savings_goal(account_no, "1234", "Trip", 100000, "2030-01-01", "roundup", 100)[0]
+    assert Bank.withdraw_money(account_no, "1234", 1250)[0]
+    assert Bank.withdraw_money(account_no, "1234", 300)[0]
+    assert goal_and_balance(account_no) == (50, 8400)
+    types = [t['type'] for t in Bank.get_details(account_no, "1234")[0]['transactions']]
+    assert types == ["deposit", "withdrawal", "savings_contribution", "withdrawal"]
+
+
+def test_fixed_sweep_runs_once_per_period(database):
+    account_no = open_account(deposit=10000)
+    assert Bank.add_savings_goal(account_no, "1234", "Car", 50000, "2030-01-01", "fixed", 2000, "weekly")[0]
+    assert Bank.run_periodic_sweeps() == (True, "Applied 0 periodic sweeps.")
+    next_week = datetime.now() + timedelta(days=7)
+    assert Bank.run_periodic_sweeps(next_week) == (True, "Applied 1 periodic sweeps.")
+    assert Bank.run_periodic_sweeps(next_week) == (True, "Applied 0 periodic sweeps.")
+    assert goal_and_balance(account_no) == (2000, 8000)
+
+
+def test_invalid_sweep_rules_are_refused(database):
+    account_no = open_account()
+    assert Bank.add_savings_goal(account_no, "1234", "A", 500, "2030-01-01", "lottery", 5) == \
+        (False, "Invalid sweep mode.")
+    assert Bank.add_savings_goal(account_no, "1234", "A", 500, "2030-01-01", "percent", 150) == \
+        (False, "Sweep percentage cannot exceed 100.")
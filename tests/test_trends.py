@@ -0,0 +1,47 @@
+from bank import Bank
+from bank.archive import archive_root
+from bank.records import Transaction
+from bank.trends import TrendCache
+from conftest import open_account
+
+
+def view(cache, account_no):
+    user = Bank.get_details(account_no, "1234")[0]
+    return cache.view(archive_root(Bank.database), user)
+
+
+def test_views_are_reused_extended_and_rebuilt(database):
+    cache = TrendCache()
+    account_no = open_account()
+    for amount in (100, 200, 300):
+        assert Bank.deposit_money(account_no, "1234", amount)[0]
+
+    first = view(cache, account_no)
+    assert first.balance == [100, 300, 600] and first.types == {"deposit": 3}
+    assert view(cache, account_no) is first
+
+    assert Bank.withdraw_money(account_no, "1234", 50)[0]
+    extended = view(cache, account_no)
+    assert extended is first and extended.balance == [100, 300, 600, 550]
+    assert extended.types == {"deposit": 3, "withdrawal": 1}
+
+    # Archiving moves entries between tiers without changing the ledger
+    assert Bank.archive_transactions(keep_last=1)[0]
+    assert view(cache, account_no) is first
+
+    # An edited ledger of the same length is drawn afresh
+    user = Bank.get_details(account_no, "1234")[0]
+    user['transactions'] = [Transaction.from_dict(dict(t.to_dict(), balance=t.balance + 1))
+                            for t in user['transactions']]
+    assert cache.view(archive_root(Bank.database), user).balance == [100, 300, 600, 551]
+    assert cache.requests == {"hit": 2, "extended": 1, "miss": 2}
+
+
+def test_cache_is_bounded_by_points(database):
+    cache = TrendCache(max_points=5)
+    accounts = [open_account(deposit=100) for _ in range(3)]
+    for account_no in accounts:
+        assert Bank.deposit_money(account_no, "1234", 100)[0]
+        view(cache, account_no)
+    assert len(cache.views) == 2 and cache.points == 4
+    assert list(key[1] for key in cache.views) == accounts[1:]
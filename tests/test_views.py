@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from bank import Bank
+from bank.views import type_totals
+from conftest import open_account
+
+
+def test_views_fold_only_new_entries(database):
+    assert Bank.bank_views() == (None, "No views yet; refresh them first.")
+    payer = open_account(deposit=5000)
+    payee = open_account(deposit=1000)
+    assert Bank.transfer_money(payer, "1234", payee, 1200)[0]
+    assert Bank.pay_bill(payer, "1234", "Electricity", "UPPCL", "BN-1", 300)[0]
+    assert Bank.refresh_views()[1].startswith("Rebuilt views from 5 transactions of 2 accounts")
+
+    assert Bank.deposit_money(payee, "1234", 700)[0]
+    assert Bank.refresh_views()[1].startswith("Folded 1 transactions of 1 accounts")
+    dashboard, _ = Bank.bank_views()
+    assert dashboard['transactions'] == 6
+    assert [row[0] for row in dashboard['top_senders']] == [payer]
+    assert dashboard['top_receivers'][0][2:] == [1, 1200]
+    assert dashboard['bills'] == [["Electricity - UPPCL", 1, 300]]
+    today = datetime.now().strftime("%Y-%m-%d")
+    assert type_totals(dashboard, today, today)['deposit'] == [3, 6700]
+    assert type_totals(dashboard, "2000-01-01", "2000-01-02") == {}
+
+
+def test_deleted_account_forces_a_rebuild(database):
+    keep = open_account(deposit=5000)
+    gone = open_account(deposit=1000)
+    assert Bank.refresh_views()[0]
+    assert Bank.delete_account(gone, "1234")[0]
+    assert Bank.refresh_views()[1].startswith("Rebuilt views from 1 transactions of 1 accounts")
+    dashboard, _ = Bank.bank_views()
+    assert dashboard['accounts'] == 1 and dashboard['transactions'] == 1
+    assert Bank.deposit_money(keep, "1234", 100)[0]
+    assert Bank.refresh_views(rebuild=True)[1].startswith("Rebuilt views from 2 transactions")